@@ -0,0 +1,83 @@
+"""
+Measures the cost of one alert-checking tick with a large number of registered alerts,
+comparing the AlertBook bisection against a naive scan over every alert.
+
+Usage: python benchmarks/bench_alert_engine.py [num_alerts] [num_coins]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.alert_engine import AlertBook
+
+
+def make_alerts(count, coins, rng):
+    alerts = []
+    for i in range(count):
+        coin = coins[i % len(coins)]
+        alerts.append({
+            "user_id": rng.randrange(10 ** 6),
+            "channel_id": rng.randrange(10 ** 6),
+            "coin": coin,
+            "target_price": round(rng.uniform(50.0, 150.0), 4),
+        })
+    return alerts
+
+
+def naive_tick(alerts, previous, prices):
+    # Scan every alert and test whether the move crossed its target
+    fired = []
+    for alert in alerts:
+        prev = previous[alert['coin']]
+        price = prices[alert['coin']]
+        low, high = min(prev, price), max(prev, price)
+        if low <= alert['target_price'] <= high:
+            fired.append(alert)
+    return fired
+
+
+def main():
+    num_alerts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    num_coins = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    ticks = 200
+    rng = random.Random(7)
+    coins = [f"COIN{i}" for i in range(num_coins)]
+    alerts = make_alerts(num_alerts, coins, rng)
+
+    # Random walk prices with small moves, as in consecutive one-minute ticks
+    walk = [{coin: 100.0 for coin in coins}]
+    for _ in range(ticks):
+        walk.append({coin: price * (1 + rng.gauss(0, 0.0005)) for coin, price in walk[-1].items()})
+
+    start = time.perf_counter()
+    book = AlertBook(alerts)
+    build_ms = (time.perf_counter() - start) * 1000
+    for coin, price in walk[0].items():
+        book.evaluate(coin, price)
+
+    fired_total = 0
+    start = time.perf_counter()
+    for prices in walk[1:]:
+        for coin, price in prices.items():
+            fired_total += len(book.evaluate(coin, price))
+    book_tick_us = (time.perf_counter() - start) / ticks * 1e6
+
+    naive_ticks = 10
+    start = time.perf_counter()
+    for i in range(naive_ticks):
+        naive_tick(alerts, walk[i], walk[i + 1])
+    naive_tick_us = (time.perf_counter() - start) / naive_ticks * 1e6
+
+    print(f"alerts registered:   {num_alerts} across {num_coins} coins")
+    print(f"book build:          {build_ms:.1f} ms")
+    print(f"alerts fired:        {fired_total} over {ticks} ticks")
+    print(f"AlertBook per tick:  {book_tick_us:,.1f} us")
+    print(f"naive scan per tick: {naive_tick_us:,.1f} us")
+    print(f"speedup:             {naive_tick_us / book_tick_us:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
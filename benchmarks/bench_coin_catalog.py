@@ -0,0 +1,91 @@
+"""
+Compares coin symbol validation throughput: the old per-call coins.json reload
+with a linear scan versus the in-memory CoinCatalog index.
+
+Usage: python benchmarks/bench_coin_catalog.py [num_coins]
+"""
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.coin_catalog import CoinCatalog, load_catalog
+
+
+def make_coins(count):
+    rng = random.Random(42)
+    coins = []
+    for i in range(count):
+        symbol = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 6)))
+        coins.append({
+            "id": i + 1,
+            "rank": i + 1,
+            "name": f"Coin {symbol} {i}",
+            "symbol": symbol,
+            "slug": f"coin-{symbol.lower()}-{i}",
+            "is_active": 1,
+            "first_historical_data": "2020-01-01T00:00:00.000Z",
+            "last_historical_data": "2024-01-01T00:00:00.000Z",
+            "platform": None,
+        })
+    return coins
+
+
+def old_is_valid_coin(path, coin_symbol):
+    # The previous implementation: parse the whole file and scan it on every call
+    try:
+        with open(path, 'r') as f:
+            coins = json.load(f)
+    except FileNotFoundError:
+        return False
+    for coin in coins:
+        if coin['symbol'].upper() == coin_symbol.upper():
+            return True
+    return False
+
+
+def measure(func, symbols, min_seconds=1.0):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for symbol in symbols:
+            func(symbol)
+        calls += len(symbols)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls / elapsed
+
+
+def main():
+    num_coins = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    coins = make_coins(num_coins)
+    # Mix of hits spread across the list and misses
+    symbols = [coin['symbol'] for coin in random.Random(1).sample(coins, 50)] + ['NOPE1', 'NOPE2']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'coins.json')
+        with open(path, 'w') as f:
+            json.dump(coins, f, indent=4)
+
+        start = time.perf_counter()
+        catalog = load_catalog(path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        old_rate = measure(lambda s: old_is_valid_coin(path, s), symbols)
+        new_rate = measure(catalog.has_symbol, symbols)
+
+    assert isinstance(catalog, CoinCatalog) and len(catalog) == num_coins
+    print(f"coins in catalog:        {num_coins}")
+    print(f"catalog build (one-off): {load_ms:.1f} ms")
+    print(f"old lookups/sec:         {old_rate:,.1f}")
+    print(f"new lookups/sec:         {new_rate:,.0f}")
+    print(f"speedup:                 {new_rate / old_rate:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Renders per second for the !predict forecast chart: the original pyplot implementation
+against the pooled Agg templates in utils/forecast_chart.py, across thread counts.
+The pyplot version is only run single-threaded, since its global state isn't thread-safe.
+
+Usage: python benchmarks/bench_forecast_chart.py [renders] [threads ...]
+"""
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.forecast_chart import render_forecast_chart
+
+CANDLES = 200
+HORIZON = 5
+
+
+def pyplot_chart(close, forecast, title):
+    # generate_forecast_chart as it was before the template renderer
+    plt.figure(figsize=(10, 6))
+    plt.plot(close, label='Historical Close Price')
+    plt.plot(forecast, label='ARIMA Forecast', linestyle='--')
+    plt.title(title)
+    plt.xlabel('Time')
+    plt.ylabel('Price (USDT)')
+    plt.legend()
+    plt.grid(True)
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png')
+    buf.seek(0)
+    plt.close()
+    return buf
+
+
+def make_inputs(count, rng):
+    inputs = []
+    for i in range(count):
+        close = pd.Series(30000 * np.exp(np.cumsum(rng.normal(0, 0.01, CANDLES))))
+        forecast = pd.Series(close.iloc[-1] * np.exp(np.cumsum(rng.normal(0, 0.01, HORIZON))),
+                             index=pd.RangeIndex(CANDLES, CANDLES + HORIZON))
+        inputs.append((close, forecast, f'COIN{i % 10} Price Forecast (1h)'))
+    return inputs
+
+
+def rate(render, inputs, threads):
+    start = time.perf_counter()
+    if threads == 1:
+        for args in inputs:
+            render(*args)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda args: render(*args), inputs))
+    return len(inputs) / (time.perf_counter() - start)
+
+
+def main():
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    thread_counts = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4, 8]
+    inputs = make_inputs(renders, np.random.default_rng(5))
+
+    # Warm up both paths (font cache, first template)
+    pyplot_chart(*inputs[0])
+    render_forecast_chart(*inputs[0])
+
+    print(f"pyplot, 1 thread:     {rate(pyplot_chart, inputs, 1):7.1f} renders/s")
+    for threads in thread_counts:
+        print(f"templates, {threads} thread{'s' if threads > 1 else ' '}: "
+              f"{rate(render_forecast_chart, inputs, threads):7.1f} renders/s")
+
+
+if __name__ == "__main__":
+    main()
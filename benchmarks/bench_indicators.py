@@ -0,0 +1,98 @@
+"""
+Checks the NumPy indicator batch path against the original pandas pipeline and
+times pandas, the batch path and a repeated IndicatorEngine analysis of an unchanged window.
+
+Usage: python benchmarks/bench_indicators.py [num_candles]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.indicators import IndicatorEngine, compute_indicators
+
+TOLERANCE = 1e-8
+
+
+def pandas_indicators(df):
+    # The original calculate_indicators implementation, kept here as the reference
+    df['EMA_12'] = df['close'].ewm(span=12, adjust=False).mean()
+    df['EMA_26'] = df['close'].ewm(span=26, adjust=False).mean()
+    df['EMA_100'] = df['close'].ewm(span=100, adjust=False).mean()
+    df['EMA_200'] = df['close'].ewm(span=200, adjust=False).mean()
+    delta = df['close'].diff(1)
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=14).mean()
+    avg_loss = loss.rolling(window=14).mean()
+    rs = avg_gain / (avg_loss + 1e-9)
+    df['RSI'] = 100 - (100 / (1 + rs))
+    df['MACD'] = df['EMA_12'] - df['EMA_26']
+    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    return df
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    num_candles = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, num_candles)))
+    open_times = np.arange(num_candles, dtype=np.int64) * 3_600_000
+    df = pd.DataFrame({'timestamp': open_times, 'close': close})
+
+    # Parity: batch path vs pandas, and a freshly seeded engine vs the batch path's last row
+    reference = pandas_indicators(df.copy())
+    batch = compute_indicators(close)
+    worst = 0.0
+    for column, values in batch.items():
+        expected = reference[column].to_numpy()
+        assert np.array_equal(np.isnan(expected), np.isnan(values)), column
+        mask = ~np.isnan(expected)
+        error = np.max(np.abs(values[mask] - expected[mask]) / np.maximum(1.0, np.abs(expected[mask])))
+        worst = max(worst, error)
+        assert error < TOLERANCE, f"{column} differs from pandas by {error}"
+
+    # The engine must give the batch result for whatever window it is handed, regardless of
+    # the windows (shorter, older, or the same one with a different forming close) seen before
+    engine = IndicatorEngine()
+    longer_times = np.append(open_times, open_times[-1] + 3_600_000)
+    longer_close = np.append(close, close[-1] * 1.001)
+    windows = [
+        (open_times[-min(100, num_candles):], close[-min(100, num_candles):]),
+        (open_times, close * np.append(np.ones(num_candles - 1), 0.99)),
+        (open_times, close),
+        (longer_times[1:], longer_close[1:]),
+    ]
+    for times, closes in windows:
+        latest = engine.latest('BENCH', '1h', times, closes)
+        expected = compute_indicators(closes)
+        for column, values in expected.items():
+            if not np.isnan(values[-1]):
+                assert abs(latest[column] - values[-1]) <= TOLERANCE * max(1.0, abs(values[-1])), column
+
+    repeat = 200 if num_candles <= 10_000 else 10
+    pandas_us = timed(lambda: pandas_indicators(df.copy()), repeat)
+    batch_us = timed(lambda: compute_indicators(close), repeat)
+
+    # Repeated analysis while the newest candle is still forming: only that candle is evaluated
+    incremental_us = timed(lambda: engine.latest('BENCH', '1h', longer_times[1:], longer_close[1:]), 2000)
+
+    print(f"candles:                   {num_candles}")
+    print(f"max relative error:        {worst:.2e} (tolerance {TOLERANCE:.0e})")
+    print(f"pandas pipeline:           {pandas_us:,.1f} us")
+    print(f"NumPy batch path:          {batch_us:,.1f} us")
+    print(f"repeated latest():         {incremental_us:,.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Startup cost of bot.py: time from interpreter launch until bot.run() is reached (everything
+the bot does before it starts connecting to the gateway), plus an `-X importtime` breakdown.
+
+Runs bot.py in a subprocess with Bot.run patched to report and exit, so no token or network
+is needed. Fails if a deferred heavy module (utils/prewarm.py) is imported at startup, if
+startup exceeds --max-seconds, or if a forecast pool worker (which re-imports bot.py as
+__mp_main__) does not come up to run a job, e.g. because importing bot.py started the bot.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N] [--max-seconds S]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.prewarm import HEAVY_MODULES
+
+CHILD = """
+import os, sys, time
+import discord.ext.commands
+def run(self, *args, **kwargs):
+    print('ready_to_connect', time.time() - float(os.environ['STARTUP_T0']))
+    print('heavy_loaded', ','.join(m for m in sys.argv[1:] if m in sys.modules))
+    if os.environ.get('STARTUP_WORKER_CHECK'):
+        # Still inside run_path, so spawned workers import bot.py as __mp_main__, as under `python bot.py`
+        from utils.forecasting import get_executor
+        executor = get_executor()
+        try:
+            print('worker_ok', executor.submit(os.getpid).result(timeout=60))
+        except Exception as e:
+            print('worker_failed', repr(e))
+        # The workers hold our stdout open; stop them rather than leave them waiting for work
+        executor.shutdown(wait=True, cancel_futures=True)
+    sys.stdout.flush()
+    os._exit(0)
+discord.ext.commands.Bot.run = run
+import runpy
+runpy.run_path('bot.py', run_name='__main__')
+"""
+
+
+def _run_child(importtime=False, worker_check=False):
+    env = dict(os.environ, STARTUP_T0=repr(time.time()), DISCORD_BOT_TOKEN='unused')
+    if worker_check:
+        env['STARTUP_WORKER_CHECK'] = '1'
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD] + HEAVY_MODULES
+    result = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    fields = dict(line.split(' ', 1) for line in result.stdout.splitlines()
+                  if line.startswith(('ready_to_connect', 'heavy_loaded', 'worker_ok', 'worker_failed')))
+    if 'ready_to_connect' not in fields:
+        sys.exit(f"bot.py did not reach bot.run():\n{result.stderr[-2000:]}")
+    return fields, result.stderr
+
+
+def run_once(importtime):
+    fields, stderr = _run_child(importtime=importtime)
+    heavy = [name for name in fields.get('heavy_loaded', '').strip().split(',') if name]
+    return float(fields['ready_to_connect']), heavy, stderr
+
+
+def check_worker():
+    """
+    Returns None if a forecast pool worker started from bot.py runs a job, otherwise why not.
+    """
+    fields, stderr = _run_child(worker_check=True)
+    if 'worker_ok' in fields:
+        return None
+    return f"{fields.get('worker_failed', 'no result').strip()}\n{stderr[-2000:]}"
+
+
+def import_breakdown(stderr):
+    # `import time: self | cumulative | name`, nested imports indented under their parent
+    roots = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  '):
+            continue  # Nested: already counted in its top-level import
+        package = name.strip().split('.')[0]
+        roots[package] = roots.get(package, 0) + int(cumulative)
+    return sorted(roots.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-seconds', type=float, default=None)
+    args = parser.parse_args()
+
+    times = []
+    heavy = []
+    for _ in range(args.runs):
+        seconds, heavy, _ = run_once(importtime=False)
+        times.append(seconds)
+    _, _, stderr = run_once(importtime=True)
+
+    print(f"Time to bot.run(): median {statistics.median(times):.3f}s | "
+          f"min {min(times):.3f}s | max {max(times):.3f}s ({args.runs} runs)")
+    print(f"\nImport time by top-level package (cumulative, one -X importtime run):")
+    breakdown = import_breakdown(stderr)
+    for package, micros in breakdown[:args.top]:
+        print(f"  {package:<28} {micros / 1000:8.1f} ms")
+
+    failed = False
+    worker_error = check_worker()
+    if worker_error:
+        print(f"\nFAIL: a forecast worker did not run a job (does importing bot.py start the bot?): {worker_error}")
+        failed = True
+    if heavy:
+        print(f"\nFAIL: deferred modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if args.max_seconds is not None and statistics.median(times) > args.max_seconds:
+        print(f"\nFAIL: startup {statistics.median(times):.3f}s exceeds {args.max_seconds:.3f}s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
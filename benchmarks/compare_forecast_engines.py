@@ -0,0 +1,76 @@
+"""
+Accuracy and speed comparison of the forecasting engines in utils/get_crypto_data.py
+on the recorded kline fixtures: the statsmodels ARIMA(5,1,0) fit and the NumPy
+least-squares AR(5) fast path (single and batch).
+
+For each fixture, forecasts are made from a series of rolling origins over a
+200-candle window (as !predict uses) and compared with each other and with the
+closes that actually followed.
+
+Usage: python benchmarks/compare_forecast_engines.py [origins_per_fixture]
+"""
+import glob
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.get_crypto_data import arima_forecast, ar_forecast_batch
+
+WINDOW = 200
+HORIZON = 5
+
+
+def load_closes(path):
+    with open(path, 'r') as f:
+        return np.array([float(row[4]) for row in json.load(f)])
+
+
+def main():
+    origins_per_fixture = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    warnings.filterwarnings('ignore')  # statsmodels convergence chatter
+    fixtures = sorted(glob.glob(os.path.join(ROOT, 'fixtures', 'binance_klines_*.json')))
+
+    print(f"{'fixture':<32} {'engine gap':>10} {'MAE arima':>10} {'MAE numpy':>10} "
+          f"{'arima/fit':>10} {'numpy/fit':>10} {'batch/fit':>10}")
+    for path in fixtures:
+        closes = load_closes(path)
+        last_origin = len(closes) - HORIZON
+        origins = np.linspace(WINDOW, last_origin, origins_per_fixture).astype(int)
+        windows = np.stack([closes[origin - WINDOW:origin] for origin in origins])
+        actual = np.stack([closes[origin:origin + HORIZON] for origin in origins])
+
+        start = time.perf_counter()
+        arima = np.stack([arima_forecast(pd.DataFrame({'close': window}), HORIZON, engine='statsmodels')[0].to_numpy()
+                          for window in windows])
+        arima_ms = (time.perf_counter() - start) * 1000 / len(origins)
+
+        start = time.perf_counter()
+        single = np.stack([arima_forecast(pd.DataFrame({'close': window}), HORIZON, engine='numpy')[0].to_numpy()
+                           for window in windows])
+        numpy_ms = (time.perf_counter() - start) * 1000 / len(origins)
+
+        start = time.perf_counter()
+        batch = ar_forecast_batch(windows, HORIZON)
+        batch_ms = (time.perf_counter() - start) * 1000 / len(origins)
+        assert np.allclose(single, batch)
+
+        scale = windows[:, -1:]
+        gap = np.mean(np.abs(arima - batch) / scale) * 100
+        mae_arima = np.mean(np.abs(arima - actual) / scale) * 100
+        mae_numpy = np.mean(np.abs(batch - actual) / scale) * 100
+        print(f"{os.path.basename(path):<32} {gap:>9.3f}% {mae_arima:>9.3f}% {mae_numpy:>9.3f}% "
+              f"{arima_ms:>8.1f}ms {numpy_ms:>8.2f}ms {batch_ms:>8.3f}ms")
+
+    print("\nErrors are mean absolute differences as a percentage of the last close in each window.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Offline benchmark suite for the bot's hot paths, run on the recorded Binance kline fixtures
+(tiled into longer series where a size needs more candles than were recorded):
+
+  parse_klines          JSON text to the DataFrame !analyze and !predict get (parse_binance_klines + _rows_to_df)
+  parse_klines_chart    JSON text to the candle dicts !chart gets (parse_binance_klines + _rows_to_klines)
+  parse_klines_store    the kline store's decode: JSON text to a float64 row array
+  calculate_indicators  EMA/RSI/MACD columns on a DataFrame
+  arima_statsmodels     arima_forecast with the statsmodels engine
+  arima_numpy           arima_forecast with the least-squares engine
+  forecast_chart        generate_forecast_chart (the !predict image)
+  candlestick_figure    build_candlestick_figure (the !chart Plotly figure)
+  candlestick_render    Kaleido PNG export of that figure (skipped if Chrome is unavailable)
+  scan_scoring          the coin_analysis screening kernel over N coins of 100 candles
+
+Each case is timed at several sizes and its best time is compared with benchmarks/baselines.json.
+A case slower than its baseline by more than the threshold is measured once more, for longer,
+and the run fails if it is still over.
+
+Usage: python benchmarks/suite.py [--quick] [--only CASE ...] [--threshold 0.25]
+                                  [--baseline PATH] [--save-baseline]
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.get_crypto_data import (_rows_to_df, _rows_to_klines, calculate_indicators, arima_forecast,
+                                   generate_forecast_chart)
+from utils.kline_store import parse_binance_klines
+from utils.charts import build_candlestick_figure
+from utils.screening import screen, build_close_matrix
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+DEFAULT_THRESHOLD = 0.25
+
+CANDLE_SIZES = [100, 1000, 10000, 100000]
+COIN_SIZES = [10, 100, 1000]
+
+# Sizes per case; the slow fits and renders stop where the bot itself stops (!chart and !predict
+# never ask for more than 1000 candles)
+SIZES = {
+    "parse_klines": CANDLE_SIZES,
+    "parse_klines_chart": CANDLE_SIZES,
+    "parse_klines_store": CANDLE_SIZES,
+    "calculate_indicators": CANDLE_SIZES,
+    "arima_statsmodels": [100, 200, 1000],
+    "arima_numpy": CANDLE_SIZES,
+    "forecast_chart": [100, 1000, 10000],
+    "candlestick_figure": [100, 1000, 10000],
+    "candlestick_render": [100, 1000],
+    "scan_scoring": COIN_SIZES,
+}
+QUICK_SIZES = {case: sizes[:2] for case, sizes in SIZES.items()}
+
+
+# --- Fixtures ------------------------------------------------------------------------------------
+
+def load_fixtures():
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'fixtures', 'binance_klines_*.json'))):
+        with open(path, 'r') as f:
+            fixtures.append(json.load(f))
+    if not fixtures:
+        sys.exit("No fixtures found in fixtures/binance_klines_*.json")
+    return fixtures
+
+
+def tile_klines(rows, count):
+    """
+    Repeats recorded kline rows until there are `count` of them, shifting each copy's times and
+    rescaling its prices so the series stays continuous. Rows keep Binance's string fields.
+    """
+    step = rows[1][0] - rows[0][0]
+    out = []
+    offset = 0
+    scale = 1.0
+    while len(out) < count:
+        for row in rows[:count - len(out)]:
+            out.append([
+                row[0] + offset, f"{float(row[1]) * scale:.8f}", f"{float(row[2]) * scale:.8f}",
+                f"{float(row[3]) * scale:.8f}", f"{float(row[4]) * scale:.8f}", row[5],
+                row[6] + offset, row[7], row[8], row[9], row[10], row[11],
+            ])
+        offset = out[-1][0] + step - rows[0][0]
+        scale *= float(rows[-1][4]) / float(rows[0][1])
+    return out
+
+
+class Data:
+    """
+    Inputs for every case, built once per size from the fixtures.
+    """
+
+    def __init__(self):
+        self.fixtures = load_fixtures()
+        self._cache = {}
+
+    def _get(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def klines(self, count):
+        return self._get(('klines', count), lambda: tile_klines(self.fixtures[0], count))
+
+    def klines_text(self, count):
+        return self._get(('text', count), lambda: json.dumps(self.klines(count)))
+
+    def rows(self, count):
+        return self._get(('rows', count), lambda: parse_binance_klines(self.klines(count)))
+
+    def df(self, count):
+        return self._get(('df', count), lambda: _rows_to_df(self.rows(count)))
+
+    def forecast(self, count):
+        return self._get(('forecast', count), lambda: arima_forecast(self.df(count), engine='numpy')[0])
+
+    def parsed(self, count):
+        return self._get(('parsed', count), lambda: _rows_to_klines(self.rows(count)))
+
+    def coin_closes(self, coins):
+        # 100-candle windows from every fixture, as the scan screens them
+        def build():
+            windows = []
+            for index in range(coins):
+                rows = self.fixtures[index % len(self.fixtures)]
+                start = (index * 37) % (len(rows) - 100)
+                windows.append(np.array([float(row[4]) for row in rows[start:start + 100]]))
+            return windows
+        return self._get(('coins', coins), build)
+
+
+# --- Cases ---------------------------------------------------------------------------------------
+
+def _render_png(fig):
+    from utils.chart_renderer import get_renderer
+    return get_renderer().submit(fig, 1000, 600).result(timeout=60)
+
+
+def make_case(name, size, data):
+    """
+    Returns a zero-argument callable running one iteration of the case at that size.
+    """
+    if name == "parse_klines":
+        text = data.klines_text(size)
+        return lambda: _rows_to_df(parse_binance_klines(json.loads(text)))
+    if name == "parse_klines_chart":
+        text = data.klines_text(size)
+        return lambda: _rows_to_klines(parse_binance_klines(json.loads(text)))
+    if name == "parse_klines_store":
+        text = data.klines_text(size)
+        return lambda: parse_binance_klines(json.loads(text))
+    if name == "calculate_indicators":
+        df = data.df(size)
+        return lambda: calculate_indicators(df)
+    if name == "arima_statsmodels":
+        df = data.df(size)
+        return lambda: arima_forecast(df, engine='statsmodels')
+    if name == "arima_numpy":
+        df = data.df(size)
+        return lambda: arima_forecast(df, engine='numpy')
+    if name == "forecast_chart":
+        df, forecast = data.df(size), data.forecast(size)
+        return lambda: generate_forecast_chart(df, forecast, 'BTC', '1h')
+    if name == "candlestick_figure":
+        parsed = data.parsed(size)
+        return lambda: build_candlestick_figure('BTC', '1h', size, parsed)
+    if name == "candlestick_render":
+        fig = build_candlestick_figure('BTC', '1h', size, data.parsed(size))
+        return lambda: _render_png(fig)
+    if name == "scan_scoring":
+        closes = data.coin_closes(size)
+        return lambda: screen(build_close_matrix(closes))
+    raise ValueError(f"Unknown case {name}")
+
+
+def measure(func, min_time, max_repeats):
+    """
+    Fastest seconds per call, after one warm-up call; repeats until min_time has been spent
+    (at least 3 and at most max_repeats calls). The minimum is the least noisy estimate on a
+    shared machine: other load only ever makes a call slower.
+    """
+    func()
+    samples = []
+    spent = 0.0
+    while len(samples) < 3 or (spent < min_time and len(samples) < max_repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        spent += elapsed
+    return min(samples)
+
+
+# --- Baselines -----------------------------------------------------------------------------------
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or "unknown",
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {"environment": {}, "results": {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_baseline(path, baseline, results):
+    for name, sizes in results.items():
+        baseline["results"].setdefault(name, {}).update(
+            {str(size): seconds for size, seconds in sizes.items() if seconds is not None})
+    baseline["environment"] = environment()
+    baseline["recorded"] = datetime.date.today().isoformat()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def _format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+# --- Main ----------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the bot's hot paths.")
+    parser.add_argument('--quick', action='store_true', help="two smallest sizes per case, fewer repeats")
+    parser.add_argument('--only', nargs='+', choices=list(SIZES), help="run only these cases")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown over the baseline, as a fraction (default 0.25)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline file to compare with")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run's timings as the baseline")
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')  # statsmodels convergence chatter
+    sizes = QUICK_SIZES if args.quick else SIZES
+    min_time, max_repeats = (0.05, 5) if args.quick else (0.5, 50)
+    baseline = load_baseline(args.baseline)
+    if baseline["environment"] and baseline["environment"] != environment():
+        print(f"Note: the baseline was recorded on {baseline['environment']}, "
+              f"this run is on {environment()}; comparisons across machines are only indicative.\n")
+
+    data = Data()
+    results = {}
+    regressions = []
+    print(f"{'case':<22} {'size':>7} {'best':>10} {'baseline':>10} {'change':>8}")
+    for name in args.only or list(SIZES):
+        results[name] = {}
+        for size in sizes[name]:
+            try:
+                seconds = measure(make_case(name, size, data), min_time, max_repeats)
+            except Exception as e:
+                # Only expected for candlestick_render without a Chrome install
+                print(f"{name:<22} {size:>7} {'skipped':>10}  ({type(e).__name__}: {str(e).split('. ')[0]})")
+                results[name][size] = None
+                continue
+            results[name][size] = seconds
+
+            base = baseline["results"].get(name, {}).get(str(size))
+            if base is None:
+                print(f"{name:<22} {size:>7} {_format_seconds(seconds):>10} {'-':>10} {'new':>8}")
+                continue
+            change = seconds / base - 1
+            if change > args.threshold:
+                # Confirm before reporting: a burst of other load can slow one measurement
+                seconds = min(seconds, measure(make_case(name, size, data), min_time * 4, max_repeats * 2))
+                results[name][size] = seconds
+                change = seconds / base - 1
+            flag = ""
+            if change > args.threshold:
+                flag = "  REGRESSION"
+                regressions.append((name, size, change))
+            print(f"{name:<22} {size:>7} {_format_seconds(seconds):>10} {_format_seconds(base):>10} "
+                  f"{change:>+7.0%}{flag}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, baseline, results)
+        print(f"\nBaseline saved to {os.path.relpath(args.baseline, ROOT)}")
+
+    try:
+        from utils.chart_renderer import get_renderer
+        get_renderer().stop()
+    except Exception:
+        pass
+
+    if regressions and not args.save_baseline:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for name, size, change in regressions:
+            print(f"  {name} at {size}: {change:+.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,18 @@ import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 import os
-from commands import crypto, setnews, chart, alert, predict, analyze_command, search
-from tasks.crypto_news import start_crypto_news
+import asyncio
+from commands import crypto, setnews, chart, alert, predict, analyze_command, search, diagnostics, stats
+from tasks.crypto_news import crypto_news, start_crypto_news
+from tasks.check_alerts import check_alerts, start_price_stream
+from utils import price_stream
+from utils.chart_renderer import get_renderer
+from utils.prewarm import prewarm, PREWARM_ENABLED
 from tasks.coin_analysis import analyze_coins
-from tasks.discover_coins import discover_coins
+from tasks.discover_coins import coin_discovery
+from tasks.prerender_charts import prerender_charts, CHART_PRERENDER_ENABLED
+from tasks.export_metrics import export_metrics
+from utils import metrics
 
 # Load environment variables
 load_dotenv()
@@ -27,21 +35,56 @@ bot.add_command(alert.set_alert)
 bot.add_command(predict.predict)
 bot.add_command(analyze_command.analyze)
 bot.add_command(search.search)
+bot.add_command(diagnostics.diagnostics)
+bot.add_command(stats.stats)
 
+# Time every command and count command errors
+metrics.instrument_bot(bot)
 
 
+
+# Background import prewarm, started on the first on_ready only
+_prewarm_task = None
+
 # Event listener for when the bot becomes ready
 @bot.event
 async def on_ready():
     print(f'{bot.user.name} has connected to Discord!')
-    # Discover all coins and save them to a file
-    discover_coins()
-    # Start the background tasks
-    start_crypto_news(bot)
-    analyze_coins.start()
+    # Start measuring event-loop lag and exporting metrics
+    metrics.start_loop_monitor()
+    if metrics.METRICS_PORT:
+        await metrics.start_metrics_server()
+    if metrics.METRICS_FILE and not export_metrics.is_running():
+        export_metrics.start()
+    # Launch the chart renderer's browser in the background so the first !chart doesn't pay for it
+    get_renderer().start()
+    # Load the heavy libraries that are deferred at import time, without holding up the rest of on_ready
+    global _prewarm_task
+    if PREWARM_ENABLED and _prewarm_task is None:
+        _prewarm_task = asyncio.create_task(prewarm())
+    # Start the background tasks (on_ready fires again after reconnects, so only start them once)
+    if not coin_discovery.is_running():
+        coin_discovery.start()
+    if not crypto_news.is_running():
+        start_crypto_news(bot)
+    if not analyze_coins.is_running():
+        analyze_coins.start()
+    if not check_alerts.is_running():
+        check_alerts.start(bot)
+    if price_stream.PRICE_STREAM_ENABLED and price_stream.live_stream is None:
+        start_price_stream(bot)
+    if CHART_PRERENDER_ENABLED and not prerender_charts.is_running():
+        prerender_charts.start()
 
 # Store bot reference globally in analyze_coins
 analyze_coins.bot = bot
 
-# Run the bot
-bot.run(os.getenv("DISCORD_BOT_TOKEN"))
+def main():
+    # Run the bot
+    bot.run(os.getenv("DISCORD_BOT_TOKEN"))
+
+
+# Guarded: the forecast pool's spawned workers import this script again as __mp_main__
+# (utils/forecasting.py), and must not start a second bot
+if __name__ == "__main__":
+    main()
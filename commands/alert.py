@@ -1,10 +1,7 @@
 import discord
 from discord.ext import commands
-import os
-import json
-
-# Store alerts in memory for now
-alerts = []
+from utils.alert_store import get_alert_store
+from utils import price_stream
 
 @commands.command(name='alert')
 async def set_alert(ctx, coin: str, target_price: str):
@@ -15,18 +12,10 @@ async def set_alert(ctx, coin: str, target_price: str):
         await ctx.send("Invalid target price format. Please enter a valid number.")
         return
 
-    # Create an alert
-    alert = {
-        "user_id": ctx.author.id,
-        "channel_id": ctx.channel.id,
-        "coin": coin.upper(),
-        "target_price": target_price
-    }
-    alerts.append(alert)
-
-    # Save alerts to a file (simple persistence)
-    with open('alerts.json', 'w') as f:
-        json.dump(alerts, f)
+    # Create and persist the alert (shared with the alert checker)
+    get_alert_store().add(ctx.author.id, ctx.channel.id, coin.upper(), target_price)
+    if price_stream.live_stream is not None:
+        price_stream.live_stream.refresh()  # Subscribe to the coin right away
 
     # Confirmation message
     await ctx.send(f"Alert set for {coin.upper()} at ${target_price:.2f}. You will be notified once the price reaches your target.")
@@ -1,17 +1,23 @@
 import discord
 from discord.ext import commands
-from utils.get_crypto_data import get_crypto_data, get_crypto_metadata
+from utils.get_crypto_data import get_crypto_data_async, get_crypto_metadata_async
+from utils.price_stream import get_live_price
+from utils.coalesce import Reply, coalesced, send_reply
+import asyncio
 import datetime
 
 @commands.command(name='crypto')
 async def crypto(ctx, coin: str):
+    # Identical lookups in flight or just answered share one reply
+    reply = await coalesced('crypto', coin.upper(), lambda: build_crypto_reply(coin))
+    await send_reply(ctx, reply)
+
+async def build_crypto_reply(coin):
     # Get crypto data for the provided coin symbol
-    data = get_crypto_data(coin)
-    metadata = get_crypto_metadata(coin)
+    data, metadata = await asyncio.gather(get_crypto_data_async(coin), get_crypto_metadata_async(coin))
 
     if not data or not metadata:
-        await ctx.send(f"Could not retrieve data for {coin}. Please check the coin symbol and try again.")
-        return
+        return Reply(f"Could not retrieve data for {coin}. Please check the coin symbol and try again.")
 
     try:
         # Extracting coin data
@@ -22,7 +28,9 @@ async def crypto(ctx, coin: str):
         quote = coin_data['quote']['USD']
         
         # Extracting financial data
-        price = quote['price']
+        # Prefer the live streamed price when streaming is enabled and fresh
+        live_price = get_live_price(coin)
+        price = live_price if live_price is not None else quote['price']
         volume_24h = quote['volume_24h']
         change_24h = quote['percent_change_24h']
         market_cap = quote['market_cap']
@@ -68,8 +76,7 @@ async def crypto(ctx, coin: str):
         # Add a footer for extra info
         embed.set_footer(text="Data provided by CoinMarketCap")
 
-        # Send embed message
-        await ctx.send(embed=embed)
+        return Reply(embed=embed)
 
     except KeyError:
-        await ctx.send(f"Could not find complete data for {coin}. Please try another cryptocurrency.")
+        return Reply(f"Could not find complete data for {coin}. Please try another cryptocurrency.")
@@ -0,0 +1,103 @@
+import discord
+from discord.ext import commands
+from utils import metrics
+from utils.cache import all_cache_stats
+from utils import forecasting, chart_renderer
+from utils.scan_scheduler import last_scan_stats
+from utils.api_budget import budget_stats
+from utils.coalesce import fan_in_stats, COMMAND_RESULT_WINDOW
+from utils.get_crypto_data import FORECAST_ENGINE
+
+
+def _timings(seconds, failures):
+    # Completed count, failures by reason and timings for one of the worker-backed jobs
+    histogram = metrics.Histogram()
+    for each in metrics.histograms(seconds).values():
+        histogram.merge(each)
+    failed = {}
+    for labels, count in metrics.counters(failures).items():
+        reason = dict(labels).get("reason", "unknown")
+        failed[reason] = failed.get(reason, 0) + count
+    average = histogram.sum / histogram.count if histogram.count else 0.0
+    return (f"Completed: {histogram.count} | Timeouts: {failed.get('timeout', 0)} | "
+            f"Rejected: {failed.get('rejected', 0)} | Errors: {failed.get('error', 0)}\n"
+            f"Time: avg {average:.2f}s | p95 {histogram.quantile(0.95):.2f}s | max {histogram.max:.2f}s")
+
+@commands.command(name='diag')
+@commands.has_permissions(administrator=True)
+async def diagnostics(ctx):
+    """
+    Shows internal cache, command coalescing, forecasting, chart rendering, API budget and scan statistics
+    (administrators only).
+    """
+    embed = discord.Embed(title="AutoBot Diagnostics", color=discord.Color.dark_grey())
+
+    for stats in all_cache_stats():
+        embed.add_field(
+            name=f"Cache: {stats['name']}",
+            value=(
+                f"Entries: {stats['entries']} ({stats['bytes'] / 1024:.1f} KiB)\n"
+                f"Hits: {stats['hits']} | Misses: {stats['misses']} | Coalesced: {stats['coalesced']}\n"
+                f"Evictions: {stats['evictions']} | Hit ratio: {stats['hit_ratio']:.1%}"
+            ),
+            inline=False
+        )
+
+    fan_in = fan_in_stats()
+    if fan_in:
+        embed.add_field(
+            name=f"Command coalescing ({COMMAND_RESULT_WINDOW:g}s window)",
+            value="\n".join(
+                f"!{stats['command']}: {stats['invocations']} invocations | {stats['computed']} computed | "
+                f"fan-in {stats['fan_in']:.1f}x"
+                for stats in fan_in
+            ),
+            inline=False
+        )
+
+    embed.add_field(
+        name="Forecasting",
+        value=(
+            f"Engine: {FORECAST_ENGINE} | Queue depth: {forecasting.queue_depth()} | "
+            f"Workers: {forecasting.FORECAST_WORKERS}\n"
+            + _timings("autobot_forecast_fit_seconds", "autobot_forecast_failures_total")
+        ),
+        inline=False
+    )
+
+    embed.add_field(
+        name="Chart rendering",
+        value=(
+            f"Queue depth: {chart_renderer.queue_depth()} | Tabs: {chart_renderer.CHART_RENDER_TABS}\n"
+            + _timings("autobot_render_seconds", "autobot_render_failures_total")
+        ),
+        inline=False
+    )
+
+    for provider in budget_stats():
+        lines = [f"Requests: {provider['requests']} | Throttled (429/418): {provider['throttled']}"
+                 + (f" | Upstream reports used: {provider['server_used']}" if provider['server_used'] is not None else "")]
+        for bucket in provider['buckets']:
+            queued = ", ".join(f"{name} {count}" for name, count in bucket['queued'].items()) or "none"
+            line = (f"{bucket['name']}: {bucket['available']:.0f}/{bucket['capacity']} available | "
+                    f"queued: {queued} | waited {bucket['waited']} | gave up {bucket['timed_out']}")
+            if bucket['blocked_for']:
+                line += f" | blocked {bucket['blocked_for']:.0f}s"
+            lines.append(line)
+        embed.add_field(name=f"API budget: {provider['name']}", value="\n".join(lines), inline=False)
+
+    if last_scan_stats:
+        stages = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in last_scan_stats['stages'].items())
+        embed.add_field(
+            name="Last scan",
+            value=(
+                f"Duration: {last_scan_stats['duration']:.2f}s | Coins: {last_scan_stats['universe']} | "
+                f"Reported: {last_scan_stats['reported']}\n"
+                f"Fetches: {last_scan_stats['fetches']} | Reused: {last_scan_stats['reused']} | "
+                f"Failed: {last_scan_stats['failed']}\n"
+                f"{stages}"
+            ),
+            inline=False
+        )
+
+    await ctx.send(embed=embed)
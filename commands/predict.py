@@ -1,7 +1,10 @@
 import discord
 from discord.ext import commands
-from utils.get_crypto_data import get_historical_data_binance, calculate_indicators, arima_forecast, generate_forecast_chart
-import pandas as pd
+from utils.get_crypto_data import get_historical_data_binance_async
+from utils.charts import forecast_png
+from utils.forecasting import forecast_async
+from utils.indicators import indicator_engine
+from utils.coalesce import Reply, coalesced, send_reply
 
 @commands.command(name='predict')
 async def predict(ctx, coin: str, interval: str = '1d'):
@@ -11,28 +14,28 @@ async def predict(ctx, coin: str, interval: str = '1d'):
         await ctx.send(f"Invalid interval. Please use one of the following: {', '.join(valid_intervals)}.")
         return
 
+    # Identical requests in flight or just answered share one reply
+    reply = await coalesced('predict', (coin.upper(), interval), lambda: build_predict_reply(coin, interval))
+    await send_reply(ctx, reply)
+
+async def build_predict_reply(coin, interval):
     # Get historical data for the specified coin and interval
-    df = get_historical_data_binance(coin, interval, limit='200') # Increased limit for better forecasting
+    df = await get_historical_data_binance_async(coin, interval, limit='200') # Increased limit for better forecasting
     if df is None:
-        await ctx.send(f"Could not retrieve historical data for {coin}. Please check the coin symbol.")
-        return
+        return Reply(f"Could not retrieve historical data for {coin}. Please check the coin symbol.")
 
-    # Calculate indicators
-    df = calculate_indicators(df)
+    # Latest indicator values, advanced incrementally since the previous analysis
+    indicators = indicator_engine.latest_from_df(coin, interval, df)
 
     # Analyze EMAs to make a prediction
-    latest_price = df['close'].iloc[-1]
-    latest_ema_12 = df['EMA_12'].iloc[-1]
-    latest_ema_26 = df['EMA_26'].iloc[-1]
-    latest_ema_100 = df['EMA_100'].iloc[-1]
-    latest_ema_200 = df['EMA_200'].iloc[-1]
-    latest_rsi = df['RSI'].iloc[-1]
-
-    # Calculate MACD and MACD Signal Line
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    latest_macd = df['MACD'].iloc[-1]
-    latest_macd_signal = df['MACD_Signal'].iloc[-1]
+    latest_price = indicators['close']
+    latest_ema_12 = indicators['EMA_12']
+    latest_ema_26 = indicators['EMA_26']
+    latest_ema_100 = indicators['EMA_100']
+    latest_ema_200 = indicators['EMA_200']
+    latest_rsi = indicators['RSI']
+    latest_macd = indicators['MACD']
+    latest_macd_signal = indicators['MACD_Signal']
 
     # Determine buy or sell signal based on EMA 12 and EMA 26
     if latest_ema_12 > latest_ema_26:
@@ -72,8 +75,8 @@ async def predict(ctx, coin: str, interval: str = '1d'):
     else:
         rsi_signal = f"RSI is at {latest_rsi:.2f}, which is in the normal range."
 
-    # Perform ARIMA forecast
-    forecast, error_message = arima_forecast(df, forecast_periods=5)
+    # Perform ARIMA forecast (off the event loop, cached per candle)
+    forecast, error_message = await forecast_async(coin, interval, df, forecast_periods=5)
     if error_message:
         forecast_text = f"**ARIMA Forecast**: {error_message}"
     else:
@@ -91,9 +94,7 @@ async def predict(ctx, coin: str, interval: str = '1d'):
 
     # Generate and attach chart if forecast is available
     if forecast is not None:
-        chart_buf = generate_forecast_chart(df, forecast, coin, interval)
-        file = discord.File(chart_buf, filename=f"{coin.lower()}_forecast.png")
+        png = await forecast_png(coin, interval, df, forecast)
         embed.set_image(url=f"attachment://{coin.lower()}_forecast.png")
-        await ctx.send(embed=embed, file=file)
-    else:
-        await ctx.send(embed=embed)
+        return Reply(embed=embed, image=png, filename=f"{coin.lower()}_forecast.png")
+    return Reply(embed=embed)
@@ -1,26 +1,19 @@
 import discord
 from discord.ext import commands
-import json
-
-COINS_FILE = 'coins.json'
+from utils.coin_catalog import get_catalog
 
 @commands.command(name='search')
 async def search(ctx, *, query: str):
     """
     Searches for a cryptocurrency by name or symbol.
     """
-    try:
-        with open(COINS_FILE, 'r') as f:
-            coins = json.load(f)
-    except FileNotFoundError:
+    catalog = get_catalog()
+    if not catalog.coins:
         await ctx.send("The coin list is not available yet. Please try again in a few moments.")
         return
 
     query = query.lower()
-    results = []
-    for coin in coins:
-        if query in coin['name'].lower() or query in coin['symbol'].lower():
-            results.append(coin)
+    results = catalog.search(query)
 
     if not results:
         await ctx.send(f"No coins found for '{query}'.")
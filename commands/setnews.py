@@ -1,11 +1,16 @@
 import discord
 from discord.ext import commands
-import os
+from utils.news_store import get_news_store
 
 @commands.command(name='setnews')
-async def set_news_channel(ctx):
-    news_channel_id = ctx.channel.id
-    os.environ['NEWS_CHANNEL_ID'] = str(news_channel_id)
-    with open('.env', 'a') as env_file:
-        env_file.write(f'NEWS_CHANNEL_ID={news_channel_id}\n')
+async def set_news_channel(ctx, option: str = None):
+    store = get_news_store()
+    guild_id = ctx.guild.id if ctx.guild else None
+    if option is not None and option.lower() == 'off':
+        if store.unsubscribe(ctx.channel.id, guild_id):
+            await ctx.send("Crypto news updates have been turned off.")
+        else:
+            await ctx.send("No channel here is subscribed to crypto news.")
+        return
+    store.subscribe(ctx.channel.id, guild_id)
     await ctx.send(f"This channel has been set for crypto news updates.")
@@ -0,0 +1,83 @@
+import discord
+from discord.ext import commands
+from utils import metrics
+from utils.cache import all_cache_stats
+
+
+def _percentiles(histogram):
+    return (f"p50 {histogram.quantile(0.5) * 1000:.0f}ms | p95 {histogram.quantile(0.95) * 1000:.0f}ms | "
+            f"p99 {histogram.quantile(0.99) * 1000:.0f}ms | max {histogram.max * 1000:.0f}ms")
+
+
+def _merge(histograms, label):
+    # Folds histograms that differ in other labels into one per value of `label`
+    merged = {}
+    for labels, histogram in histograms.items():
+        key = dict(labels).get(label, "unknown")
+        if key not in merged:
+            merged[key] = metrics.Histogram(histogram.buckets)
+        merged[key].merge(histogram)
+    return merged
+
+
+def _lines(lines, empty=None):
+    # Embed field values are capped at 1024 characters
+    return "\n".join(lines)[:1024] or empty
+
+
+def _errors_by(name, label):
+    errors = {}
+    for labels, count in metrics.counters(name).items():
+        key = dict(labels).get(label, "unknown")
+        errors[key] = errors.get(key, 0) + count
+    return errors
+
+
+@commands.command(name='stats')
+@commands.has_permissions(administrator=True)
+async def stats(ctx):
+    """
+    Shows command latency, upstream timings, chart render and forecast fit times, cache hit ratios and event-loop lag (administrators only).
+    """
+    embed = discord.Embed(title="AutoBot Stats", color=discord.Color.dark_grey())
+
+    command_errors = _errors_by("autobot_command_errors_total", "command")
+    lines = [f"!{command}: {histogram.count} runs, {command_errors.get(command, 0)} errors | {_percentiles(histogram)}"
+             for command, histogram in sorted(_merge(metrics.histograms("autobot_command_seconds"), "command").items())]
+    embed.add_field(name="Commands", value=_lines(lines, "No commands run yet."), inline=False)
+
+    upstream_errors = _errors_by("autobot_upstream_errors_total", "provider")
+    lines = [f"{provider}: {histogram.count} requests, {upstream_errors.get(provider, 0)} errors | {_percentiles(histogram)}"
+             for provider, histogram in sorted(_merge(metrics.histograms("autobot_upstream_seconds"), "provider").items())]
+    embed.add_field(name="Upstream requests", value=_lines(lines, "No upstream requests yet."), inline=False)
+
+    lines = [f"{fetch}: {_percentiles(histogram)}"
+             for fetch, histogram in sorted(_merge(metrics.histograms("autobot_fetch_seconds"), "fetch").items())]
+    if lines:
+        embed.add_field(name="Data fetches (incl. cache)", value=_lines(lines), inline=False)
+
+    lines = []
+    for title, seconds, failures in (("Chart renders", "autobot_render_seconds", "autobot_render_failures_total"),
+                                     ("Forecast fits", "autobot_forecast_fit_seconds", "autobot_forecast_failures_total")):
+        histogram = metrics.Histogram()
+        for each in metrics.histograms(seconds).values():
+            histogram.merge(each)
+        failed = sum(metrics.counters(failures).values())
+        if histogram.count or failed:
+            lines.append(f"{title}: {histogram.count} done, {failed} failed | {_percentiles(histogram)}")
+    if lines:
+        embed.add_field(name="Charts and forecasts", value=_lines(lines), inline=False)
+
+    lines = [f"{cache['name']}: {cache['hit_ratio']:.0%} of {cache['hits'] + cache['misses'] + cache['coalesced']}"
+             for cache in all_cache_stats() if cache['hits'] + cache['misses'] + cache['coalesced']]
+    if lines:
+        embed.add_field(name="Cache hit ratios", value=_lines(lines), inline=False)
+
+    lag = metrics.loop_lag()
+    lag_histograms = metrics.histograms("autobot_event_loop_lag_seconds")
+    line = f"Last {lag['last'] * 1000:.1f}ms | max {lag['max'] * 1000:.1f}ms"
+    if lag_histograms:
+        line += f" | p99 {next(iter(lag_histograms.values())).quantile(0.99) * 1000:.1f}ms"
+    embed.add_field(name="Event loop lag", value=line, inline=False)
+
+    await ctx.send(embed=embed)
@@ -1,48 +1,121 @@
 from discord.ext import tasks
-import json
-from utils.get_crypto_data import get_crypto_data
+import asyncio
+import math
+import os
+from utils.get_crypto_data import get_crypto_quotes_async, quote_cache
+from utils.alert_store import get_alert_store
+from utils import price_stream
+from utils.price_stream import PriceStream, get_live_price
+from utils.api_budget import set_priority, PRIORITY_ALERT, CMC_CREDITS_PER_DAY
 import discord
 
-# Load alerts from file at startup
-try:
-    with open('alerts.json', 'r') as f:
-        alerts = json.load(f)
-except FileNotFoundError:
-    alerts = []
+# Share of the daily CoinMarketCap credits the alert poll may spend; the rest is left for !crypto
+# and the other commands. With the Basic plan's 333 credits a day, 0.5 means one poll of up to
+# 100 coins about every 9 minutes (coins on the price stream are not polled at all)
+ALERT_CREDIT_SHARE = float(os.getenv("ALERT_CREDIT_SHARE", "0.5"))
+ALERT_POLL_MIN_SECONDS = float(os.getenv("ALERT_POLL_MIN_SECONDS", "60"))
 
-@tasks.loop(minutes=1)  # Run this task every 1 minute
-async def check_alerts(bot):
-    # Iterate over alerts and check if the target price is reached
-    for alert in alerts:
-        coin_data = get_crypto_data(alert['coin'])
-        if not coin_data:
-            continue
 
-        current_price = coin_data['data'][alert['coin']]['quote']['USD']['price']
+def alert_poll_interval(coins):
+    """
+    Seconds between polls of `coins` coins that keep the poll within its share of the credits
+    (one credit per 100 symbols per poll).
+    """
+    credits_per_poll = math.ceil(coins / 100)
+    polls_per_day = CMC_CREDITS_PER_DAY * ALERT_CREDIT_SHARE / max(credits_per_poll, 1)
+    if not credits_per_poll or polls_per_day <= 0:
+        return ALERT_POLL_MIN_SECONDS
+    return max(ALERT_POLL_MIN_SECONDS, 86400 / polls_per_day)
 
-        # Check if the price has reached the target
-        if current_price == alert['target_price']:
-            # Find user and channel
+async def notify_alert(bot, alert, current_price, source):
+    # `source` names where the price came from: the Binance stream or the CoinMarketCap poll
+    # Find user and channel (cached objects first, API lookup only if needed)
+    user = bot.get_user(alert['user_id'])
+    if user is None:
+        try:
             user = await bot.fetch_user(alert['user_id'])
-            channel = bot.get_channel(alert['channel_id'])
-
-            # Create embed message
-            embed = discord.Embed(title=f"{alert['coin']} Price Alert Triggered!", color=discord.Color.green())
-            embed.add_field(name="Current Price", value=f"${current_price:.2f}", inline=False)
-            embed.add_field(name="Target Price", value=f"${alert['target_price']:.2f}", inline=False)
-            embed.set_footer(text="Price data provided by CoinMarketCap")
-            
-            # Send public channel alert
-            if channel:
-                await channel.send(embed=embed)
-
-            # Send DM to the user
-            if user:
-                await user.send(embed=embed)
-
-            # Remove the alert from the list since it has been triggered
-            alerts.remove(alert)
-
-            # Update the file after removal
-            with open('alerts.json', 'w') as f:
-                json.dump(alerts, f)
+        except discord.HTTPException:
+            user = None
+    channel = bot.get_channel(alert['channel_id'])
+
+    # Create embed message
+    embed = discord.Embed(title=f"{alert['coin']} Price Alert Triggered!", color=discord.Color.green())
+    embed.add_field(name="Current Price", value=f"${current_price:.2f}", inline=False)
+    embed.add_field(name="Target Price", value=f"${alert['target_price']:.2f}", inline=False)
+    embed.set_footer(text=f"Price data provided by {source}")
+
+    sends = []
+    # Send public channel alert
+    if channel:
+        sends.append(channel.send(embed=embed))
+    # Send DM to the user
+    if user:
+        sends.append(user.send(embed=embed))
+    results = await asyncio.gather(*sends, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Failed to deliver {alert['coin']} alert: {result!r}")
+
+def evaluate_price(coin, current_price):
+    """
+    Feeds one price observation into the alert book and returns the alerts it crossed.
+    """
+    store = get_alert_store()
+    fired = store.book.evaluate(coin, current_price)
+    if fired:
+        # Remove the fired alerts from storage before notifying, so a restart can't fire them twice
+        store.delete(fired)
+    return fired
+
+async def process_price(bot, coin, current_price, source):
+    """
+    Evaluates a price observation and notifies every alert it crossed.
+    """
+    fired = evaluate_price(coin, current_price)
+    if fired:
+        await asyncio.gather(*(notify_alert(bot, alert, current_price, source) for alert in fired))
+    return fired
+
+@tasks.loop(seconds=ALERT_POLL_MIN_SECONDS)  # Stretched by alert_poll_interval to fit the credit budget
+async def check_alerts(bot):
+    # Alert quote lookups get first claim on the CoinMarketCap budget
+    set_priority(PRIORITY_ALERT)
+    # Coins covered by the live price stream are evaluated on every tick instead
+    coins = {coin for coin in get_alert_store().book.coins() if get_live_price(coin) is None}
+    # Polling every minute would need ~1440 credits a day; space the polls out so that alerts,
+    # which queue ahead of commands, can't spend the whole budget and lock !crypto out
+    interval = alert_poll_interval(len(coins))
+    if interval != check_alerts.seconds:
+        check_alerts.change_interval(seconds=interval)
+    if not coins:
+        return
+
+    # One bulk quote lookup per tick, however many alerts there are
+    quotes = await get_crypto_quotes_async(coins)
+
+    # Evaluate every coin and fire all notifications concurrently
+    await asyncio.gather(*(
+        process_price(bot, coin, coin_data['quote']['USD']['price'], "CoinMarketCap")
+        for coin, coin_data in quotes.items()
+    ))
+
+def watched_coins():
+    # Coins with pending alerts plus coins with live entries in the quote cache
+    hot = {symbol for symbol in quote_cache.keys() if symbol in quote_cache}
+    return get_alert_store().book.coins() | hot
+
+def start_price_stream(bot):
+    """
+    Starts the Binance price stream and routes its ticks into the alert book.
+    """
+    def on_tick(symbol, price):
+        # Evaluation is synchronous; a task is only created when something fired
+        fired = evaluate_price(symbol, price)
+        if fired:
+            return asyncio.gather(*(notify_alert(bot, alert, price, "Binance") for alert in fired))
+
+    stream = PriceStream(watched_coins)
+    stream.add_listener(on_tick)
+    price_stream.live_stream = stream
+    stream.start()
+    return stream
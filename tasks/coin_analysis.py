@@ -1,14 +1,34 @@
-import discord
 from discord.ext import tasks
 import os
-from utils.get_crypto_data import get_historical_data_binance, calculate_indicators
-import datetime
-
-# A larger list of coins to analyze for potential selection
+from utils.kline_store import CLOSE
+from utils.scan_scheduler import ScanRun
+from utils.api_budget import set_priority, PRIORITY_BACKGROUND
+from utils.screening import screen, build_close_matrix, PROMISING_SCORE
+from utils.coin_catalog import get_catalog
+from utils.signals import SIGNAL_INTERVALS, compute_signal, popular_symbols, build_report_embed
+
+# A larger list of coins to analyze for potential selection (used until the coin catalog is loaded)
 potential_coin_list = ['BTC', 'ETH', 'ADA', 'SOL', 'XRP', 'BNB', 'DOT', 'DOGE', 'MATIC', 'LINK']
 
+# Number of top coins by CoinMarketCap rank to screen on each run
+SCAN_UNIVERSE_SIZE = int(os.getenv("SCAN_UNIVERSE_SIZE", "300"))
+# Most requested !analyze symbols the scan refreshes alongside its own picks
+SIGNAL_WARM_TOP = int(os.getenv("SIGNAL_WARM_TOP", "10"))
+
+def scan_universe():
+    """
+    Returns the coins to screen: the top coins by CMC rank, or the fixed list as a fallback.
+    """
+    coins = get_catalog().top_by_rank(SCAN_UNIVERSE_SIZE)
+    if not coins:
+        return list(potential_coin_list)
+    # Several coins can share a symbol; screen each ticker once
+    return list(dict.fromkeys(coin['symbol'].upper() for coin in coins))
+
 @tasks.loop(hours=4)
 async def analyze_coins():
+    # Upstream requests from this loop yield to alerts and commands
+    set_priority(PRIORITY_BACKGROUND)
     # Reference to the bot, assigned from bot.py
     bot = analyze_coins.bot
 
@@ -22,59 +42,28 @@ async def analyze_coins():
         print("Invalid ALERT_CHANNEL_ID.")
         return
 
-    intervals = ['1h', '4h', '1d']  # Analyze these intervals for each coin
+    intervals = SIGNAL_INTERVALS  # Analyze these intervals for each coin
 
     # Create a list to hold promising coins
     promising_coins = []
 
-    # Preliminary analysis for all coins to determine the best candidates
-    for coin in potential_coin_list:
-        df = get_historical_data_binance(coin, interval='4h')
-        if df is None:
-            continue
-
-        # Calculate indicators
-        df = calculate_indicators(df)
-
-        # Extract latest values
-        latest_price = df['close'].iloc[-1]
-        latest_ema_12 = df['EMA_12'].iloc[-1]
-        latest_ema_26 = df['EMA_26'].iloc[-1]
-        latest_ema_100 = df['EMA_100'].iloc[-1]
-        latest_ema_200 = df['EMA_200'].iloc[-1]
-        latest_rsi = df['RSI'].iloc[-1]
-
-        # Calculate MACD and MACD Signal Line
-        df['MACD'] = df['EMA_12'] - df['EMA_26']
-        df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        latest_macd = df['MACD'].iloc[-1]
-        latest_macd_signal = df['MACD_Signal'].iloc[-1]
-        macd_diff = latest_macd - latest_macd_signal
-
-        # Criteria for identifying promising coins
-        score = 0
-
-        # EMA Breakout scoring
-        if latest_price > latest_ema_100 and latest_price > latest_ema_200:
-            score += 3  # Bullish breakout
-        elif latest_price < latest_ema_100 and latest_price < latest_ema_200:
-            score += 3  # Bearish breakout
-
-        # MACD scoring
-        if macd_diff > 1:  # Significant bullish MACD crossover
-            score += 2
-        elif macd_diff < -1:  # Significant bearish MACD crossover
-            score += 2
-
-        # RSI scoring
-        if latest_rsi < 30:  # Oversold condition
-            score += 2
-        elif latest_rsi > 70:  # Overbought condition
-            score += 2
-
-        # Add coin to the promising list if score is above a certain threshold
-        if score >= 4:
-            promising_coins.append((coin, score))
+    # Every candle series below is fetched once per run, concurrently under a bounded semaphore
+    run = ScanRun()
+
+    # Fetch the 4h closes for every coin in the universe
+    universe = scan_universe()
+    with run.stage('fetch_universe'):
+        series = await run.fetch_all((coin, '4h') for coin in universe)
+    fetched = [(coin, rows[:, CLOSE]) for (coin, _), rows in series.items() if rows is not None and len(rows)]
+
+    # Preliminary analysis for all coins at once to determine the best candidates
+    with run.stage('screen'):
+        if fetched:
+            results = screen(build_close_matrix([closes for _, closes in fetched]))
+            for (coin, _), score in zip(fetched, results['score']):
+                # Add coin to the promising list if score is above a certain threshold
+                if score >= PROMISING_SCORE:
+                    promising_coins.append((coin, int(score)))
 
     # Sort the promising coins based on their score (higher is better)
     promising_coins.sort(key=lambda x: x[1], reverse=True)
@@ -82,117 +71,28 @@ async def analyze_coins():
     # Select the top coins to report on (e.g., top 25)
     top_coins = [coin for coin, score in promising_coins[:25]]
 
-    # Perform detailed analysis for selected coins
-    for coin in top_coins:
-        embed_description = ""
-        overall_recommendation = ""
-        recommendation_icon = ""
-        thumbnail_url = ""  # URL for the icon to be shown in the top-left of the embed
-
-        # Analyzing for each interval
-        for interval in intervals:
-            df = get_historical_data_binance(coin, interval=interval)
-            if df is None:
-                continue
-
-            # Calculate indicators
-            df = calculate_indicators(df)
-
-            # Analyze indicators to determine long/short opportunities
-            latest_price = df['close'].iloc[-1]
-            latest_ema_12 = df['EMA_12'].iloc[-1]
-            latest_ema_26 = df['EMA_26'].iloc[-1]
-            latest_ema_100 = df['EMA_100'].iloc[-1]
-            latest_ema_200 = df['EMA_200'].iloc[-1]
-            latest_rsi = df['RSI'].iloc[-1]
-
-            # Calculate MACD and MACD Signal Line
-            df['MACD'] = df['EMA_12'] - df['EMA_26']
-            df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-            latest_macd = df['MACD'].iloc[-1]
-            latest_macd_signal = df['MACD_Signal'].iloc[-1]
-            macd_diff = latest_macd - latest_macd_signal
-
-            # Determine breakout analysis
-            if latest_price > latest_ema_100 and latest_price > latest_ema_200:
-                breakout_signal = "Bullish Breakout"
-                recommendation = "📈 **Potential Long Opportunity**"
-                if not overall_recommendation:
-                    overall_recommendation = "📈 Potential Long Opportunity"
-                    recommendation_icon = "📈"
-                    thumbnail_url = "https://your-icon-host.com/up-arrow.png"  # Replace with actual hosted URL
-            elif latest_price < latest_ema_100 and latest_price < latest_ema_200:
-                breakout_signal = "Bearish Breakout"
-                recommendation = "📉 **Potential Short Opportunity**"
-                if not overall_recommendation:
-                    overall_recommendation = "📉 Potential Short Opportunity"
-                    recommendation_icon = "📉"
-                    thumbnail_url = "https://your-icon-host.com/down-arrow.png"  # Replace with actual hosted URL
-            else:
-                breakout_signal = "No Breakout"
-                recommendation = "⚖️ **No Clear Opportunity**"
-                if not overall_recommendation:
-                    overall_recommendation = "⚖️ No Clear Opportunity"
-                    recommendation_icon = "⚖️"
-                    thumbnail_url = "https://your-icon-host.com/balance-scale.png"  # Replace with actual hosted URL
-
-            # Analyze MACD for confirmation with threshold
-            if macd_diff > 1:
-                macd_signal = "MACD Bullish"
-                if breakout_signal == "Bullish Breakout":
-                    recommendation = "🚀 **Strong Long Opportunity**"
-                    overall_recommendation = "🚀 Strong Long Opportunity"
-                    recommendation_icon = "🚀"
-                    thumbnail_url = "https://your-icon-host.com/rocket.png"  # Replace with actual hosted URL
-            elif macd_diff < -1:
-                macd_signal = "MACD Bearish"
-                if breakout_signal == "Bearish Breakout":
-                    recommendation = "🔺 **Strong Short Opportunity**"
-                    overall_recommendation = "🔺 Strong Short Opportunity"
-                    recommendation_icon = "🔺"
-                    thumbnail_url = "https://your-icon-host.com/red-triangle.png"  # Replace with actual hosted URL
-            else:
-                macd_signal = "MACD Neutral"
-
-            # RSI Analysis
-            if latest_rsi < 30:
-                rsi_signal = f"RSI is at {latest_rsi:.2f}, indicating **oversold** conditions (potential buy)."
-            elif latest_rsi > 70:
-                rsi_signal = f"RSI is at {latest_rsi:.2f}, indicating **overbought** conditions (potential sell)."
-            else:
-                rsi_signal = f"RSI is at {latest_rsi:.2f}, indicating a neutral range."
-
-            # EMA Crossover Analysis
-            if latest_ema_12 > latest_ema_26:
-                ema_crossover_signal = "📈 **EMA 12/26 Bullish Crossover**: The short-term EMA (12) is above the long-term EMA (26), indicating an upward trend."
-            elif latest_ema_12 < latest_ema_26:
-                ema_crossover_signal = "📉 **EMA 12/26 Bearish Crossover**: The short-term EMA (12) is below the long-term EMA (26), indicating a downward trend."
-            else:
-                ema_crossover_signal = "⚖️ **EMA 12/26 Neutral**: No clear trend detected based on EMA crossover."
-
-            # Long-term EMA Analysis
-            if latest_ema_100 > latest_ema_200:
-                ema_long_term_signal = "**Long-Term Uptrend**: The 100-day EMA is above the 200-day EMA, indicating a positive market outlook."
-            else:
-                ema_long_term_signal = "**Long-Term Downtrend**: The 100-day EMA is below the 200-day EMA, indicating a negative market outlook."
-
-            # Append analysis for the current interval to the description
-            embed_description += (
-                f"**Interval: {interval}**\n"
-                f"**Breakout Analysis**: {breakout_signal}\n"
-                f"**EMA Crossover Analysis**: {ema_crossover_signal}\n"
-                f"**Long-Term EMA Analysis**: {ema_long_term_signal}\n"
-                f"**Recommendation**: {recommendation}\n"
-                f"**MACD Analysis**: {macd_signal}\n"
-                f"{rsi_signal}\n\n"
-            )
-
-        # Create and send embed message with analysis for all intervals
-        embed = discord.Embed(
-            title=f"{coin.upper()} Multi-Interval Analysis Report",
-            description=f"{recommendation_icon} **Overall Recommendation**: {overall_recommendation}\n\n" + embed_description,
-            color=discord.Color.purple()  # Set embed color to purple
-        )
-        embed.set_thumbnail(url=thumbnail_url)  # Set thumbnail image based on recommendation
-        embed.set_footer(text=f"Analysis run at {datetime.datetime.utcnow()} UTC")
-        await channel.send(embed=embed)
+    # Fetch every interval for the selected coins, plus the symbols users !analyze most, in one
+    # concurrent batch; the selected coins' 4h series is reused
+    warm_symbols = [symbol for symbol in popular_symbols(SIGNAL_WARM_TOP) if symbol not in top_coins]
+    with run.stage('fetch_detail'):
+        detail = await run.fetch_all((coin, interval) for coin in top_coins + warm_symbols for interval in intervals)
+
+    # Signals go through the shared engine, which also memoizes them for !analyze
+    embeds = []
+    with run.stage('analyze'):
+        signals = {(coin, interval): compute_signal(coin, interval, rows)
+                   for (coin, interval), rows in detail.items() if rows is not None and len(rows)}
+        for coin in top_coins:
+            results = [signals[(coin, interval)] for interval in intervals if (coin, interval) in signals]
+            if results:
+                embeds.append(build_report_embed(coin, results))
+
+    # Reports are sent once the whole scan is computed
+    with run.stage('send'):
+        for embed in embeds:
+            await channel.send(embed=embed)
+
+    stats = run.finish(universe=len(universe), screened=len(fetched), reported=len(embeds), warmed=len(warm_symbols))
+    stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stats['stages'].items())
+    print(f"Scan finished in {stats['duration']:.2f}s: {stats['universe']} coins, {stats['fetches']} fetches "
+          f"({stats['reused']} reused, {stats['failed']} failed); {stages}")
@@ -1,31 +1,136 @@
 from discord.ext import tasks
-import requests
+import asyncio
+import datetime
 import os
+import time
+import discord
+from utils.http_client import request
+from utils.api_budget import set_priority, PRIORITY_BACKGROUND, register_host
+from utils.news_store import get_news_store
+
+# Overridable so the bot can be pointed at a local stand-in (see tools/fake_upstream.py)
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org")
+register_host(NEWSAPI_URL, 'newsapi')
+
+# NewsAPI ignores conditional requests, so a fetch younger than this (seconds, kept across restarts)
+# is not repeated; when the upstream does send ETag/Last-Modified they are replayed as well
+NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", "3000"))
+
+# New articles posted per round, as one message of embeds (Discord allows up to 10)
+NEWS_MAX_ARTICLES = min(int(os.getenv("NEWS_MAX_ARTICLES", "5")), 10)
+
+# Channels sent to at once
+NEWS_FANOUT_CONCURRENCY = int(os.getenv("NEWS_FANOUT_CONCURRENCY", "10"))
+
+
+async def fetch_articles(store):
+    """
+    Returns the latest articles, or an empty list if the last fetch is still fresh, the upstream
+    answered 304 Not Modified or the request failed.
+    """
+    fetched_at = float(store.get_state('fetched_at', 0))
+    if time.time() - fetched_at < NEWS_CACHE_TTL:
+        return []
+
+    headers = {
+        "If-None-Match": store.get_state('etag'),
+        "If-Modified-Since": store.get_state('last_modified'),
+    }
+    params = {
+        "q": "cryptocurrency",
+        "sortBy": "publishedAt",
+        "pageSize": 20,
+        "apiKey": os.getenv('NEWS_API_KEY'),
+    }
+    response = await request(f"{NEWSAPI_URL}/v2/everything", params=params, headers=headers, endpoint="/v2/everything")
+    if response is None:
+        return []
+    if response.status == 304:
+        store.set_state('fetched_at', time.time())
+        return []
+    if response.status != 200 or not isinstance(response.data, dict):
+        return []
+
+    store.set_state('etag', response.headers.get('ETag'))
+    store.set_state('last_modified', response.headers.get('Last-Modified'))
+    store.set_state('fetched_at', time.time())
+    return [article for article in response.data.get('articles', []) if article.get('url')]
+
+
+def build_embed(article):
+    embed = discord.Embed(title=(article.get('title') or article['url'])[:256], url=article['url'],
+                          color=discord.Color.dark_blue())
+    description = article.get('description')
+    if description:
+        embed.description = description if len(description) <= 300 else description[:297] + "..."
+    source = (article.get('source') or {}).get('name')
+    if source:
+        embed.set_footer(text=source)
+    published = article.get('publishedAt')
+    if published:
+        try:
+            embed.timestamp = datetime.datetime.fromisoformat(published.replace('Z', '+00:00'))
+        except ValueError:
+            pass
+    if article.get('urlToImage'):
+        embed.set_thumbnail(url=article['urlToImage'])
+    return embed
+
+
+async def _send(bot, store, channel_id, embeds, semaphore):
+    async with semaphore:
+        try:
+            channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+            await channel.send(embeds=embeds)
+            return channel
+        except discord.NotFound:
+            # The channel was deleted (or the bot removed from its guild)
+            print(f"News channel {channel_id} no longer exists; unsubscribing it.")
+            store.unsubscribe(channel_id)
+        except discord.Forbidden:
+            print(f"No permission to post news in channel {channel_id}; use !setnews in a channel the bot can post to.")
+        except discord.HTTPException as e:
+            print(f"Failed to post news in channel {channel_id}: {e}")
+    return None
+
+
+async def fan_out(bot, store, embeds):
+    """
+    Posts the embeds to every subscribed channel concurrently. Returns the number of channels reached.
+    """
+    semaphore = asyncio.Semaphore(NEWS_FANOUT_CONCURRENCY)
+    sent = await asyncio.gather(*(_send(bot, store, channel_id, embeds, semaphore)
+                                  for channel_id in store.channels()))
+    store.record_guilds({channel.id: channel.guild.id for channel in sent
+                         if channel is not None and getattr(channel, 'guild', None) is not None})
+    return sum(channel is not None for channel in sent)
+
 
 # Define the loop task
 @tasks.loop(hours=1)
 async def crypto_news(bot):
-    channel_id = os.getenv("NEWS_CHANNEL_ID")
-    if not channel_id:  # Check if channel_id is empty or None
-        print("No NEWS_CHANNEL_ID set. Use !setnews to set the news channel.")
-        return
-
-    try:
-        channel = bot.get_channel(int(channel_id))
-    except ValueError:
-        print("Invalid channel ID format. Please reset the news channel using !setnews.")
+    # Upstream requests from this loop yield to alerts and commands
+    set_priority(PRIORITY_BACKGROUND)
+    store = get_news_store()
+    if not store.channels():
+        print("No news channel subscribed. Use !setnews to set the news channel.")
         return
 
-    if channel is None:
-        print("Invalid channel or bot doesn't have access. Please reset the news channel using !setnews.")
+    articles = await fetch_articles(store)
+    # Feeds repeat stories across fetches; only post the ones not posted before
+    unseen = set(store.unseen([article['url'] for article in articles]))
+    fresh = []
+    for article in articles:
+        if article['url'] in unseen:
+            fresh.append(article)
+            unseen.discard(article['url'])
+    fresh = fresh[:NEWS_MAX_ARTICLES]
+    if not fresh:
         return
 
-    news_url = f"https://newsapi.org/v2/everything?q=cryptocurrency&apiKey={os.getenv('NEWS_API_KEY')}"
-    response = requests.get(news_url)
-    if response.status_code == 200:
-        articles = response.json().get('articles', [])
-        for article in articles[:5]:  # Send top 5 articles every hour
-            await channel.send(f"{article['title']}\n{article['url']}")
+    reached = await fan_out(bot, store, [build_embed(article) for article in fresh])
+    if reached:
+        store.mark_seen([article['url'] for article in fresh])
 
 # Function to start the loop task
 def start_crypto_news(bot):
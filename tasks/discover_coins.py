@@ -1,18 +1,23 @@
 import requests
-import json
+import asyncio
 import os
+import time
+from discord.ext import tasks
 from dotenv import load_dotenv
+from utils.http_client import get_json
+from utils.api_budget import set_priority, PRIORITY_BACKGROUND
+from utils.get_crypto_data import CMC_API_URL
+from utils.coin_catalog import (COINS_FILE, get_catalog, replace_catalog, save_catalog,
+                                diff_catalog, apply_changes, is_columnar_file)
 
 load_dotenv()
 
 COINMARKETCAP_API_KEY = os.getenv("COINMARKETCAP_API_KEY")
-COINS_FILE = 'coins.json'
+CMC_MAP_URL = f"{CMC_API_URL}/v1/cryptocurrency/map"
+# The coin list changes slowly; it is downloaded again once the saved copy is older than this
+COIN_DISCOVERY_MAX_AGE_HOURS = float(os.getenv("COIN_DISCOVERY_MAX_AGE_HOURS", "24"))
 
-def fetch_all_coins():
-    """
-    Fetches a list of all active cryptocurrencies from the CoinMarketCap API.
-    """
-    url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/map"
+def _map_request():
     headers = {
         "Accepts": "application/json",
         "X-CMC_PRO_API_KEY": COINMARKETCAP_API_KEY,
@@ -20,9 +25,15 @@ def fetch_all_coins():
     params = {
         "listing_status": "active",
     }
+    return headers, params
 
+def fetch_all_coins():
+    """
+    Fetches a list of all active cryptocurrencies from the CoinMarketCap API.
+    """
+    headers, params = _map_request()
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = requests.get(CMC_MAP_URL, headers=headers, params=params)
         response.raise_for_status()  # Raise an exception for bad status codes
         data = response.json()
         return data.get('data', [])
@@ -30,14 +41,52 @@ def fetch_all_coins():
         print(f"Error fetching coin map from CoinMarketCap: {e}")
         return None
 
+async def fetch_all_coins_async():
+    """
+    Async version of fetch_all_coins that goes through the shared HTTP client.
+    """
+    headers, params = _map_request()
+    data = await get_json(CMC_MAP_URL, headers=headers, params=params)
+    if data is None:
+        print("Error fetching coin map from CoinMarketCap")
+        return None
+    return data.get('data', [])
+
+def catalog_age():
+    """
+    Seconds since the coin list file was last refreshed, or None if there is no file.
+    """
+    try:
+        return time.time() - os.path.getmtime(COINS_FILE)
+    except OSError:
+        return None
+
+def apply_discovered_coins(coins):
+    """
+    Diffs a freshly downloaded coin list against the current catalog and applies only
+    the changes: the file is rewritten and the catalog swapped only if something changed.
+    Returns (added, removed, changed) counts.
+    """
+    catalog = get_catalog()
+    added, removed, changed = diff_catalog(catalog, coins)
+    if added or removed or changed:
+        updated = apply_changes(catalog, added, removed, changed)
+        save_catalog(updated.coins)
+        # Swap the in-memory catalog so lookups see the refreshed list immediately
+        replace_catalog(updated)
+    elif is_columnar_file():
+        os.utime(COINS_FILE)  # Still current: mark it fresh so it isn't downloaded again until it ages out
+    else:
+        save_catalog(catalog.coins)  # Missing or in the older layout
+    return len(added), len(removed), len(changed)
+
 def save_coins_to_file(coins):
     """
-    Saves the list of coins to a JSON file.
+    Applies a downloaded coin list to the catalog and the coin list file.
     """
     if coins is not None:
-        with open(COINS_FILE, 'w') as f:
-            json.dump(coins, f, indent=4)
-        print(f"Successfully saved {len(coins)} coins to {COINS_FILE}")
+        added, removed, changed = apply_discovered_coins(coins)
+        print(f"Coin list refreshed: {len(coins)} coins ({added} added, {removed} removed, {changed} changed)")
 
 def discover_coins():
     """
@@ -48,5 +97,27 @@ def discover_coins():
     if coins:
         save_coins_to_file(coins)
 
+async def discover_coins_async(force=False):
+    """
+    Async version of discover_coins for use inside the bot's event loop.
+    Skips the download while the saved coin list is younger than COIN_DISCOVERY_MAX_AGE_HOURS.
+    """
+    age = catalog_age()
+    if not force and age is not None and age < COIN_DISCOVERY_MAX_AGE_HOURS * 3600:
+        return
+    print("Discovering coins...")
+    coins = await fetch_all_coins_async()
+    if coins:
+        # Diffing and writing a few thousand coins is CPU and disk work, keep it off the loop
+        await asyncio.to_thread(save_coins_to_file, coins)
+
+# Checks hourly; a download only happens once the saved list has aged out, so restarts and
+# reconnects don't trigger one
+@tasks.loop(hours=1)
+async def coin_discovery():
+    # Upstream requests from this loop yield to alerts and commands
+    set_priority(PRIORITY_BACKGROUND)
+    await discover_coins_async()
+
 if __name__ == "__main__":
     discover_coins()
@@ -0,0 +1,11 @@
+from discord.ext import tasks
+import asyncio
+from utils.metrics import render_prometheus, write_metrics_file, METRICS_FILE, METRICS_FILE_INTERVAL
+
+@tasks.loop(seconds=METRICS_FILE_INTERVAL)
+async def export_metrics():
+    # Render on the loop (the metrics live there), write off it
+    try:
+        await asyncio.to_thread(write_metrics_file, render_prometheus(), METRICS_FILE)
+    except OSError as e:
+        print(f"Writing metrics to {METRICS_FILE} failed: {e!r}")
@@ -0,0 +1,40 @@
+from discord.ext import tasks
+import asyncio
+import os
+import time
+from utils.charts import popular_charts, prerender_chart
+from utils.kline_store import INTERVAL_MS
+from utils.api_budget import set_priority, PRIORITY_BACKGROUND
+
+# Off by default: pre-rendering spends renderer and API capacity on charts nobody may ask for
+CHART_PRERENDER_ENABLED = os.getenv("CHART_PRERENDER", "0") == "1"
+# Number of most requested charts kept warm
+CHART_PRERENDER_TOP = int(os.getenv("CHART_PRERENDER_TOP", "5"))
+
+# Candle period each chart spec was last pre-rendered for
+_rendered_periods = {}
+
+@tasks.loop(minutes=1)
+async def prerender_charts():
+    # Upstream requests from this loop yield to alerts and commands
+    set_priority(PRIORITY_BACKGROUND)
+    # A chart is due once a new candle has opened for its interval since its last pre-render
+    now_ms = int(time.time() * 1000)
+    due = []
+    for spec in popular_charts(CHART_PRERENDER_TOP):
+        interval_ms = INTERVAL_MS.get(spec[2])
+        if interval_ms is None:
+            continue
+        period = now_ms // interval_ms
+        if _rendered_periods.get(spec) != period:
+            due.append((spec, period))
+
+    if not due:
+        return
+
+    results = await asyncio.gather(*(prerender_chart(*spec) for spec, _ in due), return_exceptions=True)
+    for (spec, period), result in zip(due, results):
+        if result is True:
+            _rendered_periods[spec] = period
+        elif isinstance(result, Exception):
+            print(f"Pre-rendering {spec} failed: {result!r}")
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+
+import pytest
+
+from utils import alert_store
+from utils.alert_engine import AlertBook
+
+
+def make_alert(alert_id, target_price, coin='BTC'):
+    return {"id": alert_id, "user_id": 1, "channel_id": 2, "coin": coin, "target_price": target_price}
+
+
+def fired_ids(fired):
+    return sorted(alert['id'] for alert in fired)
+
+
+def test_upward_cross_fires_targets_between_prices():
+    book = AlertBook([make_alert(1, 100), make_alert(2, 110), make_alert(3, 120), make_alert(4, 90)])
+    assert book.evaluate('BTC', 95) == []  # First tick: nothing at exactly 95
+    assert fired_ids(book.evaluate('BTC', 112)) == [1, 2]
+    assert len(book) == 2
+
+
+def test_downward_cross_fires_targets_between_prices():
+    book = AlertBook([make_alert(1, 100), make_alert(2, 90), make_alert(3, 80), make_alert(4, 110)])
+    book.evaluate('BTC', 105)
+    assert fired_ids(book.evaluate('BTC', 85)) == [1, 2]
+    assert fired_ids(book.evaluate('BTC', 70)) == [3]
+    assert [alert['id'] for alert in book] == [4]
+
+
+def test_exact_hits_fire_in_both_directions():
+    book = AlertBook([make_alert(1, 100), make_alert(2, 100), make_alert(3, 90)])
+    book.evaluate('BTC', 95)
+    assert fired_ids(book.evaluate('BTC', 100)) == [1, 2]
+    assert fired_ids(book.evaluate('BTC', 90)) == [3]
+
+
+def test_target_at_previous_price_fires_on_the_next_cross():
+    # Moving away from a target set at the current price isn't a cross; coming back through it is
+    book = AlertBook()
+    book.evaluate('BTC', 100)
+    book.add(make_alert(1, 100))
+    assert book.evaluate('BTC', 105) == []
+    assert fired_ids(book.evaluate('BTC', 95)) == [1]
+
+
+def test_unchanged_price_fires_nothing():
+    book = AlertBook([make_alert(1, 100)])
+    book.evaluate('BTC', 99)
+    assert book.evaluate('BTC', 99) == []
+
+
+def test_new_alert_after_the_book_emptied_does_not_see_an_old_price():
+    book = AlertBook([make_alert(1, 100000)])
+    book.evaluate('BTC', 99000)
+    assert fired_ids(book.evaluate('BTC', 100500)) == [1]
+    book.add(make_alert(2, 70000))
+    # 100500 -> 60000 would look like a cross of 70000, but that price predates the alert
+    assert book.evaluate('BTC', 60000) == []
+    assert fired_ids(book.evaluate('BTC', 70000)) == [2]
+
+
+def test_prices_seen_without_alerts_are_not_a_starting_point():
+    # The price stream also ticks coins that only have recent !crypto lookups
+    book = AlertBook()
+    book.evaluate('BTC', 100500)
+    book.add(make_alert(1, 70000))
+    assert book.evaluate('BTC', 60000) == []
+
+
+def test_coins_are_independent():
+    book = AlertBook([make_alert(1, 100, 'BTC'), make_alert(2, 100, 'ETH')])
+    book.evaluate('BTC', 90)
+    book.evaluate('ETH', 90)
+    assert fired_ids(book.evaluate('BTC', 110)) == [1]
+    assert book.coins() == {'ETH'}
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    # Keep the one-off legacy import away from the repository's alerts.json
+    monkeypatch.setattr(alert_store, 'LEGACY_ALERTS_FILE', str(tmp_path / 'alerts.json'))
+    return str(tmp_path / 'alerts.db')
+
+
+def test_first_tick_after_restart_only_fires_exact_hits(store_path):
+    store = alert_store.AlertStore(store_path)
+    store.add(1, 2, 'BTC', 100.0)
+    store.add(1, 2, 'BTC', 120.0)
+    store.book.evaluate('BTC', 90.0)
+    store.close()
+
+    # The previous price is not persisted, so there is no path to cross on the first tick
+    store = alert_store.AlertStore(store_path)
+    assert len(store) == 2
+    assert store.book.evaluate('BTC', 110.0) == []
+    fired = store.book.evaluate('BTC', 120.0)
+    assert [alert['target_price'] for alert in fired] == [120.0]
+    store.delete(fired)
+    assert fired_ids(store.book.evaluate('BTC', 95.0)) == [1]
+    store.close()
+
+
+def test_fired_alerts_do_not_come_back_after_restart(store_path):
+    store = alert_store.AlertStore(store_path)
+    store.add(1, 2, 'BTC', 100.0)
+    store.add(1, 2, 'ETH', 50.0)
+    store.book.evaluate('BTC', 90.0)
+    store.delete(store.book.evaluate('BTC', 101.0))
+    store.close()
+
+    store = alert_store.AlertStore(store_path)
+    assert [alert['coin'] for alert in store.book] == ['ETH']
+    store.close()
+
+
+def test_compaction_reclaims_deleted_alerts_in_steps(store_path, monkeypatch):
+    # A file created before incremental auto-vacuum is switched over when it is opened
+    conn = sqlite3.connect(store_path)
+    conn.execute("CREATE TABLE alerts (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, "
+                 "channel_id INTEGER NOT NULL, coin TEXT NOT NULL, target_price REAL NOT NULL, "
+                 "created_at REAL NOT NULL)")
+    conn.close()
+    monkeypatch.setattr(alert_store, 'COMPACT_AFTER_DELETES', 10 ** 9)
+    monkeypatch.setattr(alert_store, 'COMPACT_STEP_PAGES', 4)
+
+    store = alert_store.AlertStore(store_path)
+    alerts = [store.add(1, 2, 'BTC', float(price)) for price in range(5000)]
+    store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(store_path)
+    store.delete(alerts[1:])
+    assert store.conn.execute("PRAGMA freelist_count").fetchone()[0] > alert_store.COMPACT_STEP_PAGES
+
+    store.compact()
+    assert store.conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert os.path.getsize(store_path) < size
+    store.close()
+
+    store = alert_store.AlertStore(store_path)
+    assert [alert['id'] for alert in store.book] == [alerts[0]['id']]
+    store.close()
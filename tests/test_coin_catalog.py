@@ -0,0 +1,54 @@
+from utils.coin_catalog import CoinCatalog, apply_changes, decode_coins, diff_catalog, encode_coins
+
+
+def coin(coin_id, symbol, rank=None, **fields):
+    return dict(id=coin_id, name=symbol.title(), symbol=symbol, slug=symbol.lower(), rank=rank, **fields)
+
+
+def ids(coins):
+    return sorted(c['id'] for c in coins)
+
+
+def test_diff_finds_added_removed_and_changed():
+    catalog = CoinCatalog([coin(1, 'BTC', 1), coin(2, 'ETH', 2), coin(3, 'OLD', 300)])
+    fresh = [coin(1, 'BTC', 1), coin(2, 'ETH', 3), coin(4, 'NEW', 400)]
+    added, removed, changed = diff_catalog(catalog, fresh)
+    assert ids(added) == [4]
+    assert ids(removed) == [3]
+    assert ids(changed) == [2]
+    assert changed[0]['rank'] == 3  # The new version
+
+
+def test_identical_list_has_no_diff():
+    coins = [coin(1, 'BTC', 1), coin(2, 'ETH', 2)]
+    assert diff_catalog(CoinCatalog(coins), [dict(c) for c in coins]) == ([], [], [])
+
+
+def test_missing_and_none_fields_compare_equal():
+    # The columnar file fills fields a coin doesn't have with None
+    stored = decode_coins(encode_coins([coin(1, 'BTC', 1, platform={"id": 9}), coin(2, 'ETH', 2)]))
+    assert stored[1]['platform'] is None
+    fresh = [coin(1, 'BTC', 1, platform={"id": 9}), coin(2, 'ETH', 2)]
+    assert diff_catalog(CoinCatalog(stored), fresh) == ([], [], [])
+
+
+def test_symbol_change_under_the_same_id_is_a_change():
+    catalog = CoinCatalog([coin(1, 'MATIC', 10)])
+    added, removed, changed = diff_catalog(catalog, [coin(1, 'POL', 10)])
+    assert (added, removed, ids(changed)) == ([], [], [1])
+
+
+def test_apply_changes_matches_the_fresh_list():
+    old = [coin(1, 'BTC', 1), coin(2, 'ETH', 2), coin(3, 'OLD', 300)]
+    fresh = [coin(1, 'BTC', 1), coin(2, 'ETH', 3), coin(4, 'NEW', 400)]
+    catalog = CoinCatalog(old)
+    updated = apply_changes(catalog, *diff_catalog(catalog, fresh))
+
+    assert ids(updated.coins) == [1, 2, 4]
+    assert updated.get_by_symbol('ETH')['rank'] == 3
+    assert not updated.has_symbol('OLD')
+    assert updated.get_by_slug('new')['id'] == 4
+    # Unchanged coins keep their dicts; the old snapshot is untouched
+    assert updated.get_by_id(1) is catalog.get_by_id(1)
+    assert ids(catalog.coins) == [1, 2, 3]
+    assert diff_catalog(updated, fresh) == ([], [], [])
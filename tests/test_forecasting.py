@@ -0,0 +1,54 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import forecasting
+
+
+@pytest.fixture
+def slow_pool(monkeypatch):
+    # A thread pool stands in for the process pool; each fit blocks until the test releases it
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def fit(closes, forecast_periods):
+        release.wait(5)
+        return [1.0] * forecast_periods, None, 0.01
+
+    monkeypatch.setattr(forecasting, 'get_executor', lambda: executor)
+    monkeypatch.setattr(forecasting, '_fit_in_worker', fit)
+    monkeypatch.setattr(forecasting, 'FORECAST_TIMEOUT', 0.05)
+    monkeypatch.setattr(forecasting, '_pending', 0)
+    yield release
+    release.set()
+    executor.shutdown(wait=True)
+
+
+def test_timed_out_fit_stays_pending_until_the_worker_is_free(slow_pool):
+    async def scenario():
+        with pytest.raises(forecasting.ForecastError):
+            await forecasting._run_job([1.0, 2.0], 3)
+        # The request gave up, but the fit is still running on the worker
+        assert forecasting.queue_depth() == 1
+        slow_pool.set()
+        for _ in range(100):
+            if forecasting.queue_depth() == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert forecasting.queue_depth() == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_is_full_while_timed_out_fits_run(slow_pool, monkeypatch):
+    monkeypatch.setattr(forecasting, 'FORECAST_MAX_PENDING', 1)
+
+    async def scenario():
+        with pytest.raises(forecasting.ForecastError, match="took too long"):
+            await forecasting._run_job([1.0, 2.0], 3)
+        with pytest.raises(forecasting.ForecastError, match="queue is full"):
+            await forecasting._run_job([1.0, 2.0], 3)
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from utils import indicators
+from utils.indicators import IndicatorEngine, compute_indicators
+
+HOUR = 3_600_000
+
+
+def series(count, first=0):
+    open_times = (np.arange(count) + first) * HOUR
+    closes = 100 + np.cumsum(np.sin(np.arange(count) + first))
+    return open_times, closes
+
+
+def assert_matches_batch(latest, closes):
+    for column, values in compute_indicators(closes).items():
+        if np.isnan(values[-1]):
+            assert np.isnan(latest[column]), column
+        else:
+            assert latest[column] == pytest.approx(values[-1], rel=1e-9), column
+
+
+@pytest.mark.parametrize('count', [1, 2, 13, 14, 15, 300])
+def test_latest_matches_the_batch_path(count):
+    engine = IndicatorEngine()
+    open_times, closes = series(count)
+    assert_matches_batch(engine.latest('BTC', '1h', open_times, closes), closes)
+
+    # Same window with the open candle moved: memoized, and still the batch result
+    moved = closes.copy()
+    moved[-1] *= 1.01
+    assert_matches_batch(engine.latest('BTC', '1h', open_times, moved), moved)
+
+
+def test_window_slides_after_a_candle_closes():
+    engine = IndicatorEngine()
+    engine.latest('BTC', '1h', *series(100))
+    open_times, closes = series(100, first=1)
+    assert_matches_batch(engine.latest('BTC', '1h', open_times, closes), closes)
+    assert engine.rebuilds == 2
+
+
+def test_memoized_windows_are_capped(monkeypatch):
+    monkeypatch.setattr(indicators, 'INDICATOR_MAX_STATES', 3)
+    engine = IndicatorEngine()
+    for count in range(20, 30):
+        engine.latest('BTC', '1h', *series(count))
+    assert len(engine._states) == 3
@@ -0,0 +1,109 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from utils import kline_store
+from utils.kline_store import KlineStore, FIELDS, OPEN_TIME, CLOSE, CLOSE_TIME, INTERVAL_MS, KLINE_TRIM_SLACK
+
+HOUR = INTERVAL_MS['1h']
+KEY = ('BTC', '1h')
+
+
+def candles(first, count, close=100.0):
+    # Rows in the store's layout for consecutive hourly candles starting at index `first`
+    rows = np.zeros((count, len(FIELDS)))
+    rows[:, OPEN_TIME] = (np.arange(count) + first) * HOUR
+    rows[:, CLOSE_TIME] = rows[:, OPEN_TIME] + HOUR - 1
+    rows[:, CLOSE] = close + np.arange(count)
+    return rows
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = KlineStore(str(tmp_path / 'klines.db'))
+    yield store
+    store.conn.close()
+
+
+def open_indexes(rows):
+    return (rows[:, OPEN_TIME] // HOUR).astype(int).tolist()
+
+
+def stored(store):
+    # What a fresh process would read back from SQLite
+    store.memory.clear()
+    return store._series(KEY)
+
+
+def test_overlapping_candles_replace_the_stored_ones(store):
+    store._merge(KEY, store._series(KEY), candles(0, 10))
+    merged = store._merge(KEY, store._series(KEY), candles(8, 4, close=500.0))
+    assert open_indexes(merged) == list(range(12))
+    # The overlapping (previously forming) candles take the fresh values
+    assert merged[8:, CLOSE].tolist() == [500.0, 501.0, 502.0, 503.0]
+    assert merged[:8, CLOSE].tolist() == candles(0, 8)[:, CLOSE].tolist()
+    assert np.array_equal(stored(store), merged)
+
+
+def test_adjacent_candles_are_appended(store):
+    store._merge(KEY, store._series(KEY), candles(0, 5))
+    merged = store._merge(KEY, store._series(KEY), candles(5, 3))
+    assert open_indexes(merged) == list(range(8))
+    assert np.array_equal(stored(store), merged)
+
+
+def test_gap_drops_the_stale_series(store):
+    store._merge(KEY, store._series(KEY), candles(0, 5))
+    merged = store._merge(KEY, store._series(KEY), candles(8, 3))
+    # Candles 5-7 are missing, so the old part can't be kept contiguous
+    assert open_indexes(merged) == [8, 9, 10]
+    assert open_indexes(stored(store)) == [8, 9, 10]
+
+
+def test_fresh_window_covering_the_stored_one_replaces_it(store):
+    store._merge(KEY, store._series(KEY), candles(5, 5))
+    merged = store._merge(KEY, store._series(KEY), candles(3, 10, close=200.0))
+    assert open_indexes(merged) == list(range(3, 13))
+    assert open_indexes(stored(store)) == list(range(3, 13))
+
+
+def test_empty_fetch_keeps_the_series(store):
+    rows = store._merge(KEY, store._series(KEY), candles(0, 5))
+    assert store._merge(KEY, rows, candles(0, 0)) is rows
+    assert open_indexes(stored(store)) == list(range(5))
+
+
+def test_series_are_kept_apart(store):
+    store._merge(KEY, store._series(KEY), candles(0, 5))
+    store._merge(('ETH', '1h'), store._series(('ETH', '1h')), candles(20, 2))
+    assert open_indexes(stored(store)) == list(range(5))
+    assert open_indexes(store._series(('ETH', '1h'))) == [20, 21]
+
+
+@pytest.mark.parametrize('limit', ['abc', '0', -5, None])
+def test_invalid_limits_return_none_without_fetching(store, limit):
+    assert asyncio.run(store.get_klines('BTC', '1h', limit)) is None
+    assert store.upstream_requests == 0
+
+
+def test_series_are_trimmed_to_the_largest_window_served(store):
+    store._windows[KEY] = 50
+    rows = store._merge(KEY, store._series(KEY), candles(0, 50 + KLINE_TRIM_SLACK))
+    assert store._trim(KEY, rows) is rows  # Within the slack: left alone
+    rows = store._trim(KEY, store._merge(KEY, rows, candles(50 + KLINE_TRIM_SLACK, 1)))
+    assert open_indexes(rows) == list(range(KLINE_TRIM_SLACK + 1, KLINE_TRIM_SLACK + 51))
+    assert np.array_equal(stored(store), rows)
+
+
+def test_limits_are_capped(store, monkeypatch):
+    requested = []
+
+    async def fetch_window(symbol, interval, limit):
+        requested.append(limit)
+        return candles(0, limit)
+
+    monkeypatch.setattr(store, '_fetch_window', fetch_window)
+    rows = asyncio.run(store.get_klines('BTC', '1m', 1_000_000))
+    assert requested == [kline_store.KLINE_MAX_LIMIT]
+    assert len(rows) == kline_store.KLINE_MAX_LIMIT
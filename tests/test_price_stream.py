@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+
+from aiohttp.test_utils import TestServer
+
+from utils import http_client
+from utils.price_stream import PriceStream
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+import fake_binance_ws  # noqa: E402
+
+
+async def wait_for(condition, timeout=5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_stream_follows_the_watched_set():
+    async def scenario():
+        # speed 0 replays the recorded ticks as fast as possible, over and over
+        server = TestServer(fake_binance_ws.create_app(speed=0))
+        await server.start_server()
+        watched = {'BTC'}
+        received = []
+        stream = PriceStream(lambda: watched, url=str(server.make_url('/stream')), refresh_interval=60)
+        stream.add_listener(lambda symbol, price: received.append(symbol))
+        stream.start()
+        try:
+            await wait_for(lambda: received.count('BTC') >= 5)
+            assert set(received) == {'BTC'}
+            assert stream.get_price('btc') > 0
+            assert stream.get_price('ETH') is None
+
+            watched.add('ETH')
+            stream.refresh()
+            await wait_for(lambda: 'ETH' in received)
+            assert stream.get_price('ETH') > 0
+
+            watched.discard('BTC')
+            stream.refresh()
+            await wait_for(lambda: stream.stats()['subscribed'] == 1)
+            # BTC ticks already on the wire when the server reads the UNSUBSCRIBE are dropped
+            received.clear()
+            await wait_for(lambda: len(received) >= 20)
+            assert set(received) == {'ETH'}
+            assert stream.get_price('BTC') is None
+            assert stream.stats()['errors'] == 0
+        finally:
+            await stream.stop()
+            await http_client.close_session()
+            await server.close()
+
+    asyncio.run(scenario())
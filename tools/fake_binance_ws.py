@@ -0,0 +1,91 @@
+"""
+Local stand-in for the Binance combined WebSocket stream. It replays recorded miniTicker
+events (one JSON message per line, as written by tools/record_binance_ticks.py) to every
+connected client, honouring SUBSCRIBE/UNSUBSCRIBE requests and ?streams= in the URL.
+
+Usage:
+    python tools/fake_binance_ws.py [--port 9001] [--speed 10] [--fixture fixtures/binance_miniticker.jsonl]
+    BINANCE_WS_URL=ws://127.0.0.1:9001/stream PRICE_STREAM=1 python bot.py
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from aiohttp import web
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'fixtures', 'binance_miniticker.jsonl')
+
+
+def load_ticks(path):
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def replay(ws, ticks, subscribed, speed, repeat):
+    while True:
+        previous_time = None
+        for tick in ticks:
+            event_time = tick['data']['E']
+            if previous_time is not None and speed > 0:
+                await asyncio.sleep(max(0, event_time - previous_time) / 1000 / speed)
+            else:
+                # At full speed nothing else awaits while no tick is subscribed; let the
+                # connection read SUBSCRIBE requests (and other clients run) between ticks
+                await asyncio.sleep(0)
+            previous_time = event_time
+            if tick['stream'] in subscribed:
+                await ws.send_json(tick)
+        if not repeat:
+            return
+
+
+def create_app(fixture=DEFAULT_FIXTURE, speed=1.0, repeat=True):
+    """
+    Builds the aiohttp application; usable from scripts that run the server in-process.
+    """
+    ticks = load_ticks(fixture)
+    app = web.Application()
+    app['connections'] = 0
+
+    async def stream_handler(request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        app['connections'] += 1
+
+        streams = request.query.get('streams')
+        subscribed = set(streams.split('/')) if streams else set()
+        replayer = asyncio.ensure_future(replay(ws, ticks, subscribed, speed, repeat))
+        try:
+            async for message in ws:
+                if message.type != web.WSMsgType.TEXT:
+                    continue
+                request_body = json.loads(message.data)
+                if request_body.get('method') == 'SUBSCRIBE':
+                    subscribed.update(request_body['params'])
+                elif request_body.get('method') == 'UNSUBSCRIBE':
+                    subscribed.difference_update(request_body['params'])
+                await ws.send_json({"result": None, "id": request_body.get('id')})
+        finally:
+            replayer.cancel()
+        return ws
+
+    app.router.add_get('/stream', stream_handler)
+    app.router.add_get('/ws', stream_handler)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9001)
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument('--fixture', default=DEFAULT_FIXTURE)
+    parser.add_argument('--once', action='store_true', help="stop after one pass over the fixture")
+    args = parser.parse_args()
+    web.run_app(create_app(args.fixture, args.speed, not args.once), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Local stand-in for the Binance REST, CoinMarketCap, NewsAPI and CoinGecko endpoints the bot calls.
+Klines are replayed from the recorded fixtures in fixtures/binance_klines_*.json, re-timed so the
+last candle is the current one and rescaled per symbol. CMC, NewsAPI and CoinGecko responses are
+synthesized in the shapes those APIs return, priced from the same series. Every response can be
+delayed and a share of them failed, to see how the bot behaves when an upstream is slow or erroring.
+
+Usage:
+    python tools/fake_upstream.py [--port 9002] [--latency 80] [--jitter 40] [--error-rate 0.02]
+    BINANCE_API_URL=http://127.0.0.1:9002/binance CMC_API_URL=http://127.0.0.1:9002/cmc \\
+    NEWSAPI_URL=http://127.0.0.1:9002/newsapi COINGECKO_API_URL=http://127.0.0.1:9002/coingecko python bot.py
+
+Each API is served under its own path prefix (see PREFIXES), so the bot still budgets them separately.
+
+GET /__stats returns the number of requests served and failed per route.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import time
+import zlib
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SYMBOLS = ['BTC', 'ETH', 'SOL', 'BNB', 'XRP', 'ADA', 'DOGE', 'DOT', 'LINK', 'AVAX',
+                   'MATIC', 'LTC', 'TRX', 'ATOM', 'UNI', 'XLM', 'NEAR', 'APT', 'ARB', 'OP']
+
+# Path prefix each upstream is served under, appended to the stand-in's URL for the *_API_URL variables
+PREFIXES = {
+    "BINANCE_API_URL": "/binance",
+    "CMC_API_URL": "/cmc",
+    "NEWSAPI_URL": "/newsapi",
+    "COINGECKO_API_URL": "/coingecko",
+}
+
+_MINUTE = 60 * 1000
+INTERVAL_MS = {
+    '1m': _MINUTE, '3m': 3 * _MINUTE, '5m': 5 * _MINUTE, '15m': 15 * _MINUTE, '30m': 30 * _MINUTE,
+    '1h': 60 * _MINUTE, '2h': 120 * _MINUTE, '4h': 240 * _MINUTE, '6h': 360 * _MINUTE,
+    '8h': 480 * _MINUTE, '12h': 720 * _MINUTE, '1d': 1440 * _MINUTE, '3d': 3 * 1440 * _MINUTE,
+    '1w': 7 * 1440 * _MINUTE,
+}
+
+
+def load_fixtures():
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'fixtures', 'binance_klines_*.json'))):
+        with open(path, 'r') as f:
+            fixtures.append(json.load(f))
+    return fixtures
+
+
+class Market:
+    """
+    Per-symbol candle series built from the fixtures: each symbol gets one fixture (chosen by a
+    stable hash) scaled to its own price level.
+    """
+
+    def __init__(self, symbols, fixtures):
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.fixtures = fixtures
+        self._rows = {}
+
+    def seed(self, symbol):
+        return zlib.crc32(symbol.encode())
+
+    def has(self, symbol):
+        return symbol in self.symbols
+
+    def scale(self, symbol):
+        seed = self.seed(symbol)
+        return 10 ** ((seed % 700) / 100 - 3) / float(self.fixtures[seed % len(self.fixtures)][-1][4])
+
+    def klines(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        """
+        Candles for the symbol in Binance's row format, the last one being the period now forming.
+        """
+        key = (symbol, interval)
+        if key not in self._rows:
+            source = self.fixtures[self.seed(symbol) % len(self.fixtures)]
+            scale = self.scale(symbol)
+            self._rows[key] = [(float(row[1]) * scale, float(row[2]) * scale, float(row[3]) * scale,
+                                float(row[4]) * scale, row[5], row[7], row[8], row[9], row[10]) for row in source]
+        step = INTERVAL_MS[interval]
+        rows = self._rows[key]
+        first_open = (int(time.time() * 1000) // step - len(rows) + 1) * step
+
+        # Like Binance: from startTime forwards if given, otherwise the latest candles up to endTime
+        if start_time is not None:
+            start = -(-(start_time - first_open) // step)
+            end = start + limit
+            if end_time is not None:
+                end = min(end, (end_time - first_open) // step + 1)
+        else:
+            end = len(rows) if end_time is None else (end_time - first_open) // step + 1
+            start = end - limit
+        start, end = max(start, 0), min(end, len(rows))
+
+        out = []
+        for index in range(start, end):
+            open_, high, low, close, volume, quote_volume, trades, taker_base, taker_quote = rows[index]
+            open_time = first_open + index * step
+            out.append([open_time, f"{open_:.8f}", f"{high:.8f}", f"{low:.8f}", f"{close:.8f}", volume,
+                        open_time + step - 1, quote_volume, trades, taker_base, taker_quote, "0"])
+        return out
+
+    def last_price(self, symbol):
+        return self.klines(symbol, '1h', limit=1)[-1][4]
+
+
+def _cmc_status(credits=1):
+    return {"timestamp": time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()), "error_code": 0,
+            "error_message": None, "elapsed": 10, "credit_count": credits}
+
+
+def create_app(symbols=DEFAULT_SYMBOLS, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=500,
+               throttle_rate=0.0, seed=None):
+    """
+    Builds the aiohttp application; usable from scripts that run the server in-process.
+    """
+    market = Market(symbols, load_fixtures())
+    rng = random.Random(seed)
+    app = web.Application()
+    app['market'] = market
+    app['stats'] = {}
+    app['weight'] = [0, 0]  # [minute, Binance weight used in it]
+
+    @web.middleware
+    async def inject(request, handler):
+        if request.path == '/__stats':
+            return await handler(request)
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        stats = app['stats'].setdefault(route, {"requests": 0, "failed": 0})
+        stats["requests"] += 1
+        delay = latency_ms + (rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        roll = rng.random()
+        if roll < throttle_rate:
+            stats["failed"] += 1
+            return web.json_response({"code": -1003, "msg": "Too many requests."}, status=429,
+                                     headers={"Retry-After": "1"})
+        if roll < throttle_rate + error_rate:
+            stats["failed"] += 1
+            return web.json_response({"msg": "Injected failure."}, status=error_status)
+        return await handler(request)
+
+    app.middlewares.append(inject)
+
+    async def klines(request):
+        pair = request.query.get('symbol', '')
+        symbol = pair[:-4] if pair.endswith('USDT') else pair
+        interval = request.query.get('interval', '1d')
+        if not market.has(symbol) or interval not in INTERVAL_MS:
+            return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+        limit = min(int(request.query.get('limit', 500)), 1000)
+        start_time = int(request.query['startTime']) if 'startTime' in request.query else None
+        end_time = int(request.query['endTime']) if 'endTime' in request.query else None
+        # Like Binance, report the weight used in the current minute
+        minute = int(time.time() // 60)
+        if app['weight'][0] != minute:
+            app['weight'] = [minute, 0]
+        app['weight'][1] += 1 if limit < 100 else 2 if limit < 500 else 5
+        return web.json_response(market.klines(symbol, interval, limit, start_time, end_time),
+                                 headers={"X-MBX-USED-WEIGHT-1M": str(app['weight'][1])})
+
+    def _requested(request):
+        return [symbol for symbol in request.query.get('symbol', '').upper().split(',') if market.has(symbol)]
+
+    async def quotes(request):
+        data = {}
+        for symbol in _requested(request):
+            price = float(market.last_price(symbol))
+            seed = market.seed(symbol)
+            supply = 10 ** (6 + seed % 5)
+            data[symbol] = {
+                "id": seed % 100000, "name": symbol.title(), "symbol": symbol, "slug": symbol.lower(),
+                "cmc_rank": market.symbols.index(symbol) + 1, "circulating_supply": supply,
+                "total_supply": supply * 2,
+                "quote": {"USD": {
+                    "price": price, "volume_24h": price * supply / 50, "market_cap": price * supply,
+                    "percent_change_1h": (seed % 200 - 100) / 100, "percent_change_24h": (seed % 1000 - 500) / 100,
+                    "percent_change_7d": (seed % 3000 - 1500) / 100,
+                }},
+            }
+        return web.json_response({"status": _cmc_status(-(-len(data) // 100) or 1), "data": data})
+
+    async def info(request):
+        data = {symbol: {"id": market.seed(symbol) % 100000, "name": symbol.title(), "symbol": symbol,
+                         "logo": f"https://example.invalid/{symbol.lower()}.png",
+                         "description": f"{symbol} (stand-in data)."}
+                for symbol in _requested(request)}
+        return web.json_response({"status": _cmc_status(-(-len(data) // 100) or 1), "data": data})
+
+    async def coin_map(request):
+        data = [{"id": market.seed(symbol) % 100000, "rank": rank, "name": symbol.title(), "symbol": symbol,
+                 "slug": symbol.lower(), "is_active": 1}
+                for rank, symbol in enumerate(market.symbols, start=1)]
+        return web.json_response({"status": _cmc_status(1), "data": data})
+
+    async def news(request):
+        now = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        articles = [{"source": {"id": None, "name": "Stand-in"}, "title": f"{symbol} market update",
+                     "url": f"https://example.invalid/news/{symbol.lower()}/{int(time.time()) // 3600}",
+                     "publishedAt": now, "description": f"What moved {symbol} this hour."}
+                    for symbol in market.symbols[:10]]
+        # The articles change hourly; answer conditional requests for the current set with 304
+        etag = f'"{int(time.time()) // 3600}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.json_response({"status": "ok", "totalResults": len(articles), "articles": articles},
+                                 headers={"ETag": etag})
+
+    async def market_chart(request):
+        symbol = request.match_info['coin'].upper()
+        if not market.has(symbol):
+            return web.json_response({"error": "coin not found"}, status=404)
+        days = int(request.query.get('days', 30))
+        rows = market.klines(symbol, '1d', limit=days)
+        return web.json_response({"prices": [[row[0], float(row[4])] for row in rows]})
+
+    async def stats(request):
+        return web.json_response(app['stats'])
+
+    app.router.add_get('/binance/api/v3/klines', klines)
+    app.router.add_get('/cmc/v1/cryptocurrency/quotes/latest', quotes)
+    app.router.add_get('/cmc/v1/cryptocurrency/info', info)
+    app.router.add_get('/cmc/v1/cryptocurrency/map', coin_map)
+    app.router.add_get('/newsapi/v2/everything', news)
+    app.router.add_get('/coingecko/api/v3/coins/{coin}/market_chart', market_chart)
+    app.router.add_get('/__stats', stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9002)
+    parser.add_argument('--symbols', default=','.join(DEFAULT_SYMBOLS), help="comma-separated symbols to serve")
+    parser.add_argument('--latency', type=float, default=0.0, help="added delay per response (ms)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="uniform +/- jitter on that delay (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of responses failed with --error-status")
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="share of responses answered 429")
+    args = parser.parse_args()
+    web.run_app(create_app(args.symbols.split(','), args.latency, args.jitter, args.error_rate, args.error_status,
+                           args.throttle_rate),
+                host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+End-to-end load generator. Drives the real !analyze, !predict, !chart and !crypto callbacks in
+commands/ with fake Discord contexts, at a target arrival rate and command mix, against the local
+upstream stand-in (tools/fake_upstream.py, started in-process unless --upstream is given).
+Reports throughput, p50/p95/p99 latency per command and event-loop lag.
+
+Arrivals are open-loop (Poisson at --rate), so a bot that can't keep up shows growing latency
+instead of quietly slowing the generator down. Replies are classified as ok (the embed or image
+the command exists to send), degraded (a text reply such as "could not retrieve data") or error.
+
+Usage:
+    python tools/load_test.py [--rate 20] [--duration 30] [--mix analyze=4,predict=2,chart=1,crypto=3]
+                              [--symbols 20] [--latency 80] [--jitter 40] [--error-rate 0.02]
+                              [--no-budget] [--result-window 5] [--json results.json]
+
+Command coalescing and the caches stay on, as in production; use --result-window 0 and fewer
+--symbols to see how much they absorb.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tools.fake_upstream import create_app, DEFAULT_SYMBOLS, PREFIXES
+
+DEFAULT_MIX = "analyze=4,predict=2,chart=1,crypto=3"
+PREDICT_INTERVALS = ['1h', '4h', '12h', '1d']
+CHART_SPECS = [('1h', '30'), ('4h', '50'), ('1d', '30'), ('1d', '100')]
+# What a successful reply carries, per command
+EXPECTED_REPLY = {"analyze": "embed", "predict": "embed", "chart": "file", "crypto": "embed"}
+# !predict's forecast chart is attached when a forecast could be made; the embed alone still counts as ok
+
+
+def configure_environment(args, upstream_url):
+    """
+    Points every fetcher at the stand-in. Must run before the bot's modules are imported,
+    since they read their configuration at import time.
+    """
+    for name, prefix in PREFIXES.items():
+        os.environ[name] = upstream_url + prefix
+    os.environ.setdefault("COINMARKETCAP_API_KEY", "load-test")
+    os.environ["KLINE_DB"] = args.kline_db
+    if args.result_window is not None:
+        os.environ["COMMAND_RESULT_WINDOW"] = str(args.result_window)
+    if args.no_budget:
+        for name in ("BINANCE_WEIGHT_PER_MINUTE", "CMC_CALLS_PER_MINUTE", "CMC_CREDITS_PER_DAY",
+                     "NEWSAPI_REQUESTS_PER_DAY", "COINGECKO_CALLS_PER_MINUTE"):
+            os.environ[name] = "1000000000"
+
+
+class FakeContext:
+    """
+    Just enough of commands.Context for the command callbacks: records what they send.
+    """
+
+    def __init__(self):
+        self.replies = []
+
+    async def send(self, content=None, *, embed=None, file=None, **kwargs):
+        if embed is not None:
+            self.replies.append("embed")
+        if file is not None:
+            self.replies.append("file")
+        if embed is None and file is None:
+            self.replies.append("text")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in EXPECTED_REPLY:
+            sys.exit(f"Unknown command in --mix: {name} (choose from {', '.join(EXPECTED_REPLY)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class LagSampler:
+    """
+    Measures how late the event loop wakes a task that sleeps `interval` seconds.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+async def run(args):
+    from aiohttp import ClientSession, web
+
+    server = None
+    upstream_url = args.upstream
+    if upstream_url is None:
+        app = create_app(DEFAULT_SYMBOLS[:args.symbols], args.latency, args.jitter, args.error_rate,
+                         args.error_status, args.throttle_rate, seed=args.seed)
+        server = web.AppRunner(app, access_log=None)
+        await server.setup()
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        await web.SockSite(server, sock).start()
+        upstream_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    configure_environment(args, upstream_url)
+
+    # The bot's own modules, imported only now that they will read the stand-in's URLs
+    from commands import analyze_command, chart, crypto, predict
+    from tasks.discover_coins import CMC_MAP_URL
+    from utils.coin_catalog import replace_catalog
+    from utils.http_client import get_json, close_session
+    from utils.prewarm import prewarm
+    from utils.coalesce import fan_in_stats
+
+    callbacks = {
+        "analyze": lambda ctx, symbol, rng: analyze_command.analyze.callback(ctx, symbol),
+        "predict": lambda ctx, symbol, rng: predict.predict.callback(ctx, symbol, rng.choice(PREDICT_INTERVALS)),
+        "chart": lambda ctx, symbol, rng: chart.chart.callback(ctx, symbol, *rng.choice(CHART_SPECS)),
+        "crypto": lambda ctx, symbol, rng: crypto.crypto.callback(ctx, symbol),
+    }
+
+    coin_map = await get_json(CMC_MAP_URL)
+    if not coin_map:
+        sys.exit(f"Could not load the coin list from {upstream_url}")
+    replace_catalog(coin_map['data'])
+    symbols = [coin['symbol'] for coin in coin_map['data']][:args.symbols]
+    if not args.cold:
+        await prewarm()
+
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    rng = random.Random(args.seed)
+    results = {name: {"latencies": [], "ok": 0, "degraded": 0, "errors": 0, "timeouts": 0} for name in names}
+    in_flight = {"now": 0, "max": 0}
+
+    async def invoke(name, symbol):
+        ctx = FakeContext()
+        result = results[name]
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(callbacks[name](ctx, symbol, rng), timeout=args.timeout)
+        except asyncio.TimeoutError:
+            result["timeouts"] += 1
+            return
+        except Exception as e:
+            result["errors"] += 1
+            if result["errors"] <= 3:
+                print(f"!{name} {symbol} raised {e!r}")
+            return
+        finally:
+            in_flight["now"] -= 1
+        result["latencies"].append(time.perf_counter() - start)
+        if EXPECTED_REPLY[name] in ctx.replies:
+            result["ok"] += 1
+        else:
+            result["degraded"] += 1
+
+    lag = LagSampler()
+    lag.start()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + args.duration
+    next_arrival = started
+    invocations = []
+    print(f"Offering {args.rate:g}/s for {args.duration:g}s ({args.mix}) over {len(symbols)} symbols "
+          f"against {upstream_url}")
+    while next_arrival < deadline:
+        await asyncio.sleep(max(0.0, next_arrival - loop.time()))
+        name = rng.choices(names, weights)[0]
+        # Skewed towards the first symbols, as real traffic is
+        symbol = symbols[min(int(rng.expovariate(3 / len(symbols))), len(symbols) - 1)]
+        invocations.append(asyncio.ensure_future(invoke(name, symbol)))
+        next_arrival += rng.expovariate(args.rate)
+    offered_seconds = loop.time() - started
+    await asyncio.gather(*invocations)
+    elapsed = loop.time() - started
+    lag.stop()
+
+    upstream_stats = None
+    if server is not None:
+        upstream_stats = server.app['stats']
+    else:
+        async with ClientSession() as session:
+            async with session.get(f"{upstream_url}/__stats") as response:
+                upstream_stats = await response.json()
+
+    report = build_report(args, results, elapsed, offered_seconds, lag.samples, in_flight["max"], upstream_stats,
+                          fan_in_stats())
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    await close_session()
+    if server is not None:
+        await server.cleanup()
+    try:
+        from utils.chart_renderer import get_renderer
+        get_renderer().stop()
+    except Exception:
+        pass
+
+
+def _summary(latencies):
+    values = sorted(latencies)
+    return {
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+def build_report(args, results, elapsed, offered_seconds, lag_samples, max_in_flight, upstream_stats, fan_in):
+    commands = {}
+    all_latencies = []
+    for name, result in results.items():
+        sent = len(result["latencies"]) + result["errors"] + result["timeouts"]
+        commands[name] = {"sent": sent, "ok": result["ok"], "degraded": result["degraded"],
+                          "errors": result["errors"], "timeouts": result["timeouts"], **_summary(result["latencies"])}
+        all_latencies.extend(result["latencies"])
+    completed = sum(command["ok"] + command["degraded"] for command in commands.values())
+    sent = sum(command["sent"] for command in commands.values())
+    return {
+        "offered_rate": args.rate,
+        "achieved_rate": sent / offered_seconds if offered_seconds else 0.0,
+        "throughput": completed / elapsed if elapsed else 0.0,
+        "elapsed": elapsed,
+        "max_in_flight": max_in_flight,
+        "commands": commands,
+        "all": {"sent": sent, "completed": completed, **_summary(all_latencies)},
+        "loop_lag": _summary(lag_samples),
+        "upstream": upstream_stats,
+        "fan_in": fan_in,
+    }
+
+
+def print_report(report):
+    ms = lambda seconds: f"{seconds * 1000:.0f}"
+    print(f"\n{'command':<9} {'sent':>6} {'ok':>6} {'degraded':>8} {'errors':>6} {'timeouts':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, command in report["commands"].items():
+        print(f"{name:<9} {command['sent']:>6} {command['ok']:>6} {command['degraded']:>8} {command['errors']:>6} "
+              f"{command['timeouts']:>8} {ms(command['p50']):>8} {ms(command['p95']):>8} {ms(command['p99']):>8} "
+              f"{ms(command['max']):>8}")
+    total = report["all"]
+    print(f"{'all':<9} {total['sent']:>6} {'':>6} {'':>8} {'':>6} {'':>8} {ms(total['p50']):>8} "
+          f"{ms(total['p95']):>8} {ms(total['p99']):>8} {ms(total['max']):>8}")
+
+    lag = report["loop_lag"]
+    print(f"\nThroughput: {report['throughput']:.1f} commands/s completed "
+          f"(offered {report['offered_rate']:g}/s, achieved {report['achieved_rate']:.1f}/s), "
+          f"max {report['max_in_flight']} in flight, {report['elapsed']:.1f}s total")
+    print(f"Event loop lag: p50 {lag['p50'] * 1000:.1f} ms | p95 {lag['p95'] * 1000:.1f} ms | "
+          f"p99 {lag['p99'] * 1000:.1f} ms | max {lag['max'] * 1000:.1f} ms")
+    if report["fan_in"]:
+        print("Command fan-in: " + ", ".join(f"!{stats['command']} {stats['fan_in']:.1f}x"
+                                             for stats in report["fan_in"]))
+    if report["upstream"]:
+        print("Upstream requests: " + ", ".join(f"{route} {stats['requests']} ({stats['failed']} failed)"
+                                                for route, stats in sorted(report["upstream"].items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=20.0, help="command arrivals per second")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds to generate arrivals for")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="relative weights of analyze, predict, chart and crypto")
+    parser.add_argument('--symbols', type=int, default=20, help=f"distinct symbols to ask about (max {len(DEFAULT_SYMBOLS)})")
+    parser.add_argument('--timeout', type=float, default=60.0, help="seconds before an invocation counts as timed out")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--cold', action='store_true', help="skip the prewarm, as right after a restart")
+    parser.add_argument('--result-window', type=float, default=None, help="override COMMAND_RESULT_WINDOW")
+    parser.add_argument('--no-budget', action='store_true', help="lift the API budgets to measure the bot alone")
+    parser.add_argument('--kline-db', default=None, help="kline store path (default: a fresh temporary file)")
+    parser.add_argument('--json', default=None, help="also write the report to this file")
+    upstream = parser.add_argument_group('upstream stand-in (ignored with --upstream)')
+    upstream.add_argument('--upstream', default=None, help="base URL of an already running tools/fake_upstream.py")
+    upstream.add_argument('--latency', type=float, default=50.0, help="added delay per response (ms)")
+    upstream.add_argument('--jitter', type=float, default=25.0, help="uniform +/- jitter on that delay (ms)")
+    upstream.add_argument('--error-rate', type=float, default=0.0, help="share of responses failed")
+    upstream.add_argument('--error-status', type=int, default=500)
+    upstream.add_argument('--throttle-rate', type=float, default=0.0, help="share of responses answered 429")
+    args = parser.parse_args()
+    args.symbols = max(1, min(args.symbols, len(DEFAULT_SYMBOLS)))
+    # Removed on exit, however the run ends
+    with tempfile.TemporaryDirectory(prefix='autobot-load-') as tmp_dir:
+        if args.kline_db is None:
+            args.kline_db = os.path.join(tmp_dir, 'klines.db')
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
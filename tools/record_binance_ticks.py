@@ -0,0 +1,44 @@
+"""
+Records live Binance miniTicker events to a JSONL fixture for tools/fake_binance_ws.py.
+
+Usage: python tools/record_binance_ticks.py BTC ETH SOL --seconds 120 --out fixtures/binance_miniticker.jsonl
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443/stream"
+
+
+async def record(symbols, seconds, out_path):
+    streams = '/'.join(f"{symbol.lower()}usdt@miniTicker" for symbol in symbols)
+    count = 0
+    deadline = time.monotonic() + seconds
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(f"{BINANCE_WS_URL}?streams={streams}") as ws:
+            with open(out_path, 'w') as out:
+                while time.monotonic() < deadline:
+                    try:
+                        message = await asyncio.wait_for(ws.receive(), timeout=deadline - time.monotonic())
+                    except asyncio.TimeoutError:
+                        break
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    out.write(message.data + '\n')
+                    count += 1
+    print(f"Recorded {count} ticks to {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--out', default='fixtures/binance_miniticker.jsonl')
+    args = parser.parse_args()
+    asyncio.run(record(args.symbols, args.seconds, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from bisect import bisect_left, bisect_right
+
+
+class AlertBook:
+    """
+    Price alerts grouped per coin and kept sorted by target price.
+
+    Each price tick is compared with the previous price for that coin; every
+    alert whose target lies on the path between the two (an upward or a
+    downward cross) fires. Finding them is two bisections, so a tick costs
+    O(log n + k) for k triggered alerts regardless of how many are registered.
+    """
+
+    def __init__(self, alerts=()):
+        self._targets = {}  # coin -> sorted list of target prices
+        self._alerts = {}  # coin -> alerts, parallel to _targets
+        self.last_prices = {}  # coin -> last observed price
+
+        # Bulk load: group and sort once instead of inserting one by one
+        grouped = {}
+        for alert in alerts:
+            grouped.setdefault(alert['coin'], []).append(alert)
+        for coin, coin_alerts in grouped.items():
+            coin_alerts.sort(key=lambda a: a['target_price'])
+            self._alerts[coin] = coin_alerts
+            self._targets[coin] = [a['target_price'] for a in coin_alerts]
+
+    def __len__(self):
+        return sum(len(targets) for targets in self._targets.values())
+
+    def __iter__(self):
+        for alerts in self._alerts.values():
+            yield from alerts
+
+    def coins(self):
+        """
+        Returns the set of coins that currently have alerts.
+        """
+        return set(self._targets)
+
+    def add(self, alert):
+        coin = alert['coin']
+        targets = self._targets.setdefault(coin, [])
+        alerts = self._alerts.setdefault(coin, [])
+        index = bisect_right(targets, alert['target_price'])
+        targets.insert(index, alert['target_price'])
+        alerts.insert(index, alert)
+
+    def evaluate(self, coin, price):
+        """
+        Records a new price for a coin and removes and returns every alert it crossed.
+        On the first price seen since the coin got alerts only exact hits fire, since there is no path yet.
+        """
+        targets = self._targets.get(coin)
+        if not targets:
+            # Only prices seen while the coin has alerts count as the start of a path
+            return []
+
+        previous = self.last_prices.get(coin)
+        self.last_prices[coin] = price
+
+        if previous is None:
+            start, end = bisect_left(targets, price), bisect_right(targets, price)
+        elif price >= previous:
+            # Upward move: targets in (previous, price]
+            start, end = bisect_right(targets, previous), bisect_right(targets, price)
+        else:
+            # Downward move: targets in [price, previous)
+            start, end = bisect_left(targets, price), bisect_left(targets, previous)
+
+        if start == end:
+            return []
+
+        fired = self._alerts[coin][start:end]
+        del targets[start:end]
+        del self._alerts[coin][start:end]
+        self._drop_if_empty(coin)
+        return fired
+
+    def _drop_if_empty(self, coin):
+        if not self._targets[coin]:
+            del self._targets[coin]
+            del self._alerts[coin]
+            # Forget the price too: a later alert must not see a "cross" from a price observed
+            # before it existed
+            self.last_prices.pop(coin, None)
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.alert_engine import AlertBook
+
+ALERTS_DB = os.getenv("ALERTS_DB", "alerts.db")
+LEGACY_ALERTS_FILE = 'alerts.json'
+
+# Reclaim space once this many alerts have been deleted since the last compaction
+COMPACT_AFTER_DELETES = 1000
+# Free pages returned to the filesystem per compaction step; writes wait for at most one step
+COMPACT_STEP_PAGES = 256
+
+
+class AlertStore:
+    """
+    Durable alert repository backed by SQLite in WAL mode, with an in-memory AlertBook
+    mirror for evaluation. Every add or delete is a single small transaction, so the
+    cost of a write doesn't grow with the number of stored alerts and a crash mid-write
+    can't corrupt the existing data.
+    """
+
+    def __init__(self, path=ALERTS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._deletes_since_compact = 0
+        self._compaction = None
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        # Free pages are reclaimed in short incremental steps (see compact), never by a full VACUUM
+        # while the bot is running; an existing file only switches over after one VACUUM, done here
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS alerts ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "user_id INTEGER NOT NULL, "
+            "channel_id INTEGER NOT NULL, "
+            "coin TEXT NOT NULL, "
+            "target_price REAL NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        self._migrate_legacy_file()
+        self.book = AlertBook(self._load())
+
+    def _load(self):
+        rows = self.conn.execute("SELECT id, user_id, channel_id, coin, target_price FROM alerts")
+        return [{
+            "id": row[0],
+            "user_id": row[1],
+            "channel_id": row[2],
+            "coin": row[3],
+            "target_price": row[4],
+        } for row in rows]
+
+    def _migrate_legacy_file(self):
+        # One-off import of alerts saved by the old JSON persistence
+        try:
+            with open(LEGACY_ALERTS_FILE, 'r') as f:
+                legacy = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if not legacy:
+            return
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT INTO alerts (user_id, channel_id, coin, target_price, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(a['user_id'], a['channel_id'], a['coin'], a['target_price'], now) for a in legacy]
+            )
+            self.conn.execute("COMMIT")
+        os.replace(LEGACY_ALERTS_FILE, LEGACY_ALERTS_FILE + '.migrated')
+        print(f"Migrated {len(legacy)} alerts from {LEGACY_ALERTS_FILE} to {self.path}")
+
+    def __len__(self):
+        return len(self.book)
+
+    def add(self, user_id, channel_id, coin, target_price):
+        """
+        Persists a new alert and registers it with the alert book.
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO alerts (user_id, channel_id, coin, target_price, created_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, channel_id, coin, target_price, time.time())
+            )
+        alert = {
+            "id": cursor.lastrowid,
+            "user_id": user_id,
+            "channel_id": channel_id,
+            "coin": coin,
+            "target_price": target_price,
+        }
+        self.book.add(alert)
+        return alert
+
+    def delete(self, alerts):
+        """
+        Deletes alerts that have already left the book (fired alerts).
+        """
+        if not alerts:
+            return
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("DELETE FROM alerts WHERE id = ?", [(alert['id'],) for alert in alerts])
+            self.conn.execute("COMMIT")
+            self._deletes_since_compact += len(alerts)
+        if self._deletes_since_compact >= COMPACT_AFTER_DELETES:
+            self._schedule_compaction()
+
+    def _schedule_compaction(self):
+        # Deletes happen on the event loop (alert ticks), so compaction runs on a worker thread;
+        # inline only when there is no loop (scripts)
+        if self._compaction is not None and not self._compaction.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.compact()
+            return
+        self._compaction = loop.create_task(asyncio.to_thread(self.compact))
+        self._compaction.add_done_callback(self._compaction_done)
+
+    def _compaction_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Alert store compaction failed: {task.exception()!r}")
+
+    def compact(self):
+        """
+        Returns free pages to the filesystem and folds the WAL back into the database file, in
+        steps of COMPACT_STEP_PAGES. The lock is only held for one step at a time, so adds and
+        deletes made meanwhile wait for a step, not for the whole compaction.
+        """
+        with self._lock:
+            self._deletes_since_compact = 0
+        while True:
+            with self._lock:
+                if not self.conn.execute("PRAGMA freelist_count").fetchone()[0]:
+                    break
+                # executescript runs the pragma to completion; execute() would free a single page
+                self.conn.executescript(f"PRAGMA incremental_vacuum({COMPACT_STEP_PAGES})")
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_alert_store():
+    """
+    Returns the process-wide alert store shared by the !alert command and the alert checker.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AlertStore()
+    return _store
@@ -0,0 +1,333 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import time
+from urllib.parse import urlsplit
+
+# Request priorities, most important first
+PRIORITY_ALERT = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {PRIORITY_ALERT: 'alerts', PRIORITY_INTERACTIVE: 'interactive', PRIORITY_BACKGROUND: 'background'}
+
+# Share of each budget a priority must leave untouched, so scans can't starve commands and alerts
+PRIORITY_RESERVE = {
+    PRIORITY_ALERT: 0.0,
+    PRIORITY_INTERACTIVE: 0.05,
+    PRIORITY_BACKGROUND: float(os.getenv("API_BUDGET_BACKGROUND_RESERVE", "0.25")),
+}
+
+# How long a request may queue for budget before it is given up on (seconds)
+API_BUDGET_MAX_WAIT = float(os.getenv("API_BUDGET_MAX_WAIT", "30"))
+
+# Published limits: Binance request weight per minute, CMC calls per minute and credits per day
+# (Basic plan: 30/min, 10k/month), NewsAPI developer plan requests per day, CoinGecko public calls per minute
+BINANCE_WEIGHT_PER_MINUTE = int(os.getenv("BINANCE_WEIGHT_PER_MINUTE", "6000"))
+CMC_CALLS_PER_MINUTE = int(os.getenv("CMC_CALLS_PER_MINUTE", "30"))
+CMC_CREDITS_PER_DAY = int(os.getenv("CMC_CREDITS_PER_DAY", "333"))
+NEWSAPI_REQUESTS_PER_DAY = int(os.getenv("NEWSAPI_REQUESTS_PER_DAY", "100"))
+COINGECKO_CALLS_PER_MINUTE = int(os.getenv("COINGECKO_CALLS_PER_MINUTE", "30"))
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+_priority = contextvars.ContextVar('api_priority', default=PRIORITY_INTERACTIVE)
+
+
+def set_priority(priority):
+    """
+    Sets the priority of upstream requests made from the current task (and tasks it creates).
+    Background loops call this once at the top of their body.
+    """
+    _priority.set(priority)
+
+
+def current_priority():
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    Continuously refilling budget of `capacity` units per `period` seconds.
+    Requests that can't be served yet wait in a priority queue instead of failing.
+    """
+
+    def __init__(self, name, capacity, period):
+        self.name = name
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waited = 0
+        self.timed_out = 0
+        self._waiters = []  # heap of (priority, seq, cost, future)
+        self._seq = itertools.count()
+        self._wakeup = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    def _try_take(self, cost, priority, now):
+        if now < self.blocked_until:
+            return False
+        if self.tokens - cost < self.capacity * PRIORITY_RESERVE[priority]:
+            return False
+        self.tokens -= cost
+        return True
+
+    def _delay_for(self, cost, priority, now):
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        needed = cost + self.capacity * PRIORITY_RESERVE[priority] - self.tokens
+        return max(needed / self.rate, 0.01)
+
+    def _wake(self):
+        # Serves queued requests in priority order; the head of the queue blocks the rest
+        self._wakeup = None
+        now = self._refill()
+        while self._waiters:
+            priority, _, cost, future = self._waiters[0]
+            if future.done():  # Gave up waiting
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_take(cost, priority, now):
+                delay = self._delay_for(cost, priority, now)
+                self._wakeup = asyncio.get_running_loop().call_later(delay, self._wake)
+                return
+            heapq.heappop(self._waiters)
+            future.set_result(True)
+
+    async def acquire(self, cost, priority, max_wait=API_BUDGET_MAX_WAIT):
+        """
+        Takes `cost` units, waiting behind higher priority requests if needed.
+        Returns False if the budget didn't allow it within max_wait seconds.
+        """
+        cost = min(cost, self.capacity)
+        now = self._refill()
+        if not any(not waiter[3].done() and waiter[0] <= priority for waiter in self._waiters) \
+                and self._try_take(cost, priority, now):
+            return True
+
+        self.waited += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), cost, future))
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wake()
+        try:
+            return await asyncio.wait_for(future, timeout=max_wait)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+
+    def consume(self, amount):
+        """
+        Charges (or refunds, if negative) units outside of acquire, e.g. when the real cost is
+        only known from the response.
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def sync_used(self, used):
+        """
+        Lowers the local estimate to what the upstream reports as still available.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def stats(self):
+        self._refill()
+        queued = {}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                queued[PRIORITY_NAMES[priority]] = queued.get(PRIORITY_NAMES[priority], 0) + 1
+        return {
+            "name": self.name,
+            "available": self.tokens,
+            "capacity": self.capacity,
+            "queued": queued,
+            "waited": self.waited,
+            "timed_out": self.timed_out,
+            "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+        }
+
+
+class Provider:
+    """
+    Budget for one upstream API: its token buckets, how to estimate a request's cost and
+    how to read the real usage back from responses.
+    """
+
+    def __init__(self, name, buckets):
+        self.name = name
+        self.buckets = buckets
+        self.requests = 0
+        self.throttled = 0
+        self.server_used = None
+
+    def estimate(self, bucket_name, url, params):
+        return 1
+
+    def observe(self, status, headers, data, estimates):
+        pass
+
+    async def acquire(self, url, params, priority):
+        estimates = {}
+        for bucket in self.buckets:
+            estimates[bucket.name] = self.estimate(bucket.name, url, params)
+            if not await bucket.acquire(estimates[bucket.name], priority):
+                # Give back what the earlier buckets already handed out
+                for taken in self.buckets[:self.buckets.index(bucket)]:
+                    taken.consume(-estimates[taken.name])
+                return None
+        self.requests += 1
+        return estimates
+
+    def record(self, status, headers, data, estimates):
+        if status in (418, 429):
+            self.throttled += 1
+            retry_after = headers.get('Retry-After') if headers is not None else None
+            try:
+                seconds = float(retry_after) if retry_after else 60.0
+            except ValueError:
+                seconds = 60.0
+            for bucket in self.buckets:
+                bucket.block(seconds)
+        self.observe(status, headers, data, estimates)
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "server_used": self.server_used,
+            "buckets": [bucket.stats() for bucket in self.buckets],
+        }
+
+
+class BinanceProvider(Provider):
+    def __init__(self):
+        super().__init__('binance', [TokenBucket('weight', BINANCE_WEIGHT_PER_MINUTE, 60)])
+
+    def estimate(self, bucket_name, url, params):
+        # GET /api/v3/klines weight by limit; other endpoints we call weigh 1-2
+        if url.endswith('/klines'):
+            limit = int((params or {}).get('limit', 500))
+            return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+        return 2
+
+    def observe(self, status, headers, data, estimates):
+        if headers is None:
+            return
+        used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('X-MBX-USED-WEIGHT')
+        if used is not None:
+            try:
+                self.server_used = int(used)
+            except ValueError:
+                return
+            self.buckets[0].sync_used(self.server_used)
+
+
+class CoinMarketCapProvider(Provider):
+    def __init__(self):
+        super().__init__('coinmarketcap', [TokenBucket('calls', CMC_CALLS_PER_MINUTE, 60),
+                                           TokenBucket('credits', CMC_CREDITS_PER_DAY, 86400)])
+        self.credits_used = 0
+
+    def estimate(self, bucket_name, url, params):
+        if bucket_name == 'calls':
+            return 1
+        if url.endswith('/map'):
+            return 3  # 1 credit per 5,000 coins returned
+        # quotes and info: 1 credit per 100 symbols
+        symbols = str((params or {}).get('symbol', '')).count(',') + 1
+        return math.ceil(symbols / 100)
+
+    def observe(self, status, headers, data, estimates):
+        # The real charge is reported in the body: {"status": {"credit_count": n, ...}}
+        if not isinstance(data, dict):
+            return
+        credits = (data.get('status') or {}).get('credit_count')
+        if isinstance(credits, int):
+            self.credits_used += credits
+            self.server_used = self.credits_used
+            self.buckets[1].consume(credits - estimates.get('credits', 0))
+
+
+_providers = {
+    'api.binance.com': BinanceProvider(),
+    'pro-api.coinmarketcap.com': CoinMarketCapProvider(),
+    'newsapi.org': Provider('newsapi', [TokenBucket('requests', NEWSAPI_REQUESTS_PER_DAY, 86400)]),
+    'api.coingecko.com': Provider('coingecko', [TokenBucket('calls', COINGECKO_CALLS_PER_MINUTE, 60)]),
+}
+
+
+def _base(url):
+    # 'https://host:port/some/path?query' -> 'host:port/some/path'
+    parts = urlsplit(url)
+    return (parts.netloc + parts.path.rstrip('/')) if parts.netloc else url.rstrip('/')
+
+
+def register_host(base_url, provider_name):
+    """
+    Budgets requests under another host or base URL (e.g. a local stand-in) as one of the known
+    providers. Accepts a bare host or a base URL; with a path, only URLs below it match, so
+    several providers can share one stand-in host.
+    """
+    for provider in list(_providers.values()):
+        if provider.name == provider_name:
+            _providers[_base(base_url)] = provider
+            return
+
+
+def provider_for(url):
+    # The longest registered base that the URL falls under
+    target = _base(url)
+    best = None
+    for base, provider in _providers.items():
+        if (target == base or target.startswith(base + '/')) and (best is None or len(base) > len(best[0])):
+            best = (base, provider)
+    return best[1] if best is not None else None
+
+
+async def acquire(url, params=None):
+    """
+    Waits for budget for a request to url at the current priority.
+    Returns (provider, estimates) to pass to record(), (None, None) for unbudgeted hosts,
+    or raises BudgetExceeded if no budget came free in time.
+    """
+    provider = provider_for(url)
+    if provider is None:
+        return None, None
+    estimates = await provider.acquire(url, params, current_priority())
+    if estimates is None:
+        raise BudgetExceeded(provider.name)
+    return provider, estimates
+
+
+def record(provider, estimates, status, headers, data):
+    """
+    Feeds a response's status, headers and body back into its provider's budget.
+    """
+    if provider is not None:
+        provider.record(status, headers, data, estimates)
+
+
+def budget_stats():
+    seen = []
+    for provider in _providers.values():
+        if provider not in seen:
+            seen.append(provider)
+    return [provider.stats() for provider in seen]
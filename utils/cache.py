@@ -0,0 +1,156 @@
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+# Every cache registers itself here so diagnostics can report on all of them
+_caches = {}
+
+
+def approximate_size(value):
+    """
+    Rough deep size in bytes of a decoded JSON-like value (dicts, lists, strings, numbers).
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += approximate_size(key) + approximate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += approximate_size(item)
+    return size
+
+
+class TTLCache:
+    """
+    Async-friendly LRU cache with per-entry expiry, an entry/byte cap and
+    single-flight coalescing: concurrent misses for the same key share one fetch.
+    """
+
+    def __init__(self, name, ttl, max_entries=1024, max_bytes=None, sizeof=approximate_size):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._inflight = {}  # key -> asyncio.Task
+        _caches[name] = self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.peek(key) is not _MISSING
+
+    def peek(self, key):
+        """
+        Returns the live value for key without touching LRU order or counters.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return _MISSING
+        return entry[2]
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return default
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def set(self, key, value, ttl=None):
+        if key in self._entries:
+            self._remove(key)
+        size = self.sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return  # Larger than the whole budget, not worth caching
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, size, value)
+        self.current_bytes += size
+        self._evict()
+
+    def invalidate(self, key):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def keys(self):
+        return list(self._entries.keys())
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or (self.max_bytes and self.current_bytes > self.max_bytes)):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    async def get_or_fetch(self, key, fetch, ttl=None):
+        """
+        Returns the cached value for key, or awaits fetch() to produce it.
+        A fetch already in flight for the same key is shared instead of repeated.
+        None results are returned but not cached. ttl may be a function of the fetched value.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._fetch_done(key, t, ttl))
+
+        # Shield so one caller being cancelled doesn't cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _fetch_done(self, key, task, ttl):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        if value is not None:
+            self.set(key, value, ttl(value) if callable(ttl) else ttl)
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+def all_cache_stats():
+    """
+    Returns stats for every cache created in this process.
+    """
+    return [cache.stats() for cache in _caches.values()]
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import threading
+import time
+
+from utils import metrics
+
+# Chromium tabs kept open by the renderer; each renders one figure at a time
+CHART_RENDER_TABS = int(os.getenv("CHART_RENDER_TABS", "2"))
+CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "30"))
+# Renders allowed to wait for a tab before new requests are turned away
+CHART_RENDER_MAX_PENDING = int(os.getenv("CHART_RENDER_MAX_PENDING", "16"))
+CHART_WIDTH = int(os.getenv("CHART_WIDTH", "1000"))
+CHART_HEIGHT = int(os.getenv("CHART_HEIGHT", "600"))
+
+# Renders submitted and not yet finished or given up on
+_pending = 0
+
+
+class ChartRenderError(Exception):
+    pass
+
+
+class ChartRenderer:
+    """
+    Long-lived Kaleido instance on its own thread and event loop.
+    Chromium is started once and its tabs are reused, so a render costs only the plotly.js
+    draw rather than a browser launch. Callers on any loop submit figures with submit().
+    """
+
+    def __init__(self, tabs=CHART_RENDER_TABS):
+        self.tabs = tabs
+        self._loop = None
+        self._kaleido = None
+        self._launch = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._ready.set()
+        self._loop.run_forever()
+
+    def _ensure_thread(self):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    threading.Thread(target=self._run, name="chart-renderer", daemon=True).start()
+                    self._ready.wait()
+
+    async def _launch_browser(self):
+        import kaleido
+        renderer = kaleido.Kaleido(n=self.tabs, timeout=CHART_RENDER_TIMEOUT)
+        await renderer.open()
+        self._kaleido = renderer
+        return renderer
+
+    async def _open(self):
+        # Runs on the renderer loop; renders arriving during the launch wait on the same task
+        if self._kaleido is not None:
+            return self._kaleido
+        if self._launch is None:
+            self._launch = asyncio.ensure_future(self._launch_browser())
+        launch = self._launch
+        try:
+            return await asyncio.shield(launch)
+        finally:
+            if launch.done() and (launch.cancelled() or launch.exception() is not None):
+                # Let the next render try again
+                self._launch = None
+
+    async def _render(self, fig, opts):
+        renderer = await self._open()
+        return await renderer.calc_fig(fig, opts=opts)
+
+    def submit(self, fig, width=CHART_WIDTH, height=CHART_HEIGHT):
+        """
+        Schedules a render on the renderer thread and returns a concurrent.futures.Future of PNG bytes.
+        """
+        self._ensure_thread()
+        opts = {"format": "png", "width": width, "height": height}
+        return asyncio.run_coroutine_threadsafe(self._render(fig, opts), self._loop)
+
+    def start(self):
+        """
+        Launches Chromium ahead of the first request.
+        """
+        self._ensure_thread()
+        future = asyncio.run_coroutine_threadsafe(self._open(), self._loop)
+        future.add_done_callback(_report_start)
+        return future
+
+    def stop(self):
+        if self._loop is None:
+            return
+        if self._kaleido is not None:
+            asyncio.run_coroutine_threadsafe(self._kaleido.close(), self._loop).result(timeout=10)
+            self._kaleido = None
+            self._launch = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+
+def _report_start(future):
+    if not future.cancelled() and future.exception() is not None:
+        # The next render retries the launch
+        print(f"Chart renderer failed to start: {future.exception()!r}")
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = ChartRenderer()
+    return _renderer
+
+
+def queue_depth():
+    return _pending
+
+
+metrics.register_gauge("autobot_render_queue_depth", "Chart renders waiting for or using a tab.", queue_depth)
+
+
+async def render_png(fig, width=CHART_WIDTH, height=CHART_HEIGHT):
+    """
+    Renders a plotly figure to PNG bytes without blocking the event loop.
+    Raises ChartRenderError when the queue is full, the render times out or fails.
+    """
+    global _pending
+    if _pending >= CHART_RENDER_MAX_PENDING:
+        metrics.inc("autobot_render_failures_total", reason="rejected")
+        raise ChartRenderError("The chart renderer is busy right now. Please try again in a moment.")
+
+    _pending += 1
+    start = time.perf_counter()
+    future = get_renderer().submit(fig, width, height)
+    try:
+        # Cancelling the wrapper also cancels the render on the renderer loop
+        png = await asyncio.wait_for(asyncio.wrap_future(future), timeout=CHART_RENDER_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.inc("autobot_render_failures_total", reason="timeout")
+        raise ChartRenderError("The chart took too long to render. Please try again later.")
+    except Exception as e:
+        metrics.inc("autobot_render_failures_total", reason="error")
+        print(f"Chart render failed: {e!r}")
+        raise ChartRenderError("The chart could not be rendered.")
+    finally:
+        _pending -= 1
+
+    metrics.observe("autobot_render_seconds", time.perf_counter() - start)
+    return png
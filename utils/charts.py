@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+import os
+from collections import Counter
+
+from utils.cache import TTLCache
+from utils.chart_renderer import render_png
+from utils.get_crypto_data import (get_historical_data_binance_df_async, get_historical_data_binance_async,
+                                   generate_forecast_chart)
+from utils.forecasting import forecast_async
+from utils.forecast_chart import get_chart_executor
+
+CHART_CACHE_BYTES = int(os.getenv("CHART_CACHE_BYTES", str(32 * 1024 * 1024)))
+# Keys carry the last candle's open time, but that candle is still forming, so entries also expire
+CHART_CACHE_TTL = float(os.getenv("CHART_CACHE_TTL", "60"))
+
+# Rendered PNG bytes keyed by (kind, symbol, interval, limit, last candle open time)
+chart_cache = TTLCache('charts', ttl=CHART_CACHE_TTL, max_entries=512,
+                       max_bytes=CHART_CACHE_BYTES, sizeof=len)
+
+# Requests per (kind, symbol, interval, limit), used to pick charts to pre-render
+chart_requests = Counter()
+
+
+def popular_charts(count):
+    """
+    Returns the `count` most requested (kind, symbol, interval, limit) chart specs.
+    """
+    return [spec for spec, _ in chart_requests.most_common(count)]
+
+
+def build_candlestick_figure(coin_symbol, interval, limit, historical_data):
+    import plotly.graph_objs as go  # Deferred until the first chart
+
+    # Extract OHLC data for candlestick chart
+    dates = [datetime.datetime.utcfromtimestamp(item["time"] / 1000) for item in historical_data]
+    opens = [item["open"] for item in historical_data]
+    highs = [item["high"] for item in historical_data]
+    lows = [item["low"] for item in historical_data]
+    closes = [item["close"] for item in historical_data]
+
+    candlestick = go.Candlestick(
+        x=dates,
+        open=opens,
+        high=highs,
+        low=lows,
+        close=closes,
+        increasing_line_color='green',  # Color for increasing candles
+        decreasing_line_color='red',    # Color for decreasing candles
+    )
+
+    layout = go.Layout(
+        title=f'{coin_symbol.upper()} Price Chart - Interval: {interval}, Data Points: {limit}',
+        xaxis_title='Date',
+        yaxis_title='Price in USD',
+        xaxis=dict(showgrid=True, rangeslider=dict(visible=False)),
+        yaxis=dict(showgrid=True),
+        template='plotly_dark',  # Dark theme
+    )
+
+    return go.Figure(data=[candlestick], layout=layout)
+
+
+async def candlestick_png(coin_symbol, interval='1d', limit='30', record=True):
+    """
+    Returns the candlestick chart as PNG bytes, or None if there is no data for the coin.
+    Raises ChartRenderError if rendering fails.
+    """
+    symbol, limit = coin_symbol.upper(), str(limit)
+    historical_data = await get_historical_data_binance_df_async(symbol, interval, limit)
+    if not historical_data:
+        return None
+    # Counted only once the symbol is known to exist, so typos don't pile up
+    if record:
+        chart_requests[('candlestick', symbol, interval, limit)] += 1
+
+    async def render():
+        return await render_png(build_candlestick_figure(symbol, interval, limit, historical_data))
+
+    key = ('candlestick', symbol, interval, limit, historical_data[-1]["time"])
+    return await chart_cache.get_or_fetch(key, render)
+
+
+async def forecast_png(coin_symbol, interval, df, forecast, record=True):
+    """
+    Returns the forecast chart for df and forecast as PNG bytes.
+    """
+    symbol = coin_symbol.upper()
+    if record:
+        chart_requests[('forecast', symbol, interval, str(len(df)))] += 1
+
+    async def render():
+        loop = asyncio.get_running_loop()
+        buf = await loop.run_in_executor(get_chart_executor(), generate_forecast_chart, df, forecast, symbol, interval)
+        return buf.getvalue()
+
+    key = ('forecast', symbol, interval, str(len(df)), int(df['timestamp'].iloc[-1]))
+    return await chart_cache.get_or_fetch(key, render)
+
+
+async def prerender_chart(kind, coin_symbol, interval, limit):
+    """
+    Renders one chart into the cache without counting it as a request.
+    Returns True if the chart is now cached.
+    """
+    if kind == 'candlestick':
+        return await candlestick_png(coin_symbol, interval, limit, record=False) is not None
+
+    df = await get_historical_data_binance_async(coin_symbol, interval, limit=limit)
+    if df is None:
+        return False
+    forecast, _ = await forecast_async(coin_symbol, interval, df, forecast_periods=5)
+    if forecast is None:
+        return False
+    await forecast_png(coin_symbol, interval, df, forecast, record=False)
+    return True
@@ -0,0 +1,58 @@
+import io
+import os
+from collections import namedtuple
+
+import discord
+
+from utils.cache import TTLCache
+
+# Identical commands within this many seconds share one computed reply
+COMMAND_RESULT_WINDOW = float(os.getenv("COMMAND_RESULT_WINDOW", "5"))
+
+# What a command sends: text, an embed and optionally one image, kept as bytes so every
+# send can wrap them in its own discord.File (a File can only be sent once)
+Reply = namedtuple('Reply', ['content', 'embed', 'image', 'filename'], defaults=(None, None, None, None))
+
+_command_caches = {}
+
+
+def _cache_for(command):
+    cache = _command_caches.get(command)
+    if cache is None:
+        cache = TTLCache(f'command_{command}', ttl=COMMAND_RESULT_WINDOW, max_entries=256)
+        _command_caches[command] = cache
+    return cache
+
+
+async def coalesced(command, key, build):
+    """
+    Returns the Reply for (command, key): the one being computed right now, one computed within
+    the last COMMAND_RESULT_WINDOW seconds, or a fresh one from build().
+    """
+    return await _cache_for(command).get_or_fetch(key, build)
+
+
+async def send_reply(ctx, reply):
+    kwargs = {}
+    if reply.embed is not None:
+        kwargs['embed'] = reply.embed
+    if reply.image is not None:
+        kwargs['file'] = discord.File(io.BytesIO(reply.image), filename=reply.filename)
+    await ctx.send(reply.content, **kwargs)
+
+
+def fan_in_stats():
+    """
+    Per command: invocations, replies actually computed, and the fan-in ratio between them.
+    """
+    stats = []
+    for command, cache in _command_caches.items():
+        invocations = cache.hits + cache.misses + cache.coalesced
+        stats.append({
+            "command": command,
+            "invocations": invocations,
+            "computed": cache.misses,
+            "shared": cache.hits + cache.coalesced,
+            "fan_in": invocations / cache.misses if cache.misses else 0.0,
+        })
+    return stats
@@ -0,0 +1,201 @@
+import json
+import os
+import tempfile
+import threading
+
+COINS_FILE = 'coins.json'
+# Coin list file layout: {"format": ..., "columns": {field: [value per coin]}}.
+# Field names are stored once instead of once per coin; older files are a plain list of coin dicts.
+CATALOG_FORMAT = 'columnar-v1'
+
+
+class CoinCatalog:
+    """
+    Read-only snapshot of the CoinMarketCap coin list with hash indexes by symbol, id and slug.
+    A snapshot is never mutated after construction; refreshes build a new one and swap it in.
+    """
+
+    def __init__(self, coins):
+        self.coins = tuple(coins)
+        self.by_symbol = {}
+        self.by_id = {}
+        self.by_slug = {}
+
+        for coin in self.coins:
+            # Several coins can share a ticker, so symbols map to a list ordered by rank
+            self.by_symbol.setdefault(coin['symbol'].upper(), []).append(coin)
+            self.by_id[coin['id']] = coin
+            if coin.get('slug'):
+                self.by_slug[coin['slug'].lower()] = coin
+
+        for matches in self.by_symbol.values():
+            matches.sort(key=lambda c: c.get('rank') or float('inf'))
+
+        # Lowercased (name, symbol) pairs for substring search
+        self._search_keys = [(coin['name'].lower(), coin['symbol'].lower()) for coin in self.coins]
+
+    def __len__(self):
+        return len(self.coins)
+
+    def has_symbol(self, symbol):
+        return symbol.upper() in self.by_symbol
+
+    def get_by_symbol(self, symbol):
+        """
+        Returns the best ranked coin for a symbol, or None.
+        """
+        matches = self.by_symbol.get(symbol.upper())
+        return matches[0] if matches else None
+
+    def get_by_id(self, coin_id):
+        return self.by_id.get(int(coin_id))
+
+    def get_by_slug(self, slug):
+        return self.by_slug.get(slug.lower())
+
+    def top_by_rank(self, count):
+        """
+        Returns the `count` best ranked coins.
+        """
+        ranked = [coin for coin in self.coins if coin.get('rank')]
+        ranked.sort(key=lambda coin: coin['rank'])
+        return ranked[:count]
+
+    def search(self, query):
+        """
+        Returns every coin whose name or symbol contains the query (case-insensitive).
+        """
+        query = query.lower()
+        return [coin for coin, (name, symbol) in zip(self.coins, self._search_keys)
+                if query in name or query in symbol]
+
+
+_catalog = None
+_lock = threading.Lock()
+
+
+def encode_coins(coins):
+    """
+    Converts a list of coin dicts to the columnar file layout.
+    """
+    fields = list(dict.fromkeys(field for coin in coins for field in coin))
+    return {
+        "format": CATALOG_FORMAT,
+        "count": len(coins),
+        "columns": {field: [coin.get(field) for coin in coins] for field in fields},
+    }
+
+
+def decode_coins(payload):
+    """
+    Converts a coin list file's contents back to coin dicts. Reads both the columnar
+    layout and the older plain list.
+    """
+    if isinstance(payload, list):
+        return payload
+    columns = payload["columns"]
+    if not columns:
+        return []
+    fields = list(columns)
+    return [dict(zip(fields, values)) for values in zip(*columns.values())]
+
+
+def load_catalog(path=COINS_FILE):
+    """
+    Builds a catalog from the coin list file. A missing file yields an empty catalog.
+    """
+    try:
+        with open(path, 'r') as f:
+            coins = decode_coins(json.load(f))
+    except FileNotFoundError:
+        coins = []
+    return CoinCatalog(coins)
+
+
+def is_columnar_file(path=COINS_FILE):
+    """
+    True if the coin list file exists and is already in the columnar layout (a JSON object
+    rather than the older list).
+    """
+    try:
+        with open(path, 'r') as f:
+            return f.read(64).lstrip().startswith('{')
+    except FileNotFoundError:
+        return False
+
+
+def save_catalog(coins, path=COINS_FILE):
+    """
+    Writes the coin list in the columnar layout. The file is written to a temporary name
+    in the same directory and renamed over the old one, so readers never see a partial file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.coins-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(encode_coins(coins), f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _comparable(coin):
+    # Columnar files fill absent fields with None, so treat None and missing alike
+    return {field: value for field, value in coin.items() if value is not None}
+
+
+def diff_catalog(catalog, coins):
+    """
+    Compares a fresh coin list with a catalog by CMC id.
+    Returns (added, removed, changed) lists of coin dicts; changed holds the new versions.
+    """
+    fresh = {coin['id']: coin for coin in coins}
+    added = [coin for coin_id, coin in fresh.items() if coin_id not in catalog.by_id]
+    removed = [coin for coin_id, coin in catalog.by_id.items() if coin_id not in fresh]
+    changed = [coin for coin_id, coin in fresh.items()
+               if coin_id in catalog.by_id and _comparable(catalog.by_id[coin_id]) != _comparable(coin)]
+    return added, removed, changed
+
+
+def apply_changes(catalog, added, removed, changed):
+    """
+    Builds a new snapshot from catalog with a diff applied. Unchanged coins keep
+    their existing dicts and their order.
+    """
+    removed_ids = {coin['id'] for coin in removed}
+    updates = {coin['id']: coin for coin in changed}
+    coins = [updates.get(coin['id'], coin) for coin in catalog.coins if coin['id'] not in removed_ids]
+    return CoinCatalog(coins + list(added))
+
+
+def get_catalog():
+    """
+    Returns the process-wide catalog, loading it from disk on first use.
+    """
+    global _catalog
+    catalog = _catalog
+    if catalog is None or (not catalog.coins and os.path.exists(COINS_FILE)):
+        with _lock:
+            if _catalog is None or (not _catalog.coins and os.path.exists(COINS_FILE)):
+                _catalog = load_catalog()
+            catalog = _catalog
+    return catalog
+
+
+def replace_catalog(coins):
+    """
+    Swaps in a new snapshot, built from a fresh coin list or passed ready-made.
+    Readers holding the previous snapshot keep a consistent view.
+    """
+    global _catalog
+    catalog = coins if isinstance(coins, CoinCatalog) else CoinCatalog(coins)
+    with _lock:
+        _catalog = catalog
+    return catalog
+
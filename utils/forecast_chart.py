@@ -0,0 +1,82 @@
+import io
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Threads rendering forecast charts; each holds its own figure template while it draws
+FORECAST_CHART_WORKERS = int(os.getenv("FORECAST_CHART_WORKERS", "2"))
+
+
+class ForecastChartTemplate:
+    """
+    A pre-built Figure/FigureCanvasAgg with the axes, labels, grid and legend already laid out.
+    Only the line data, limits and title change between renders. Uses no pyplot global state,
+    so separate templates can render on separate threads; one template is never shared.
+    """
+
+    def __init__(self):
+        # Deferred so the bot doesn't load matplotlib until the first forecast chart
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(10, 6))
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.history_line, = self.ax.plot([], [], label='Historical Close Price')
+        self.forecast_line, = self.ax.plot([], [], label='ARIMA Forecast', linestyle='--')
+        self.ax.set_xlabel('Time')
+        self.ax.set_ylabel('Price (USDT)')
+        self.ax.legend()
+        self.ax.grid(True)
+
+    def render(self, history_x, history_y, forecast_x, forecast_y, title):
+        self.history_line.set_data(history_x, history_y)
+        self.forecast_line.set_data(forecast_x, forecast_y)
+        self.ax.set_title(title)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+        buf = io.BytesIO()
+        self.canvas.print_png(buf)
+        buf.seek(0)
+        return buf
+
+
+# Idle templates; a render takes one (or builds one if none are free) and returns it afterwards
+_templates = queue.LifoQueue()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def render_forecast_chart(close, forecast, title):
+    """
+    Draws the close history and the forecast on a pooled template and returns a BytesIO PNG.
+    Both arguments may be pandas Series (their index is the x axis) or plain arrays.
+    """
+    history_y = np.asarray(close, dtype=np.float64)
+    history_x = np.asarray(getattr(close, 'index', np.arange(len(history_y))))
+    forecast_y = np.asarray(forecast, dtype=np.float64)
+    forecast_x = np.asarray(getattr(forecast, 'index',
+                                    np.arange(len(history_y), len(history_y) + len(forecast_y))))
+
+    try:
+        template = _templates.get_nowait()
+    except queue.Empty:
+        template = ForecastChartTemplate()
+    try:
+        return template.render(history_x, history_y, forecast_x, forecast_y, title)
+    finally:
+        _templates.put(template)
+
+
+def get_chart_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=FORECAST_CHART_WORKERS,
+                                               thread_name_prefix='forecast-chart')
+    return _executor
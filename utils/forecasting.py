@@ -0,0 +1,140 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import metrics
+from utils.cache import TTLCache
+from utils.get_crypto_data import FORECAST_ENGINE, arima_forecast
+
+# Bounded process pool for model fits, so they never run on the event loop
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", "2"))
+FORECAST_TIMEOUT = float(os.getenv("FORECAST_TIMEOUT", "20"))
+# Jobs allowed to wait for a worker before new requests are turned away
+FORECAST_MAX_PENDING = int(os.getenv("FORECAST_MAX_PENDING", "16"))
+# The last candle is still forming, so a forecast fitted on it goes stale as its close moves:
+# results are kept until that candle closes, but never longer than this (seconds)
+FORECAST_MAX_AGE = float(os.getenv("FORECAST_MAX_AGE", "300"))
+
+forecast_cache = TTLCache('forecasts', ttl=FORECAST_MAX_AGE, max_entries=1024)
+
+_executor = None
+# Fits submitted to the pool and not yet finished or given up on
+_pending = 0
+
+
+class ForecastError(Exception):
+    pass
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        # spawn: never fork a process that is running the event loop and aiohttp threads
+        _executor = ProcessPoolExecutor(max_workers=FORECAST_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def queue_depth():
+    return _pending
+
+
+metrics.register_gauge("autobot_forecast_queue_depth", "Forecast fits waiting for or running on a pool worker.",
+                       queue_depth)
+
+
+def _fit_in_worker(closes, forecast_periods):
+    # Runs inside a pool process
+    import pandas as pd
+    start = time.perf_counter()
+    forecast, error_message = arima_forecast(pd.DataFrame({'close': closes}), forecast_periods=forecast_periods)
+    return forecast, error_message, time.perf_counter() - start
+
+
+def _warm_worker():
+    # Runs inside a pool process: loads statsmodels so the first real fit doesn't pay for it
+    from statsmodels.tsa.arima.model import ARIMA  # noqa: F401
+
+
+async def prewarm_workers():
+    """
+    Starts the pool processes and loads statsmodels in each of them.
+    Nothing to do for the NumPy engine, which never uses the pool.
+    """
+    if FORECAST_ENGINE == 'numpy':
+        return
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    await asyncio.gather(*(loop.run_in_executor(executor, _warm_worker) for _ in range(FORECAST_WORKERS)))
+
+
+def _release_worker():
+    global _pending
+    _pending -= 1
+
+
+async def _run_job(closes, forecast_periods):
+    global _pending
+    if _pending >= FORECAST_MAX_PENDING:
+        metrics.inc("autobot_forecast_failures_total", reason="rejected")
+        raise ForecastError("The forecasting queue is full right now. Please try again in a moment.")
+
+    loop = asyncio.get_running_loop()
+    future = get_executor().submit(_fit_in_worker, closes, forecast_periods)
+    # Counted until the worker is actually free again, not until this request stops waiting
+    _pending += 1
+    # Runs on the pool's management thread once the fit finishes or is cancelled before it started
+    future.add_done_callback(lambda done: loop.is_closed() or loop.call_soon_threadsafe(_release_worker))
+    try:
+        # On timeout the job is cancelled if it hasn't started; a fit already running is left to finish
+        forecast, error_message, fit_seconds = await asyncio.wait_for(asyncio.wrap_future(future),
+                                                                      timeout=FORECAST_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.inc("autobot_forecast_failures_total", reason="timeout")
+        raise ForecastError("The forecast took too long to compute. Please try again later.")
+    except Exception as e:
+        metrics.inc("autobot_forecast_failures_total", reason="error")
+        print(f"Forecast job failed: {e!r}")
+        raise ForecastError("The forecast could not be computed for this data.")
+
+    metrics.observe("autobot_forecast_fit_seconds", fit_seconds, engine=FORECAST_ENGINE)
+    return forecast, error_message
+
+
+async def _run_inline(df, forecast_periods):
+    # The NumPy engine takes well under a millisecond, so the pool round-trip isn't worth it
+    start = time.perf_counter()
+    result = arima_forecast(df, forecast_periods=forecast_periods, engine='numpy')
+    metrics.observe("autobot_forecast_fit_seconds", time.perf_counter() - start, engine='numpy')
+    return result
+
+
+def _forecast_ttl(df):
+    # Valid until the candle it was fitted on closes, within FORECAST_MAX_AGE
+    if 'close_time' not in df:
+        return FORECAST_MAX_AGE
+    return max(0.0, min(int(df['close_time'].iloc[-1]) / 1000 - time.time(), FORECAST_MAX_AGE))
+
+
+async def forecast_async(coin_symbol, interval, df, forecast_periods=5):
+    """
+    Forecasts the next periods of df['close'], on the process pool for the statsmodels
+    engine or inline for the NumPy engine.
+    Results are cached by (symbol, interval, last candle open time, periods) until that candle
+    closes or FORECAST_MAX_AGE passes, so repeated requests return immediately and concurrent
+    ones share a single fit.
+    Returns (forecast, error_message) like arima_forecast.
+    """
+    key = (coin_symbol.upper(), interval, int(df['timestamp'].iloc[-1]), forecast_periods)
+    if FORECAST_ENGINE == 'numpy':
+        fetch = lambda: _run_inline(df, forecast_periods)
+    else:
+        closes = df['close'].to_numpy()
+        fetch = lambda: _run_job(closes, forecast_periods)
+    try:
+        return await forecast_cache.get_or_fetch(key, fetch, ttl=_forecast_ttl(df))
+    except ForecastError as e:
+        return None, str(e)
+
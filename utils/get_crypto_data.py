@@ -1,156 +1,202 @@
-import requests
 import os
-import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
-import matplotlib.pyplot as plt
-import io
-import json
-
-COINS_FILE = 'coins.json'
+import numpy as np
+import asyncio
+from utils.http_client import get_json
+from utils import metrics
+from utils.api_budget import register_host
+from utils.coin_catalog import get_catalog
+from utils.cache import TTLCache
+from utils.indicators import compute_indicators
+from utils.forecast_chart import render_forecast_chart
+from utils.kline_store import get_kline_store, OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME
+
+# Overridable so the bot can be pointed at a local stand-in (see tools/fake_upstream.py)
+CMC_API_URL = os.getenv("CMC_API_URL", "https://pro-api.coinmarketcap.com")
+COINGECKO_API_URL = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com")
+register_host(CMC_API_URL, 'coinmarketcap')
+register_host(COINGECKO_API_URL, 'coingecko')
+
+CMC_QUOTES_URL = f"{CMC_API_URL}/v1/cryptocurrency/quotes/latest"
+CMC_INFO_URL = f"{CMC_API_URL}/v1/cryptocurrency/info"
+
+# Forecasting engine for arima_forecast: 'statsmodels' (full ARIMA fit) or 'numpy' (least-squares AR fast path)
+FORECAST_ENGINE = os.getenv("FORECAST_ENGINE", "statsmodels")
+AR_ORDER = 5
+
+# Quotes go stale quickly, metadata (logo, description) almost never changes
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "30"))
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "86400"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# quotes/latest accepts a comma-separated symbol list; keep each request's URL a sane size
+CMC_QUOTES_CHUNK_SIZE = 100
+
+quote_cache = TTLCache('cmc_quotes', ttl=QUOTE_CACHE_TTL, max_entries=2000, max_bytes=CACHE_MAX_BYTES)
+metadata_cache = TTLCache('cmc_metadata', ttl=METADATA_CACHE_TTL, max_entries=2000, max_bytes=CACHE_MAX_BYTES)
+
+KLINE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume', 'trades', 'taker_base_vol', 'taker_quote_vol', 'ignore']
 
 def is_valid_coin(coin_symbol):
     """
-    Checks if a coin symbol is valid by looking it up in the local coin list.
+    Checks if a coin symbol is valid by looking it up in the in-memory coin catalog.
+    If the coin list doesn't exist yet, all coins are considered invalid.
     """
-    try:
-        with open(COINS_FILE, 'r') as f:
-            coins = json.load(f)
-    except FileNotFoundError:
-        return False  # If the coin list doesn't exist, all coins are considered invalid
-
-    for coin in coins:
-        if coin['symbol'].upper() == coin_symbol.upper():
-            return True
-    return False
+    return get_catalog().has_symbol(coin_symbol)
 
-# Function to get metadata for a coin (includes logo)
-def get_crypto_metadata(coin_symbol):
-    if not is_valid_coin(coin_symbol):
-        return None
-    url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/info"
-    headers = {
+def _cmc_headers():
+    return {
         "Accepts": "application/json",
         "X-CMC_PRO_API_KEY": os.getenv("COINMARKETCAP_API_KEY"),
     }
-    params = {
+
+def _cmc_params(coin_symbol):
+    return {
         "symbol": coin_symbol.upper(),
     }
 
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
+def _rows_to_klines(rows):
+    return [{
+        "time": int(row[OPEN_TIME]),
+        "open": row[OPEN],
+        "high": row[HIGH],
+        "low": row[LOW],
+        "close": row[CLOSE],
+        "volume": row[VOLUME]
+    } for row in rows.tolist()]
+
+def _rows_to_df(rows):
+    import pandas as pd  # Deferred: pandas is only needed once a command asks for a DataFrame
+    df = pd.DataFrame(rows, columns=KLINE_COLUMNS[:rows.shape[1]], copy=True)
+    df['timestamp'] = df['timestamp'].astype('int64')
+    df['close_time'] = df['close_time'].astype('int64')
+    df['trades'] = df['trades'].astype('int64')
+    df['ignore'] = 0
+    return df
+
+# Function to get metadata for a coin (includes logo)
+async def get_crypto_metadata_async(coin_symbol):
+    if not is_valid_coin(coin_symbol):
         return None
+    with metrics.timed("autobot_fetch_seconds", fetch="metadata"):
+        return await metadata_cache.get_or_fetch(
+            coin_symbol.upper(),
+            lambda: get_json(CMC_INFO_URL, headers=_cmc_headers(), params=_cmc_params(coin_symbol)),
+        )
 
 # Function to get crypto data for a specific coin
-def get_crypto_data(coin_symbol):
+async def get_crypto_data_async(coin_symbol):
     if not is_valid_coin(coin_symbol):
         return None
-    url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest"
-    headers = {
-        "Accepts": "application/json",
-        "X-CMC_PRO_API_KEY": os.getenv("COINMARKETCAP_API_KEY"),
-    }
+    with metrics.timed("autobot_fetch_seconds", fetch="quote"):
+        return await quote_cache.get_or_fetch(
+            coin_symbol.upper(),
+            lambda: get_json(CMC_QUOTES_URL, headers=_cmc_headers(), params=_cmc_params(coin_symbol)),
+        )
+
+# Function to get quotes for many coins at once, returns {SYMBOL: coin_data}
+async def get_crypto_quotes_async(coin_symbols):
+    symbols = {symbol.upper() for symbol in coin_symbols if is_valid_coin(symbol)}
+    quotes = {}
+
+    # Serve what we can from the quote cache, fetch the rest in chunks
+    missing = []
+    for symbol in sorted(symbols):
+        cached = quote_cache.get(symbol)
+        if cached is not None and symbol in cached.get('data', {}):
+            quote_cache.hits += 1
+            quotes[symbol] = cached['data'][symbol]
+        else:
+            missing.append(symbol)
+
+    chunks = [missing[i:i + CMC_QUOTES_CHUNK_SIZE] for i in range(0, len(missing), CMC_QUOTES_CHUNK_SIZE)]
+    with metrics.timed("autobot_fetch_seconds", fetch="quotes_batch"):
+        responses = await asyncio.gather(*(_get_quotes_chunk(chunk) for chunk in chunks))
+
+    for response in responses:
+        if not response:
+            continue
+        for symbol, coin_data in response.get('data', {}).items():
+            quotes[symbol] = coin_data
+            # Store per-symbol payloads shaped like a single-symbol response so !crypto hits them too
+            quote_cache.set(symbol, {"status": response.get('status'), "data": {symbol: coin_data}})
+    return quotes
+
+async def _get_quotes_chunk(symbols):
+    quote_cache.misses += len(symbols)
     params = {
-        "symbol": coin_symbol.upper(),
+        "symbol": ",".join(symbols),
+        "skip_invalid": "true",  # One delisted symbol shouldn't fail the whole chunk
     }
-
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return None
+    return await get_json(CMC_QUOTES_URL, headers=_cmc_headers(), params=params)
 
 # Function to get historical data using Binance API
-def get_historical_data_binance_df(coin_symbol, interval='1d', limit='30'):
-    url = "https://api.binance.com/api/v3/klines"
-    params = {
-        "symbol": f"{coin_symbol.upper()}USDT",  # e.g., BTCUSDT
-        "interval": interval,  # Time interval for data, e.g., '1d', '15m', etc.
-        "limit": limit  # Number of data points to retrieve
-    }
-
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        # Extract the relevant OHLCV data (Open, High, Low, Close, Volume)
-        return [{
-            "time": int(item[0]),
-            "open": float(item[1]),
-            "high": float(item[2]),
-            "low": float(item[3]),
-            "close": float(item[4]),
-            "volume": float(item[5])
-        } for item in data]
-    return None
-
-# Function to get historical data using CoinGecko as a fallback
-def get_historical_data_coingecko(coin_symbol, days='30'):
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_symbol}/market_chart"
-    params = {
-        "vs_currency": "usd",
-        "days": days,  # Can be '1', '7', '30', etc.
-        "interval": "daily"  # Can be 'hourly' or 'daily'
-    }
-
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        if "prices" in data:
-            return [{
-                "time": int(price[0]),
-                "close": float(price[1])
-            } for price in data["prices"]]
+async def get_historical_data_binance_df_async(coin_symbol, interval='1d', limit='30'):
+    # Served from the local kline store, which only fetches candles it doesn't have yet
+    with metrics.timed("autobot_fetch_seconds", fetch="klines"):
+        rows = await get_kline_store().get_klines(coin_symbol, interval, limit)
+    if rows is not None:
+        return _rows_to_klines(rows)
     return None
 
 # Function to get historical data from Binance for EMA calculations
-def get_historical_data_binance(coin_symbol, interval='1d', limit='100'):
-    url = "https://api.binance.com/api/v3/klines"
-    params = {
-        "symbol": f"{coin_symbol.upper()}USDT",  # e.g., BTCUSDT
-        "interval": interval,  # Interval (e.g., '1h', '4h', '12h', '1d')
-        "limit": limit  # Number of data points (e.g., last 100 intervals)
-    }
-
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume', 'trades', 'taker_base_vol', 'taker_quote_vol', 'ignore'])
-        df['close'] = df['close'].astype(float)
-        return df
+async def get_historical_data_binance_async(coin_symbol, interval='1d', limit='100'):
+    # Served from the local kline store, which only fetches candles it doesn't have yet
+    with metrics.timed("autobot_fetch_seconds", fetch="klines"):
+        rows = await get_kline_store().get_klines(coin_symbol, interval, limit)
+    if rows is not None:
+        return _rows_to_df(rows)
     return None
 
-# Function to calculate EMA and RSI indicators
+# Function to calculate EMA, RSI and MACD indicators
 def calculate_indicators(df):
-    # Calculate 12-period EMA, 26-period EMA, 100-period EMA, 200-period EMA
-    df['EMA_12'] = df['close'].ewm(span=12, adjust=False).mean()
-    df['EMA_26'] = df['close'].ewm(span=26, adjust=False).mean()
-    df['EMA_100'] = df['close'].ewm(span=100, adjust=False).mean()
-    df['EMA_200'] = df['close'].ewm(span=200, adjust=False).mean()
-
-    # Calculate RSI (14-period) with protection against division by zero
-    delta = df['close'].diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=14).mean()
-    avg_loss = loss.rolling(window=14).mean()
-
-    # Add a small epsilon to avoid division by zero
-    rs = avg_gain / (avg_loss + 1e-9)
-    df['RSI'] = 100 - (100 / (1 + rs))
-    
-    # Calculate MACD and MACD Signal Line
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    
+    # EMA 12/26/100/200, RSI (14-period), MACD and MACD Signal Line in one NumPy pass
+    for column, values in compute_indicators(df['close'].to_numpy()).items():
+        df[column] = values
     return df
 
+# Function to fit AR(order) models on first differences for many series at once
+def ar_forecast_batch(closes, forecast_periods=5, order=AR_ORDER):
+    """
+    Least-squares estimate of the ARIMA(order,1,0) model (no constant, as statsmodels
+    uses with d=1) for every row of a (series, time) close matrix of equal-length rows.
+    Returns a (series, forecast_periods) array of forecast prices.
+    """
+    closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+    diffs = np.diff(closes, axis=1)
+    n = diffs.shape[1]
+
+    # Lagged design matrix: X[:, t, j] = diff[t + order - 1 - j], target y[:, t] = diff[t + order]
+    X = np.stack([diffs[:, order - 1 - j:n - 1 - j] for j in range(order)], axis=2)
+    y = diffs[:, order:]
+    xtx = np.einsum('kti,ktj->kij', X, X)
+    xty = np.einsum('kti,kt->ki', X, y)
+    # Tiny ridge term keeps flat (constant-price) series solvable
+    coef = np.linalg.solve(xtx + 1e-12 * np.eye(order), xty[..., None])[..., 0]
+
+    # Roll the recursion forward on the differences, then integrate back to prices
+    history = diffs[:, -order:][:, ::-1].copy()  # most recent first
+    steps = np.empty((closes.shape[0], forecast_periods))
+    for step in range(forecast_periods):
+        next_diff = np.einsum('ki,ki->k', coef, history)
+        steps[:, step] = next_diff
+        history = np.concatenate([next_diff[:, None], history[:, :-1]], axis=1)
+    return closes[:, -1:] + np.cumsum(steps, axis=1)
+
 # Function to perform ARIMA forecast
-def arima_forecast(df, forecast_periods=5):
+def arima_forecast(df, forecast_periods=5, engine=None):
     # Ensure we have enough data
     if len(df) < 30:
         return None, "Not enough historical data to make a reliable forecast."
 
+    import pandas as pd
+    if (engine or FORECAST_ENGINE) == 'numpy':
+        # Fast path: same AR(5) on first differences, estimated with least squares
+        values = ar_forecast_batch(df['close'].to_numpy(), forecast_periods)[0]
+        return pd.Series(values, index=pd.RangeIndex(len(df), len(df) + forecast_periods), name='predicted_mean'), None
+
+    # statsmodels takes over a second to import, so it is loaded on the first fit (in a pool worker)
+    from statsmodels.tsa.arima.model import ARIMA
+
     # Use the 'close' price for forecasting
     model = ARIMA(df['close'], order=(5,1,0))
     model_fit = model.fit()
@@ -161,19 +207,5 @@ def arima_forecast(df, forecast_periods=5):
 
 # Function to generate a forecast chart
 def generate_forecast_chart(df, forecast, coin_symbol, interval):
-    plt.figure(figsize=(10, 6))
-    plt.plot(df['close'], label='Historical Close Price')
-    plt.plot(forecast, label='ARIMA Forecast', linestyle='--')
-    plt.title(f'{coin_symbol.upper()} Price Forecast ({interval})')
-    plt.xlabel('Time')
-    plt.ylabel('Price (USDT)')
-    plt.legend()
-    plt.grid(True)
-
-    # Save plot to a bytes buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    plt.close()
-
-    return buf
+    # Pooled Agg figure templates: no pyplot global state, so this is safe to call from worker threads
+    return render_forecast_chart(df['close'], forecast, f'{coin_symbol.upper()} Price Forecast ({interval})')
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from utils import api_budget, metrics
+
+# Timeouts and retry policy for every upstream call (seconds)
+REQUEST_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+RETRY_BACKOFF = 0.5
+
+# Connection pool sizing: keep-alive connections are pooled per host by the connector
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+POOL_SIZE_PER_HOST = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "20"))
+
+# Status codes worth retrying (rate limits and transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HttpResponse = namedtuple('HttpResponse', ['status', 'headers', 'data'])
+
+_session = None
+
+
+def get_session():
+    """
+    Returns the shared aiohttp session, creating it on first use inside the running loop.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_SIZE,
+            limit_per_host=POOL_SIZE_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, sock_connect=CONNECT_TIMEOUT)
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+
+async def close_session():
+    """
+    Closes the shared session and its pooled connections.
+    """
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _retry_delay(response, attempt):
+    # Honour Retry-After when the upstream sends it, otherwise back off exponentially
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return RETRY_BACKOFF * (2 ** attempt)
+
+
+def _endpoint_labels(url, endpoint):
+    provider = api_budget.provider_for(url)
+    return {
+        "provider": provider.name if provider is not None else urlsplit(url).netloc,
+        "endpoint": endpoint or urlsplit(url).path,
+    }
+
+
+async def request(url, params=None, headers=None, retries=MAX_RETRIES, endpoint=None):
+    """
+    Performs a GET request through the shared session with timeouts and retries.
+    Every attempt first waits for the provider's API budget (see utils/api_budget.py).
+    endpoint names the call in metrics when the URL path varies per request (defaults to the path).
+    Returns an HttpResponse, or None if the upstream could not be reached or no budget came free.
+    """
+    if params:
+        # aiohttp only accepts str/int/float query values
+        params = {key: str(value) for key, value in params.items()}
+    if headers:
+        # Like requests, drop headers whose value is None (e.g. an unset API key)
+        headers = {key: value for key, value in headers.items() if value is not None}
+
+    labels = _endpoint_labels(url, endpoint)
+    session = get_session()
+    for attempt in range(retries + 1):
+        try:
+            with metrics.timed("autobot_upstream_budget_wait_seconds", provider=labels["provider"]):
+                provider, estimates = await api_budget.acquire(url, params)
+        except api_budget.BudgetExceeded as e:
+            metrics.inc("autobot_upstream_errors_total", reason="budget", **labels)
+            print(f"Request to {url} dropped: no {e} API budget came free in time")
+            return None
+        start = time.perf_counter()
+        try:
+            async with session.get(url, params=params, headers=headers) as response:
+                if response.status in RETRY_STATUSES and attempt < retries:
+                    api_budget.record(provider, estimates, response.status, response.headers, None)
+                    metrics.observe("autobot_upstream_seconds", time.perf_counter() - start,
+                                    status=response.status, **labels)
+                    metrics.inc("autobot_upstream_errors_total", reason=response.status, **labels)
+                    await asyncio.sleep(_retry_delay(response, attempt))
+                    continue
+
+                data = None
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                elif response.status != 304:  # Not Modified answers a conditional request, not an error
+                    metrics.inc("autobot_upstream_errors_total", reason=response.status, **labels)
+                api_budget.record(provider, estimates, response.status, response.headers, data)
+                metrics.observe("autobot_upstream_seconds", time.perf_counter() - start,
+                                status=response.status, **labels)
+                return HttpResponse(response.status, response.headers, data)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            metrics.observe("autobot_upstream_seconds", time.perf_counter() - start, status="error", **labels)
+            metrics.inc("autobot_upstream_errors_total", reason=type(e).__name__, **labels)
+            if attempt == retries:
+                print(f"Request to {url} failed: {e!r}")
+                return None
+            await asyncio.sleep(_retry_delay(None, attempt))
+    return None
+
+
+async def get_json(url, params=None, headers=None, endpoint=None):
+    """
+    Returns the decoded JSON body of a successful GET request, or None.
+    """
+    response = await request(url, params=params, headers=headers, endpoint=endpoint)
+    if response is None or response.status != 200:
+        return None
+    return response.data
@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+
+from utils.cache import TTLCache
+
+EMA_SPANS = (12, 26, 100, 200)
+MACD_SIGNAL_SPAN = 9
+RSI_WINDOW = 14
+RSI_EPSILON = 1e-9  # Protection against division by zero, as in calculate_indicators
+
+# Windows memoized by IndicatorEngine, and how long one is kept after it was last seeded (seconds)
+INDICATOR_MAX_STATES = int(os.getenv("INDICATOR_MAX_STATES", "2048"))
+INDICATOR_STATE_TTL = float(os.getenv("INDICATOR_STATE_TTL", "3600"))
+
+
+def _alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+def ema(values, span):
+    """
+    Exponential moving average matching pandas ewm(span=span, adjust=False).mean().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return values.copy()
+    from scipy.signal import lfilter
+    alpha = _alpha(span)
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded so that y[0] = x[0]
+    out, _ = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]])
+    return out
+
+
+def rsi(close, window=RSI_WINDOW):
+    """
+    RSI with simple rolling means of gains and losses, matching calculate_indicators.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    out = np.full(len(close), np.nan)
+    if len(close) >= window:
+        gain_sum = np.convolve(gain, np.ones(window), 'valid')
+        loss_sum = np.convolve(loss, np.ones(window), 'valid')
+        rs = (gain_sum / window) / (loss_sum / window + RSI_EPSILON)
+        out[window - 1:] = 100 - (100 / (1 + rs))
+    return out
+
+
+def compute_indicators(close):
+    """
+    Batch path: every indicator column for a close-price series, as NumPy arrays.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    columns = {f'EMA_{span}': ema(close, span) for span in EMA_SPANS}
+    columns['RSI'] = rsi(close)
+    columns['MACD'] = columns['EMA_12'] - columns['EMA_26']
+    columns['MACD_Signal'] = ema(columns['MACD'], MACD_SIGNAL_SPAN)
+    return columns
+
+
+class IndicatorState:
+    """
+    EMA/MACD values and the trailing RSI gains/losses after the closed candles of one window,
+    so the still-open candle can be evaluated on top of them without recomputing the window.
+    """
+
+    def __init__(self, open_times, closes):
+        # Taken from the batch path, so the EMAs are seeded at the first candle as compute_indicators does
+        columns = compute_indicators(closes)
+        self.first_open_time = open_times[0]
+        self.last_open_time = open_times[-1]
+        self.last_close = float(closes[-1])
+        self.emas = {span: float(columns[f'EMA_{span}'][-1]) for span in EMA_SPANS}
+        self.macd_signal = float(columns['MACD_Signal'][-1])
+        # The open candle adds one more delta, so only the last RSI_WINDOW - 1 are kept
+        delta = np.diff(closes, prepend=closes[0])[1 - RSI_WINDOW:]
+        self.gains = np.maximum(delta, 0.0)
+        self.losses = np.maximum(-delta, 0.0)
+
+    def peek(self, close):
+        """
+        Latest indicator values if the next (still-open) candle closed at `close`.
+        """
+        values = {'close': close}
+        for span, value in self.emas.items():
+            values[f'EMA_{span}'] = _alpha(span) * close + (1 - _alpha(span)) * value
+        values['MACD'] = values['EMA_12'] - values['EMA_26']
+        values['MACD_Signal'] = (_alpha(MACD_SIGNAL_SPAN) * values['MACD']
+                                 + (1 - _alpha(MACD_SIGNAL_SPAN)) * self.macd_signal)
+        if len(self.gains) < RSI_WINDOW - 1:
+            values['RSI'] = float('nan')
+        else:
+            delta = close - self.last_close
+            gain = (self.gains.sum() + max(delta, 0.0)) / RSI_WINDOW
+            loss = (self.losses.sum() + max(-delta, 0.0)) / RSI_WINDOW
+            values['RSI'] = 100 - (100 / (1 + gain / (loss + RSI_EPSILON)))
+        return values
+
+
+class IndicatorEngine:
+    """
+    Per-window memo for repeated analyses of the same series while its newest candle is still
+    forming. The IndicatorState of a window's closed candles is kept per (symbol, interval,
+    window length); while the window is unchanged (same first and last closed candle) only the
+    open candle is evaluated on top of it. Once a candle closes and the window slides, the state
+    is seeded again from the whole window, so results always equal the batch path on the window
+    given, whatever was asked before.
+    """
+
+    def __init__(self):
+        self._states = TTLCache('indicator_states', ttl=INDICATOR_STATE_TTL, max_entries=INDICATOR_MAX_STATES)
+        self.rebuilds = 0
+        self.updates = 0
+
+    def latest(self, symbol, interval, open_times, closes):
+        """
+        Returns the latest indicator values for a series given its open times and closes.
+        """
+        open_times = np.asarray(open_times)
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) < 2:
+            # Nothing closed to memoize
+            columns = compute_indicators(closes)
+            values = {column: float(values[-1]) for column, values in columns.items()}
+            values['close'] = float(closes[-1])
+            return values
+
+        key = (symbol.upper(), interval, len(closes))
+        state = self._states.get(key)
+        if state is None or state.first_open_time != open_times[0] or state.last_open_time != open_times[-2]:
+            state = IndicatorState(open_times[:-1], closes[:-1])
+            self._states.set(key, state)
+            self.rebuilds += 1
+        else:
+            self.updates += 1
+        return state.peek(float(closes[-1]))
+
+    def latest_from_df(self, symbol, interval, df):
+        return self.latest(symbol, interval, df['timestamp'].to_numpy(), df['close'].to_numpy())
+
+
+indicator_engine = IndicatorEngine()
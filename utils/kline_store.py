@@ -0,0 +1,245 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from utils.cache import TTLCache
+from utils.http_client import get_json
+from utils.api_budget import register_host
+
+KLINE_DB = os.getenv("KLINE_DB", "klines.db")
+# Overridable so the bot can be pointed at a local stand-in (see tools/fake_upstream.py)
+BINANCE_API_URL = os.getenv("BINANCE_API_URL", "https://api.binance.com")
+BINANCE_KLINES_URL = f"{BINANCE_API_URL}/api/v3/klines"
+register_host(BINANCE_API_URL, 'binance')
+
+# Binance returns at most this many candles per request
+MAX_KLINES_PER_REQUEST = 1000
+# Most candles served per call (e.g. !chart's count); more are capped to this
+KLINE_MAX_LIMIT = int(os.getenv("KLINE_MAX_LIMIT", str(MAX_KLINES_PER_REQUEST)))
+# A series is trimmed back to the largest window served from it once it outgrows it by this many
+KLINE_TRIM_SLACK = 100
+# Don't ask Binance again for the same series within this many seconds
+KLINE_REFRESH_SECONDS = float(os.getenv("KLINE_REFRESH_SECONDS", "5"))
+# Number of series kept as in-memory arrays in front of SQLite
+KLINE_MEMORY_SERIES = int(os.getenv("KLINE_MEMORY_SERIES", "512"))
+KLINE_MEMORY_BYTES = int(os.getenv("KLINE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+
+# Array layout: one float64 row per candle
+FIELDS = ['open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+          'quote_volume', 'trades', 'taker_base_volume', 'taker_quote_volume']
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, CLOSE_TIME = range(7)
+
+_MINUTE = 60 * 1000
+INTERVAL_MS = {
+    '1m': _MINUTE, '3m': 3 * _MINUTE, '5m': 5 * _MINUTE, '15m': 15 * _MINUTE, '30m': 30 * _MINUTE,
+    '1h': 60 * _MINUTE, '2h': 120 * _MINUTE, '4h': 240 * _MINUTE, '6h': 360 * _MINUTE,
+    '8h': 480 * _MINUTE, '12h': 720 * _MINUTE, '1d': 1440 * _MINUTE, '3d': 3 * 1440 * _MINUTE,
+    '1w': 7 * 1440 * _MINUTE,
+}
+
+
+def parse_binance_klines(data):
+    """
+    Converts a Binance klines payload into an (n, 11) float64 array.
+    """
+    if not data:
+        return np.empty((0, len(FIELDS)))
+    return np.array([row[:len(FIELDS)] for row in data], dtype=np.float64)
+
+
+class KlineStore:
+    """
+    Local OHLCV store keyed by (symbol, interval). Candles live in SQLite on disk and the
+    most recently used series are kept as float64 arrays in memory. A refresh only asks
+    Binance for candles from the last stored open time onwards, which also replaces the
+    still-open candle. Each series only keeps as many candles as the largest window served
+    from it (at most KLINE_MAX_LIMIT), so neither the table nor a reload grows without bound.
+    """
+
+    def __init__(self, path=KLINE_DB):
+        self.path = path
+        self._db_lock = threading.Lock()
+        self._locks = {}
+        self._last_sync = {}
+        self._windows = {}  # key -> largest limit served
+        self.memory = TTLCache('klines', ttl=float('inf'), max_entries=KLINE_MEMORY_SERIES,
+                               max_bytes=KLINE_MEMORY_BYTES, sizeof=lambda rows: rows.nbytes)
+        self.upstream_requests = 0
+        self.upstream_candles = 0
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS klines ("
+            "symbol TEXT NOT NULL, interval TEXT NOT NULL, open_time INTEGER NOT NULL, "
+            "open REAL, high REAL, low REAL, close REAL, volume REAL, close_time INTEGER, "
+            "quote_volume REAL, trades INTEGER, taker_base_volume REAL, taker_quote_volume REAL, "
+            "PRIMARY KEY (symbol, interval, open_time)) WITHOUT ROWID"
+        )
+
+    def _series(self, key):
+        # In-memory array first, SQLite second
+        rows = self.memory.get(key)
+        if rows is None:
+            with self._db_lock:
+                cursor = self.conn.execute(
+                    f"SELECT {', '.join(FIELDS)} FROM klines WHERE symbol = ? AND interval = ? ORDER BY open_time",
+                    key
+                )
+                rows = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, len(FIELDS))
+            self.memory.set(key, rows)
+        return rows
+
+    def _merge(self, key, rows, fresh):
+        """
+        Merges freshly fetched candles into the stored series. If the new candles don't
+        join up with what is stored, the stale part is dropped so the series stays contiguous.
+        """
+        if not len(fresh):
+            return rows
+        first_open = fresh[0, OPEN_TIME]
+        interval_ms = INTERVAL_MS.get(key[1])
+        keep = rows[rows[:, OPEN_TIME] < first_open]
+        contiguous = (len(keep) and interval_ms is not None
+                      and first_open - keep[-1, OPEN_TIME] <= interval_ms)
+        if not contiguous:
+            keep = rows[:0]
+
+        with self._db_lock:
+            self.conn.execute("BEGIN")
+            if not len(keep):
+                self.conn.execute("DELETE FROM klines WHERE symbol = ? AND interval = ?", key)
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO klines (symbol, interval, {', '.join(FIELDS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(FIELDS))})",
+                [(key[0], key[1], int(r[0]), r[1], r[2], r[3], r[4], r[5], int(r[6]), r[7], int(r[8]), r[9], r[10])
+                 for r in fresh]
+            )
+            self.conn.execute("COMMIT")
+
+        merged = np.concatenate([keep, fresh]) if len(keep) else fresh
+        self.memory.set(key, merged)
+        return merged
+
+    def _trim(self, key, rows):
+        # Drop candles older than the largest window served, once there are enough to bother
+        window = self._windows.get(key, KLINE_MAX_LIMIT)
+        if len(rows) <= window + KLINE_TRIM_SLACK:
+            return rows
+        rows = rows[-window:]
+        with self._db_lock:
+            self.conn.execute("DELETE FROM klines WHERE symbol = ? AND interval = ? AND open_time < ?",
+                              (key[0], key[1], int(rows[0, OPEN_TIME])))
+        self.memory.set(key, rows)
+        return rows
+
+    async def _fetch(self, symbol, interval, limit, start_time=None, end_time=None):
+        params = {
+            "symbol": f"{symbol}USDT",
+            "interval": interval,
+            "limit": limit,
+        }
+        if start_time is not None:
+            params["startTime"] = int(start_time)
+        if end_time is not None:
+            params["endTime"] = int(end_time)
+        data = await get_json(BINANCE_KLINES_URL, params=params)
+        self.upstream_requests += 1
+        if data is None:
+            return None
+        self.upstream_candles += len(data)
+        return parse_binance_klines(data)
+
+    async def _fetch_window(self, symbol, interval, limit):
+        # Page backwards with endTime when more candles are wanted than one request returns
+        pages = []
+        end_time = None
+        remaining = limit
+        while remaining > 0:
+            page = await self._fetch(symbol, interval, min(remaining, MAX_KLINES_PER_REQUEST), end_time=end_time)
+            if page is None:
+                return None if not pages else np.concatenate(pages[::-1])
+            if not len(page):
+                break
+            pages.append(page)
+            remaining -= len(page)
+            if len(page) < MAX_KLINES_PER_REQUEST:
+                break
+            end_time = page[0, OPEN_TIME] - 1
+        if not pages:
+            return np.empty((0, len(FIELDS)))
+        return np.concatenate(pages[::-1])
+
+    async def get_klines(self, coin_symbol, interval, limit):
+        """
+        Returns the latest `limit` candles as an (n, 11) float64 array, or None if the
+        pair is unknown to Binance and nothing is stored, or `limit` is not a positive number.
+        """
+        symbol = coin_symbol.upper()
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return None
+        if limit <= 0:
+            return None
+        limit = min(limit, KLINE_MAX_LIMIT)
+        key = (symbol, interval)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        # One refresh per series at a time; concurrent callers reuse its result
+        async with lock:
+            rows = self._series(key)
+            if key not in self._windows:
+                # What is stored from before a restart was served to someone; keep it
+                self._windows[key] = min(max(len(rows), limit), KLINE_MAX_LIMIT)
+            self._windows[key] = max(self._windows[key], limit)
+            synced_at = self._last_sync.get(key)
+            if len(rows) >= limit and synced_at is not None and time.monotonic() - synced_at < KLINE_REFRESH_SECONDS:
+                return rows[-limit:]
+
+            interval_ms = INTERVAL_MS.get(interval)
+            now_ms = time.time() * 1000
+            if (len(rows) >= limit and interval_ms is not None
+                    and (now_ms - rows[-1, OPEN_TIME]) / interval_ms < MAX_KLINES_PER_REQUEST - 1):
+                # Incremental: only candles from the last stored open time onwards, asking for no
+                # more than can exist so the request weighs as little as possible
+                missing = int(-(-(now_ms - rows[-1, OPEN_TIME]) // interval_ms)) + 1
+                fresh = await self._fetch(symbol, interval, min(missing, MAX_KLINES_PER_REQUEST),
+                                          start_time=rows[-1, OPEN_TIME])
+            else:
+                fresh = await self._fetch_window(symbol, interval, limit)
+
+            if fresh is None:
+                return rows[-limit:] if len(rows) else None
+            if not len(fresh) and not len(rows):
+                return None
+            rows = self._trim(key, self._merge(key, rows, fresh))
+            self._last_sync[key] = time.monotonic()
+            return rows[-limit:]
+
+    def stats(self):
+        return {
+            "series_in_memory": len(self.memory),
+            "upstream_requests": self.upstream_requests,
+            "upstream_candles": self.upstream_candles,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_kline_store():
+    """
+    Returns the process-wide kline store.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KlineStore()
+    return _store
@@ -0,0 +1,304 @@
+import asyncio
+import bisect
+import os
+import time
+from contextlib import contextmanager
+
+from utils.cache import all_cache_stats
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# How often the event-loop lag monitor wakes up (seconds)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+
+# Prometheus text exposition: an HTTP endpoint (0 disables it) and/or a file rewritten periodically
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+
+# name -> (type, help) for everything exported
+_DESCRIPTIONS = {
+    "autobot_command_seconds": ("histogram", "Time from a command's invocation to its completion."),
+    "autobot_command_errors_total": ("counter", "Commands that failed, by error type."),
+    "autobot_fetch_seconds": ("histogram", "Time to get data from utils/get_crypto_data.py, cached or not."),
+    "autobot_upstream_seconds": ("histogram", "Duration of each upstream HTTP attempt."),
+    "autobot_upstream_budget_wait_seconds": ("histogram", "Time spent waiting for API budget before a request."),
+    "autobot_upstream_errors_total": ("counter", "Upstream attempts that did not return 200, by reason."),
+    "autobot_event_loop_lag_seconds": ("histogram", "How late the event loop ran a timer it was asked to run."),
+    "autobot_render_seconds": ("histogram", "Kaleido PNG render time of a chart, waiting for a tab included."),
+    "autobot_render_failures_total": ("counter", "Chart renders that were rejected, timed out or failed."),
+    "autobot_forecast_fit_seconds": ("histogram", "Time to fit a forecast model, by engine (in the worker for statsmodels)."),
+    "autobot_forecast_failures_total": ("counter", "Forecast fits that were rejected, timed out or failed."),
+}
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram, as Prometheus expects it, plus sum, count and max.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        """
+        Adds another histogram with the same buckets into this one.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """
+        Estimates the q-quantile by interpolating inside the bucket it falls in.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+_histograms = {}  # (name, labels) -> Histogram, labels being a sorted tuple of (key, value)
+_counters = {}  # (name, labels) -> int
+_gauges = {}  # name -> (help, function returning the current value)
+_loop_lag = {"last": 0.0, "max": 0.0}
+_started_at = time.time()
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def observe(name, seconds, **labels):
+    key = (name, _labels(labels))
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = Histogram()
+    histogram.observe(seconds)
+
+
+def inc(name, amount=1, **labels):
+    key = (name, _labels(labels))
+    _counters[key] = _counters.get(key, 0) + amount
+
+
+@contextmanager
+def timed(name, **labels):
+    """
+    Records how long the block took into histogram `name`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def register_gauge(name, help_text, read):
+    """
+    Exports a value another module keeps (e.g. a queue depth), read each time metrics are rendered.
+    """
+    _gauges[name] = (help_text, read)
+
+
+def histograms(name):
+    """
+    Returns {labels dict as a tuple: Histogram} for one metric.
+    """
+    return {labels: histogram for (metric, labels), histogram in _histograms.items() if metric == name}
+
+
+def counters(name):
+    return {labels: count for (metric, labels), count in _counters.items() if metric == name}
+
+
+def loop_lag():
+    return dict(_loop_lag)
+
+
+# --- Commands -----------------------------------------------------------------------------------
+
+def instrument_bot(bot):
+    """
+    Times every command the bot runs and counts command errors, on top of the bot's own error handling.
+    """
+    async def before_invoke(ctx):
+        ctx.metrics_started = time.perf_counter()
+
+    async def after_invoke(ctx):
+        started = getattr(ctx, 'metrics_started', None)
+        if started is not None:
+            observe("autobot_command_seconds", time.perf_counter() - started, command=ctx.command.qualified_name,
+                    outcome="error" if ctx.command_failed else "ok")
+
+    default_error_handler = bot.on_command_error
+
+    async def on_command_error(ctx, error):
+        command = ctx.command.qualified_name if ctx.command else "unknown"
+        original = getattr(error, 'original', error)  # CommandInvokeError wraps what the command raised
+        inc("autobot_command_errors_total", command=command, error=type(original).__name__)
+        await default_error_handler(ctx, error)
+
+    bot.before_invoke(before_invoke)
+    bot.after_invoke(after_invoke)
+    bot.on_command_error = on_command_error
+
+
+# --- Event loop lag ----------------------------------------------------------------------------
+
+async def _monitor_loop_lag(interval):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        _loop_lag["last"] = lag
+        _loop_lag["max"] = max(_loop_lag["max"], lag)
+        observe("autobot_event_loop_lag_seconds", lag)
+
+
+_lag_task = None
+
+
+def start_loop_monitor(interval=LOOP_LAG_INTERVAL):
+    """
+    Starts measuring event-loop lag in the running loop (once per process).
+    """
+    global _lag_task
+    if _lag_task is None or _lag_task.done():
+        _lag_task = asyncio.create_task(_monitor_loop_lag(interval))
+    return _lag_task
+
+
+# --- Prometheus exposition --------------------------------------------------------------------
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{key}="{_escape(value)}"' for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float('inf') else repr(float(bound))
+
+
+def render_prometheus():
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for name, (kind, help_text) in _DESCRIPTIONS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for labels, histogram in sorted(histograms(name).items()):
+                for bound, total in histogram.cumulative():
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_bound(bound))])} {total}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        else:
+            for labels, count in sorted(counters(name).items()):
+                lines.append(f"{name}{_format_labels(labels)} {count}")
+
+    lines.append("# HELP autobot_event_loop_lag_max_seconds Largest event-loop lag seen since startup.")
+    lines.append("# TYPE autobot_event_loop_lag_max_seconds gauge")
+    lines.append(f"autobot_event_loop_lag_max_seconds {_loop_lag['max']}")
+
+    for name, (help_text, read) in _gauges.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {read()}")
+
+    # Cache counters are kept by the caches themselves
+    cache_stats = all_cache_stats()
+    for field, kind, help_text in (
+            ("hits", "counter", "Cache lookups served from a stored entry."),
+            ("misses", "counter", "Cache lookups that started a fetch."),
+            ("coalesced", "counter", "Cache lookups that joined a fetch already in flight."),
+            ("evictions", "counter", "Entries evicted to stay within the cache's limits."),
+            ("entries", "gauge", "Entries currently stored."),
+            ("bytes", "gauge", "Approximate bytes currently stored.")):
+        name = f"autobot_cache_{field}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stats in cache_stats:
+            lines.append(f"{name}{_format_labels([('cache', stats['name'])])} {stats[field]}")
+
+    lines.append("# HELP autobot_start_time_seconds Unix time the process started.")
+    lines.append("# TYPE autobot_start_time_seconds gauge")
+    lines.append(f"autobot_start_time_seconds {_started_at}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(text, path=METRICS_FILE):
+    """
+    Atomically replaces path with rendered metrics text (for node_exporter's textfile collector).
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_server = None
+
+
+async def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """
+    Serves GET /metrics on host:port for Prometheus to scrape (once per process).
+    Returns the runner, or None if the port couldn't be bound.
+    """
+    global _server
+    if _server is not None:
+        return _server
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=render_prometheus(), content_type="text/plain", charset="utf-8",
+                            headers={"Cache-Control": "no-cache"})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        print(f"Could not serve metrics on {host}:{port}: {e!r}")
+        await runner.cleanup()
+        return None
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+    _server = runner
+    return _server
@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import threading
+import time
+
+NEWS_DB = os.getenv("NEWS_DB", "news.db")
+
+# Article URLs remembered as already posted; the oldest are forgotten beyond this many
+NEWS_SEEN_MAX = int(os.getenv("NEWS_SEEN_MAX", "2000"))
+
+
+class NewsStore:
+    """
+    Durable news state in SQLite: the subscribed channels (one per guild), a bounded set of
+    article URLs already posted, and the validators of the last NewsAPI fetch. Everything
+    survives restarts, so a restart neither reposts old articles nor spends an extra request.
+    """
+
+    def __init__(self, path=NEWS_DB, seen_max=NEWS_SEEN_MAX):
+        self.path = path
+        self.seen_max = seen_max
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS news_channels ("
+            "channel_id INTEGER PRIMARY KEY, "
+            "guild_id INTEGER, "
+            "subscribed_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_articles ("
+            "url TEXT PRIMARY KEY, "
+            "seen_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_articles_seen_at ON seen_articles (seen_at)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS news_state ("
+            "key TEXT PRIMARY KEY, "
+            "value TEXT)"
+        )
+        self.seen = {row[0] for row in self.conn.execute("SELECT url FROM seen_articles")}
+        self._import_env_channel()
+
+    def _import_env_channel(self):
+        # Channels set before subscriptions existed were kept in NEWS_CHANNEL_ID (.env); subscribe
+        # that channel once, so unsubscribing it later sticks even though .env still names it
+        channel_id = os.getenv("NEWS_CHANNEL_ID")
+        if not channel_id or not channel_id.strip().isdigit():
+            return
+        if self.get_state('imported_env_channel') == channel_id.strip():
+            return
+        self.subscribe(int(channel_id))
+        self.set_state('imported_env_channel', channel_id.strip())
+        print(f"Subscribed NEWS_CHANNEL_ID {channel_id} to crypto news")
+
+    # --- Subscriptions ---------------------------------------------------------------------------
+
+    def subscribe(self, channel_id, guild_id=None):
+        """
+        Makes channel_id the guild's news channel, replacing any other channel of that guild.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN")
+            if guild_id is not None:
+                self.conn.execute("DELETE FROM news_channels WHERE guild_id = ? AND channel_id != ?",
+                                  (guild_id, channel_id))
+            self.conn.execute(
+                "INSERT INTO news_channels (channel_id, guild_id, subscribed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (channel_id) DO UPDATE SET guild_id = COALESCE(excluded.guild_id, guild_id)",
+                (channel_id, guild_id, time.time())
+            )
+            self.conn.execute("COMMIT")
+
+    def unsubscribe(self, channel_id=None, guild_id=None):
+        """
+        Removes a channel, or every channel of a guild. Returns the number removed.
+        """
+        with self._lock:
+            if guild_id is not None:
+                cursor = self.conn.execute("DELETE FROM news_channels WHERE guild_id = ? OR channel_id = ?",
+                                           (guild_id, channel_id))
+            else:
+                cursor = self.conn.execute("DELETE FROM news_channels WHERE channel_id = ?", (channel_id,))
+        return cursor.rowcount
+
+    def record_guilds(self, guilds):
+        """
+        Fills in the guild of channels subscribed without one (e.g. imported from NEWS_CHANNEL_ID),
+        given {channel_id: guild_id}, so a later !setnews in that guild replaces them.
+        """
+        with self._lock:
+            self.conn.executemany("UPDATE news_channels SET guild_id = ? WHERE channel_id = ? AND guild_id IS NULL",
+                                  [(guild_id, channel_id) for channel_id, guild_id in guilds.items()])
+
+    def channels(self):
+        return [row[0] for row in self.conn.execute("SELECT channel_id FROM news_channels ORDER BY subscribed_at")]
+
+    # --- Seen articles ---------------------------------------------------------------------------
+
+    def unseen(self, urls):
+        return [url for url in urls if url not in self.seen]
+
+    def mark_seen(self, urls):
+        """
+        Remembers posted URLs, forgetting the oldest once there are more than seen_max.
+        """
+        urls = [url for url in urls if url not in self.seen]
+        if not urls:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT OR IGNORE INTO seen_articles (url, seen_at) VALUES (?, ?)",
+                                  [(url, now) for url in urls])
+            self.seen.update(urls)
+            excess = len(self.seen) - self.seen_max
+            if excess > 0:
+                oldest = [row[0] for row in self.conn.execute(
+                    "SELECT url FROM seen_articles ORDER BY seen_at, rowid LIMIT ?", (excess,))]
+                self.conn.executemany("DELETE FROM seen_articles WHERE url = ?", [(url,) for url in oldest])
+                self.seen.difference_update(oldest)
+            self.conn.execute("COMMIT")
+
+    # --- Fetch state -----------------------------------------------------------------------------
+
+    def get_state(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM news_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def set_state(self, key, value):
+        with self._lock:
+            if value is None:
+                self.conn.execute("DELETE FROM news_state WHERE key = ?", (key,))
+            else:
+                self.conn.execute("INSERT OR REPLACE INTO news_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def close(self):
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_news_store():
+    """
+    Returns the process-wide news store shared by !setnews and the news loop.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = NewsStore()
+    return _store
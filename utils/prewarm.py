@@ -0,0 +1,50 @@
+import asyncio
+import importlib
+import os
+import time
+
+# Load the deferred heavy dependencies in the background once the bot is connected
+PREWARM_ENABLED = os.getenv("PREWARM", "1") == "1"
+
+# Imported lazily by the modules that use them; the first command would otherwise pay for these
+HEAVY_MODULES = [
+    'pandas',
+    'scipy.signal',
+    'plotly.graph_objs',
+    'matplotlib.figure',
+    'matplotlib.backends.backend_agg',
+]
+
+
+def _import_all():
+    timings = {}
+    for name in HEAVY_MODULES:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+
+    # plotly loads its validators on first use, so build the figure !chart draws once
+    from utils.charts import build_candlestick_figure
+    start = time.perf_counter()
+    build_candlestick_figure('BTC', '1d', '1', [{"time": 0, "open": 1, "high": 1, "low": 1, "close": 1}])
+    timings['plotly figure'] = time.perf_counter() - start
+    return timings
+
+
+async def prewarm():
+    """
+    Imports the heavy modules on a worker thread and starts the forecast workers,
+    so the first !predict or !chart after a restart doesn't pay for them.
+    """
+    # Deferred so importing this module stays cheap
+    from utils.forecasting import prewarm_workers
+
+    start = time.perf_counter()
+    try:
+        timings = await asyncio.to_thread(_import_all)
+        await prewarm_workers()
+    except Exception as e:
+        print(f"Prewarm failed: {e!r}")
+        return
+    breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+    print(f"Prewarmed in {time.perf_counter() - start:.2f}s ({breakdown})")
@@ -0,0 +1,215 @@
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import time
+
+import aiohttp
+
+from utils.http_client import get_session
+
+# Streaming is optional: set PRICE_STREAM=1 to enable it
+PRICE_STREAM_ENABLED = os.getenv("PRICE_STREAM", "0") == "1"
+BINANCE_WS_URL = os.getenv("BINANCE_WS_URL", "wss://stream.binance.com:9443/stream")
+
+# How often the watched set is re-checked for changes (seconds)
+WATCH_REFRESH_INTERVAL = float(os.getenv("PRICE_STREAM_REFRESH", "5"))
+# Prices older than this are not considered live (seconds)
+LIVE_PRICE_MAX_AGE = float(os.getenv("PRICE_STREAM_MAX_AGE", "30"))
+QUOTE_ASSET = 'USDT'
+
+
+def stream_name(symbol):
+    return f"{symbol.lower()}{QUOTE_ASSET.lower()}@miniTicker"
+
+
+class PriceStream:
+    """
+    Binance miniTicker subscriber that keeps a live last-price table for a changing set of coins.
+
+    `watched` is a callable returning the set of coin symbols to follow; the subscription is
+    kept in sync with it. Every tick updates `last_prices` and is passed to the listeners as
+    listener(symbol, price); listeners returning a coroutine are scheduled as tasks. A bad
+    message or a failing listener is logged and skipped, never ending the stream.
+    """
+
+    def __init__(self, watched, url=BINANCE_WS_URL, refresh_interval=WATCH_REFRESH_INTERVAL):
+        self.url = url
+        self.watched = watched
+        self.refresh_interval = refresh_interval
+        self.last_prices = {}  # SYMBOL -> (price, received at monotonic time)
+        self.ticks = 0
+        self.reconnects = 0
+        self.errors = 0
+        self._listeners = []
+        self._pending = set()  # Listener tasks still running
+        self._subscribed = set()
+        self._ids = itertools.count(1)
+        self._ws = None
+        self._task = None
+        self._changed = asyncio.Event()
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def get_price(self, symbol, max_age=LIVE_PRICE_MAX_AGE):
+        """
+        Returns the last streamed price for a coin, or None if it is missing or stale.
+        """
+        entry = self.last_prices.get(symbol.upper())
+        if entry is None or time.monotonic() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def refresh(self):
+        """
+        Asks the stream to re-read the watched set now rather than at the next refresh interval.
+        """
+        self._changed.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        """
+        Connects, subscribes and reads ticks forever, reconnecting with backoff on failure.
+        """
+        backoff = 1
+        while True:
+            try:
+                async with get_session().ws_connect(self.url, heartbeat=30) as ws:
+                    self._ws = ws
+                    self._subscribed = set()
+                    backoff = 1
+                    watcher = asyncio.ensure_future(self._watch_loop())
+                    try:
+                        await self._sync_subscriptions()
+                        await self._read_loop(ws)
+                    finally:
+                        watcher.cancel()
+                        self._ws = None
+            except asyncio.CancelledError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                print(f"Price stream disconnected: {e!r}")
+            except Exception as e:
+                # Anything else is a bug, but alerts should keep streaming after a reconnect
+                self.errors += 1
+                print(f"Price stream failed: {e!r}")
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _read_loop(self, ws):
+        async for message in ws:
+            if message.type == aiohttp.WSMsgType.TEXT:
+                try:
+                    self._handle_message(json.loads(message.data))
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Price stream skipped a message: {e!r} ({message.data[:200]!r})")
+            elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                break
+
+    def _handle_message(self, message):
+        # Combined-stream payloads wrap the event in "data"; subscription replies have "id"
+        data = message.get('data', message)
+        if data.get('e') != '24hrMiniTicker':
+            return
+        pair = data['s']
+        if not pair.endswith(QUOTE_ASSET):
+            return
+        symbol = pair[:-len(QUOTE_ASSET)]
+        if symbol not in self._subscribed:
+            return  # Sent before the server read our UNSUBSCRIBE
+        price = float(data['c'])
+        self.last_prices[symbol] = (price, time.monotonic())
+        self.ticks += 1
+        for listener in self._listeners:
+            try:
+                result = listener(symbol, price)
+            except Exception as e:
+                self.errors += 1
+                print(f"Price stream listener failed on {symbol}: {e!r}")
+                continue
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._pending.add(task)
+                task.add_done_callback(self._listener_done)
+
+    def _listener_done(self, task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+            print(f"Price stream listener failed: {task.exception()!r}")
+
+    async def _watch_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            try:
+                await self._sync_subscriptions()
+            except (aiohttp.ClientError, ConnectionError):
+                return  # The read loop sees the disconnect and reconnects
+            except Exception as e:
+                self.errors += 1
+                print(f"Price stream subscription update failed: {e!r}")
+
+    async def _sync_subscriptions(self):
+        if self._ws is None or self._ws.closed:
+            return
+        desired = {symbol.upper() for symbol in self.watched()}
+        added = desired - self._subscribed
+        removed = self._subscribed - desired
+        if added:
+            await self._ws.send_json({
+                "method": "SUBSCRIBE",
+                "params": sorted(stream_name(symbol) for symbol in added),
+                "id": next(self._ids),
+            })
+        if removed:
+            await self._ws.send_json({
+                "method": "UNSUBSCRIBE",
+                "params": sorted(stream_name(symbol) for symbol in removed),
+                "id": next(self._ids),
+            })
+            for symbol in removed:
+                self.last_prices.pop(symbol, None)
+        self._subscribed = desired
+
+    def stats(self):
+        return {
+            "subscribed": len(self._subscribed),
+            "ticks": self.ticks,
+            "reconnects": self.reconnects,
+            "errors": self.errors,
+            "connected": self._ws is not None and not self._ws.closed,
+        }
+
+
+# The bot's running stream, if streaming is enabled
+live_stream = None
+
+
+def get_live_price(symbol):
+    """
+    Returns a fresh streamed price for a coin, or None when streaming is off or the price is stale.
+    """
+    if live_stream is None:
+        return None
+    return live_stream.get_price(symbol)
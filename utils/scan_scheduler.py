@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+
+from utils.kline_store import get_kline_store
+
+# Candle fetches a scan may have in flight at once
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "16"))
+
+# Summary of the most recent completed scan, for diagnostics
+last_scan_stats = {}
+
+
+class ScanRun:
+    """
+    Data fetching for one scan. Every (coin, interval) series is fetched at most once per run,
+    concurrently with the others under a semaphore, and later stages reuse what earlier ones fetched.
+    """
+
+    def __init__(self, concurrency=SCAN_CONCURRENCY):
+        self.started_at = time.perf_counter()
+        self.stage_seconds = {}
+        self.fetches = 0
+        self.reused = 0
+        self.failed = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._series = {}  # (coin, interval, limit) -> asyncio.Task of rows
+
+    async def _fetch(self, coin, interval, limit):
+        async with self._semaphore:
+            self.fetches += 1
+            try:
+                return await get_kline_store().get_klines(coin, interval, limit)
+            except Exception as e:
+                self.failed += 1
+                print(f"Scan fetch {coin} {interval} failed: {e!r}")
+                return None
+
+    def klines(self, coin, interval, limit=100):
+        """
+        Returns an awaitable of the coin's candle rows (or None), shared by every stage of the run.
+        """
+        key = (coin.upper(), interval, int(limit))
+        task = self._series.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(coin, interval, limit))
+            self._series[key] = task
+        else:
+            self.reused += 1
+        return task
+
+    async def fetch_all(self, pairs, limit=100):
+        """
+        Fetches every (coin, interval) pair concurrently. Returns {(coin, interval): rows or None}.
+        """
+        pairs = list(pairs)
+        results = await asyncio.gather(*(self.klines(coin, interval, limit) for coin, interval in pairs))
+        return dict(zip(pairs, results))
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self, **extra):
+        """
+        Records this run as the latest scan and returns its summary.
+        """
+        stats = {
+            "duration": time.perf_counter() - self.started_at,
+            "stages": dict(self.stage_seconds),
+            "fetches": self.fetches,
+            "reused": self.reused,
+            "failed": self.failed,
+            "finished_at": time.time(),
+        }
+        stats.update(extra)
+        last_scan_stats.clear()
+        last_scan_stats.update(stats)
+        return stats
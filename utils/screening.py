@@ -0,0 +1,87 @@
+import numpy as np
+
+from utils.indicators import EMA_SPANS, MACD_SIGNAL_SPAN, RSI_WINDOW, RSI_EPSILON, _alpha
+
+# Score threshold for a coin to be considered promising in the scheduled scan
+PROMISING_SCORE = 4
+
+
+def build_close_matrix(series):
+    """
+    Stacks close-price series of different lengths into a (coins, time) matrix,
+    right-aligned so the last column is the newest candle, left-padded with NaN.
+    """
+    length = max((len(closes) for closes in series), default=0)
+    matrix = np.full((len(series), length), np.nan)
+    for row, closes in enumerate(series):
+        if len(closes):
+            matrix[row, length - len(closes):] = closes
+    return matrix
+
+
+def _ema_matrix(matrix, span):
+    from scipy.signal import lfilter
+    alpha = _alpha(span)
+    zi = ((1.0 - alpha) * matrix[:, :1])
+    out, _ = lfilter([alpha], [1.0, alpha - 1.0], matrix, axis=1, zi=zi)
+    return out
+
+
+def screen(matrix):
+    """
+    Computes the latest EMA 12/26/100/200, RSI, MACD and MACD Signal for every row of a
+    (coins, time) close matrix in one vectorized pass, plus the scan's breakout/MACD/RSI score.
+    Results match running calculate_indicators on each coin's own series.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    coins, length = matrix.shape
+    if not coins or not length:
+        return {'score': np.zeros(coins, dtype=int)}
+
+    # Replace the left padding with each row's first close: the EMA recursion then holds that
+    # value through the padding, which is exactly an EMA seeded at the first real candle
+    valid = ~np.isnan(matrix)
+    lengths = valid.sum(axis=1)
+    first_index = np.argmax(valid, axis=1)
+    first_close = matrix[np.arange(coins), first_index]
+    filled = np.where(valid, matrix, first_close[:, None])
+
+    emas = {span: _ema_matrix(filled, span)[:, -1] for span in EMA_SPANS}
+    macd_series = _ema_matrix(filled, 12) - _ema_matrix(filled, 26)
+    signal = _ema_matrix(macd_series, MACD_SIGNAL_SPAN)[:, -1]
+    macd = macd_series[:, -1]
+
+    # RSI over the last window of price changes (the padding contributes zero changes)
+    window = filled[:, -(RSI_WINDOW + 1):]
+    delta = np.diff(window, axis=1)
+    if window.shape[1] == RSI_WINDOW:
+        # Series exactly one window long: the first change is the undefined one (counted as zero)
+        delta = np.concatenate([np.zeros((coins, 1)), delta], axis=1)
+    avg_gain = np.where(delta > 0, delta, 0.0).sum(axis=1) / RSI_WINDOW
+    avg_loss = np.where(delta < 0, -delta, 0.0).sum(axis=1) / RSI_WINDOW
+    rsi = 100 - (100 / (1 + avg_gain / (avg_loss + RSI_EPSILON)))
+    rsi = np.where(lengths >= RSI_WINDOW, rsi, np.nan)
+
+    latest_price = filled[:, -1]
+    macd_diff = macd - signal
+
+    score = np.zeros(coins, dtype=int)
+    # EMA Breakout scoring (bullish or bearish)
+    above = (latest_price > emas[100]) & (latest_price > emas[200])
+    below = (latest_price < emas[100]) & (latest_price < emas[200])
+    score += np.where(above | below, 3, 0)
+    # MACD scoring (significant bullish or bearish crossover)
+    score += np.where((macd_diff > 1) | (macd_diff < -1), 2, 0)
+    # RSI scoring (oversold or overbought)
+    score += np.where((rsi < 30) | (rsi > 70), 2, 0)
+    score = np.where(lengths > 0, score, 0)
+
+    results = {f'EMA_{span}': values for span, values in emas.items()}
+    results.update({
+        'close': latest_price,
+        'RSI': rsi,
+        'MACD': macd,
+        'MACD_Signal': signal,
+        'score': score,
+    })
+    return results
@@ -0,0 +1,211 @@
+import asyncio
+import datetime
+import os
+import time
+from collections import Counter
+
+import discord
+
+from utils.cache import TTLCache
+from utils.indicators import indicator_engine
+from utils.kline_store import get_kline_store, OPEN_TIME, CLOSE, CLOSE_TIME
+
+SIGNAL_INTERVALS = ['1h', '4h', '1d']
+SIGNAL_CANDLES = 100
+# A result is reused until its last candle closes, but never for longer than this (seconds),
+# since that candle's close keeps moving while it forms
+SIGNAL_MAX_AGE = float(os.getenv("SIGNAL_MAX_AGE", "900"))
+
+# Per-(symbol, interval) results, valid until the candle they were computed on closes
+signal_cache = TTLCache('signals', ttl=SIGNAL_MAX_AGE, max_entries=4096)
+
+# !analyze lookups per symbol, so the scan can keep popular symbols warm
+signal_requests = Counter()
+
+# (recommendation, icon, thumbnail) for each breakout and for MACD-confirmed breakouts
+_OUTLOOKS = {
+    "Bullish Breakout": ("Potential Long Opportunity", "📈", "https://your-icon-host.com/up-arrow.png"),
+    "Bearish Breakout": ("Potential Short Opportunity", "📉", "https://your-icon-host.com/down-arrow.png"),
+    "No Breakout": ("No Clear Opportunity", "⚖️", "https://your-icon-host.com/balance-scale.png"),
+}
+_STRONG_OUTLOOKS = {
+    "Bullish Breakout": ("Strong Long Opportunity", "🚀", "https://your-icon-host.com/rocket.png"),
+    "Bearish Breakout": ("Strong Short Opportunity", "🔺", "https://your-icon-host.com/red-triangle.png"),
+}  # Thumbnail URLs are placeholders: replace with actual hosted URLs
+
+
+def evaluate(indicators):
+    """
+    Applies the breakout, MACD, RSI and EMA rules to one interval's latest indicator values.
+    Returns a dict of the signal labels plus the outlook the interval supports.
+    """
+    price = indicators['close']
+    ema_100, ema_200 = indicators['EMA_100'], indicators['EMA_200']
+    macd_diff = indicators['MACD'] - indicators['MACD_Signal']
+    rsi = indicators['RSI']
+
+    # Determine breakout analysis
+    if price > ema_100 and price > ema_200:
+        breakout = "Bullish Breakout"
+    elif price < ema_100 and price < ema_200:
+        breakout = "Bearish Breakout"
+    else:
+        breakout = "No Breakout"
+    outlook = _OUTLOOKS[breakout]
+    strong_outlook = None
+
+    # Analyze MACD for confirmation with threshold
+    if macd_diff > 1:
+        macd = "MACD Bullish"
+        if breakout == "Bullish Breakout":
+            strong_outlook = _STRONG_OUTLOOKS[breakout]
+    elif macd_diff < -1:
+        macd = "MACD Bearish"
+        if breakout == "Bearish Breakout":
+            strong_outlook = _STRONG_OUTLOOKS[breakout]
+    else:
+        macd = "MACD Neutral"
+
+    if rsi < 30:
+        rsi_state = "oversold"
+    elif rsi > 70:
+        rsi_state = "overbought"
+    else:
+        rsi_state = "neutral"
+
+    if indicators['EMA_12'] > indicators['EMA_26']:
+        ema_crossover = "bullish"
+    elif indicators['EMA_12'] < indicators['EMA_26']:
+        ema_crossover = "bearish"
+    else:
+        ema_crossover = "neutral"
+
+    return {
+        "indicators": dict(indicators),
+        "breakout": breakout,
+        "macd": macd,
+        "rsi": rsi,
+        "rsi_state": rsi_state,
+        "ema_crossover": ema_crossover,
+        "long_term_uptrend": ema_100 > ema_200,
+        "outlook": strong_outlook or outlook,
+        "strong": strong_outlook is not None,
+    }
+
+
+def overall_outlook(results):
+    """
+    The report's overall (recommendation, icon, thumbnail): set by the first interval,
+    then overridden by any MACD-confirmed breakout.
+    """
+    overall = None
+    for result in results:
+        if overall is None or result['strong']:
+            overall = result['outlook']
+    return overall
+
+
+def _signal_ttl(result):
+    # Valid until the candle it was computed on closes, within SIGNAL_MAX_AGE
+    return max(0.0, min(result['close_time'] / 1000 - time.time(), SIGNAL_MAX_AGE))
+
+
+def compute_signal(symbol, interval, rows):
+    """
+    Computes one (symbol, interval) result from candle rows and memoizes it.
+    The scan calls this with rows it already fetched, which warms the cache for !analyze.
+    """
+    result = _compute(symbol.upper(), interval, rows)
+    signal_cache.set((symbol.upper(), interval), result, _signal_ttl(result))
+    return result
+
+
+def _compute(symbol, interval, rows):
+    # Latest indicator values, advanced incrementally since the previous analysis
+    indicators = indicator_engine.latest(symbol, interval, rows[:, OPEN_TIME], rows[:, CLOSE])
+    result = evaluate(indicators)
+    result.update(symbol=symbol, interval=interval, close_time=int(rows[-1, CLOSE_TIME]))
+    return result
+
+
+async def get_signal(symbol, interval):
+    """
+    Returns the memoized result for (symbol, interval), fetching candles only when the
+    previous result's candle has closed. None if there is no data for the symbol.
+    """
+    symbol = symbol.upper()
+
+    async def fetch():
+        rows = await get_kline_store().get_klines(symbol, interval, SIGNAL_CANDLES)
+        if rows is None or not len(rows):
+            return None
+        return _compute(symbol, interval, rows)
+
+    return await signal_cache.get_or_fetch((symbol, interval), fetch, ttl=_signal_ttl)
+
+
+async def get_signals(symbol, intervals=SIGNAL_INTERVALS):
+    """
+    Results for every interval of a symbol, as !analyze reports them. Counts as a request
+    for keeping the symbol warm.
+    """
+    results = await asyncio.gather(*(get_signal(symbol, interval) for interval in intervals))
+    if all(result is not None for result in results):
+        signal_requests[symbol.upper()] += 1  # Only symbols that exist, so typos don't pile up
+    return results
+
+
+def popular_symbols(count):
+    return [symbol for symbol, _ in signal_requests.most_common(count)]
+
+
+def format_interval(result):
+    """
+    The report section for one interval.
+    """
+    rsi = result['rsi']
+    if result['rsi_state'] == "oversold":
+        rsi_signal = f"RSI is at {rsi:.2f}, indicating **oversold** conditions (potential buy)."
+    elif result['rsi_state'] == "overbought":
+        rsi_signal = f"RSI is at {rsi:.2f}, indicating **overbought** conditions (potential sell)."
+    else:
+        rsi_signal = f"RSI is at {rsi:.2f}, indicating a neutral range."
+
+    if result['ema_crossover'] == "bullish":
+        ema_crossover_signal = "📈 **EMA 12/26 Bullish Crossover**: The short-term EMA (12) is above the long-term EMA (26), indicating an upward trend."
+    elif result['ema_crossover'] == "bearish":
+        ema_crossover_signal = "📉 **EMA 12/26 Bearish Crossover**: The short-term EMA (12) is below the long-term EMA (26), indicating a downward trend."
+    else:
+        ema_crossover_signal = "⚖️ **EMA 12/26 Neutral**: No clear trend detected based on EMA crossover."
+
+    if result['long_term_uptrend']:
+        ema_long_term_signal = "**Long-Term Uptrend**: The 100-day EMA is above the 200-day EMA, indicating a positive market outlook."
+    else:
+        ema_long_term_signal = "**Long-Term Downtrend**: The 100-day EMA is below the 200-day EMA, indicating a negative market outlook."
+
+    recommendation, icon, _ = result['outlook']
+    return (
+        f"**Interval: {result['interval']}**\n"
+        f"**Breakout Analysis**: {result['breakout']}\n"
+        f"**EMA Crossover Analysis**: {ema_crossover_signal}\n"
+        f"**Long-Term EMA Analysis**: {ema_long_term_signal}\n"
+        f"**Recommendation**: {icon} **{recommendation}**\n"
+        f"**MACD Analysis**: {result['macd']}\n"
+        f"{rsi_signal}\n\n"
+    )
+
+
+def build_report_embed(symbol, results):
+    """
+    The multi-interval analysis report shared by !analyze and the scheduled scan.
+    """
+    recommendation, recommendation_icon, thumbnail_url = overall_outlook(results)
+    embed = discord.Embed(
+        title=f"{symbol.upper()} Multi-Interval Analysis Report",
+        description=f"{recommendation_icon} **Overall Recommendation**: {recommendation_icon} {recommendation}\n\n"
+                    + "".join(format_interval(result) for result in results),
+        color=discord.Color.purple()  # Set embed color to purple
+    )
+    embed.set_thumbnail(url=thumbnail_url)  # Set thumbnail image based on recommendation
+    embed.set_footer(text=f"Analysis run at {datetime.datetime.utcnow()} UTC")
+    return embed